@@ -4,8 +4,31 @@ from __future__ import unicode_literals, division, absolute_import, print_functi
 import os
 import threading
 import sys
+import time
+import hashlib
+import subprocess
+import tempfile
+import json
+import functools
+import types
+import collections
+import itertools
+import re
+import stat
 import shellenv
-import sublime
+
+try:
+    import sublime
+except (ImportError):
+    # Configuration snapshots may be loaded by processes outside of Sublime
+    # Text, such as multiprocessing workers, where the API is not available
+    sublime = None
+
+try:
+    import sublime_plugin
+    _EventListener = sublime_plugin.EventListener
+except (ImportError):
+    _EventListener = object
 
 if sys.version_info < (3,):
     str_cls = unicode  # noqa
@@ -29,6 +52,11 @@ _platform = {
 }.get(sys.platform, 'linux')
 
 
+# Sublime Text 3 and newer run plugins in a separate process where the API may
+# be called from any thread, whereas in ST2 it is only safe on the main thread
+_API_THREADSAFE = sys.version_info >= (3,)
+
+
 # A special value object to detect if a setting was not found, versus a setting
 # explicitly being set to null/None in a settings file. We can't use a Python
 # object here because the value is serialized to json via the ST API. Byte
@@ -36,6 +64,189 @@ _platform = {
 _NO_VALUE = '\x01\x02\x03\x04\x05\x06\x07\x08\x09\x0A\x0B\x0C\x0D\x0E\x0F'
 
 
+# Limits for the results cached by cached_output(). The in-memory tier holds
+# a fixed number of results, whereas the on-disk tier is capped by the total
+# number of bytes stored.
+_RESULT_MEMORY_ENTRIES = 256
+_RESULT_DISK_BYTES = 64 * 1024 * 1024
+
+
+# format_files() and FormatQueue pass at most _FORMAT_MAX_ARGS_LENGTH
+# characters of file paths to each invocation, staying within the command
+# line limit of Windows, and run up to one invocation per CPU at a time. Files
+# are only split across CPUs in batches of at least _FORMAT_MIN_BATCH, since
+# starting a process costs more than formatting a few files.
+_FORMAT_MAX_ARGS_LENGTH = 30000
+_FORMAT_MIN_BATCH = 16
+_FORMAT_DEFAULT_DELAY = 0.05
+
+
+# Processes started by tool_server() are shared by every caller using the same
+# executable, arguments, environment and workspace root. _tool_slots maps the
+# (executable name, arguments, root, window) requested to the key of the server
+# most recently returned for that window, so that a change in the configuration
+# of a window stops the old process once no other window is using it.
+# Servers unused for their idle timeout are stopped by a background thread
+# that checks every _TOOL_SERVER_CHECK_SECONDS.
+_TOOL_SERVER_IDLE_SECONDS = 600
+_TOOL_SERVER_CHECK_SECONDS = 10
+_TOOL_SERVER_STOP_SECONDS = 2
+_tool_servers = {}
+_tool_slots = {}
+_tool_servers_lock = threading.Lock()
+_tool_server_reaper = []
+
+
+# Diagnostics from stream_diagnostics() are delivered to the UI thread in
+# batches, no more often than once per _DIAGNOSTICS_DEFAULT_INTERVAL seconds by
+# default. Records are of the form "file.go:line:col: message", with the column
+# optional, and lines starting with a tab continue the previous message.
+_DIAGNOSTICS_DEFAULT_INTERVAL = 0.2
+_DIAGNOSTIC_RE = re.compile(r'^((?:[A-Za-z]:)?[^:]+?\.go):(\d+)(?::(\d+))?: ?(.*)$')
+
+
+# The format version of the data produced by config_snapshot()
+_SNAPSHOT_VERSION = 1
+
+
+# Settings that contain a list of paths, which are split when compiled
+_PATH_LIST_SETTINGS = set(['PATH', 'GOPATH'])
+
+# Settings that are checked to ensure the paths they contain exist
+_VALIDATED_SETTINGS = set(['GOPATH', 'GOROOT'])
+
+
+# When tracing is enabled via start_trace(), this is a list of the Chrome
+# trace_event dicts recorded so far. None indicates tracing is disabled.
+_trace_events = None
+_trace_lock = threading.Lock()
+_trace_clock = getattr(time, 'perf_counter', time.time)
+
+
+# The environment of the user's login shell is cached for the life of the
+# plugin_host process. The snapshot is a dict with the keys "shell", "env",
+# "layer", "subprocess_env", "loaded", "interval" and "timeout", and is only
+# ever replaced as a whole so that readers never observe a partially-updated
+# environment.
+_shell_env_snapshot = None
+_shell_env_lock = threading.Lock()
+_shell_env_refresh_thread = None
+
+# The number of seconds to wait for the login shell when the "shell_timeout"
+# setting is not set. If the last known environment is available, it is used
+# straight away instead.
+_SHELL_DEFAULT_TIMEOUT = 5
+
+# Only these variables from the shell environment are saved to disk for use
+# as the last known environment, since others often contain credentials
+_PERSISTED_ENV_VARS = set(['PATH'])
+_PERSISTED_ENV_PREFIX = 'GO'
+
+
+# The bounds used when the "profile" setting is simply set to true
+_PROFILE_DEFAULT_CALLS = 100
+_PROFILE_DEFAULT_SECONDS = 60
+
+# The state of the profiling session started by the "profile" setting. Since
+# only calls on the UI thread are profiled, no locking is necessary. The
+# limits are cached until golang.sublime-settings changes, and a new session
+# is started whenever the value of the setting changes.
+_profile_session = {
+    'profiler': None,
+    'calls': 0,
+    'started': None,
+    'deadline': None,
+    'setting': None,
+    'limits': _NO_VALUE,
+    'depth': 0,
+    'finished': False,
+}
+
+
+# Diagnostic messages are printed to the console via _log(). Identical messages
+# are only printed once per _LOG_DEDUPE_SECONDS, no more than _LOG_RATE_LIMIT
+# messages are printed per second, and the most recent _LOG_MAX_ENTRIES
+# distinct messages are retained for display by show_diagnostics().
+_LOG_MAX_ENTRIES = 200
+_LOG_DEDUPE_SECONDS = 60
+_LOG_RATE_LIMIT = 10
+_log_entries = collections.deque()
+_log_index = {}
+_log_rate = {'second': 0, 'printed': 0, 'suppressed': 0}
+_log_lock = threading.Lock()
+
+
+# Values read from golang.sublime-settings by _package_setting(), which are
+# discarded whenever Sublime Text reports the settings changed
+_package_settings_cache = {}
+_package_settings_observed = False
+
+
+# When the "main_thread_budget_ms" setting is set, calls from any module that
+# exceed the budget cause later calls from that module, for the next
+# _BUDGET_SNAPSHOT_SECONDS, to be served from recent results. The results are
+# discarded whenever a settings layer or the shell environment changes.
+_BUDGET_SNAPSHOT_SECONDS = 30
+_BUDGET_WARNING_INTERVAL = 60
+_budget_stats = {}
+_budget_depth = [0]
+
+
+# Results of setting_value(), executable_path() and subprocess_info() are
+# cached with the set of dependencies recorded while resolving them. Each
+# dependency is a tuple of ("layer", layer key), ("env", variable name or None
+# for the whole environment) or ("path", directory). _resolved_dependents maps
+# each dependency to the keys of the results that used it, so a change evicts
+# only the affected results. Since the filesystem is not observed, results that
+# checked any paths are also discarded after _RESOLVED_PATH_SECONDS.
+_RESOLVED_MAX_ENTRIES = 4096
+_RESOLVED_PATH_SECONDS = 5
+_resolved_dependents = {}
+_resolved_generation = [0]
+_resolved_lock = threading.RLock()
+_dependency_local = threading.local()
+
+
+# Each change to a settings layer or the shell environment is stamped with the
+# next value of _stamp_counter, so that fingerprint() may take the maximum of
+# the stamps of the layers used by a view or window. Keys are the layer keys
+# used for dependencies, plus "shell". The stamps of views and windows are
+# discarded along with their layer in _project_layers.
+_stamp_counter = itertools.count(1)
+_config_stamps = {}
+
+
+# Sources and path components are interned via _intern(), so that the many
+# results and settings entries referring to the same string share one copy.
+# The table is cleared if it grows past _INTERN_MAX_ENTRIES, which only costs
+# sharing, not correctness.
+_INTERN_MAX_ENTRIES = 10000
+_interned = {}
+
+
+# When the "filesystem_timeout" setting is set, PATH, GOPATH and GOROOT
+# directories are checked concurrently by up to _PROBE_MAX_WORKERS daemon
+# threads, with at most _PROBE_WINDOW checks in flight per lookup so the first
+# match still ends the search early. A directory that does not respond within
+# the timeout is recorded in _slow_dirs, and is skipped for _SLOW_DIR_SECONDS
+# afterwards.
+_PROBE_MAX_WORKERS = 8
+_PROBE_WINDOW = 4
+_SLOW_DIR_SECONDS = 300
+_slow_dirs = {}
+_probe_pool = []
+
+
+# The descriptions yielded by executable_candidates() for each value returned
+# by _executable_status()
+_CANDIDATE_STATUSES = {
+    True: 'executable',
+    False: 'not executable',
+    None: 'not found',
+    _NO_VALUE: 'timed out',
+}
+
+
 class EnvVarError(EnvironmentError):
 
     """
@@ -73,609 +284,5712 @@ class ExecutableError(EnvironmentError):
     dirs = None
 
 
-def debug_enabled():
-    """
-    Checks to see if the "debug" setting is true
-
-    :raises:
-        RuntimeError
-            When the function is called from any thread but the UI thread
+class ResolvedValue(tuple):
 
-    :return:
-        A boolean - if debug is enabled
+    """
+    The result of setting_value() and executable_path(). A two-element tuple
+    of (value, source), as returned by earlier versions, that also exposes
+    where the value came from. To keep instances the size of a plain tuple,
+    the layer and dependencies are class attributes of a shared variant of
+    the class for each combination, created by _resolved_variant().
     """
 
-    # The Sublime Text API is not threadsafe in ST2, so we
-    # double check here to prevent crashes
-    if not isinstance(threading.current_thread(), threading._MainThread):
-        raise RuntimeError('golangconfig.setting_value() must be called from the main thread')
-
-    value = sublime.load_settings('golang.sublime-settings').get('debug')
-    return False if value == '0' else bool(value)
+    __slots__ = ()
 
+    layer = None
+    dependencies = frozenset()
 
-def subprocess_info(executable_name, required_vars, optional_vars=None, view=None, window=None):
-    """
-    Gathers and formats information necessary to use subprocess.Popen() to
-    run one of the go executables, with details pulled from setting_value() and
-    executable_path().
+    def __new__(cls, value, source, layer=None, dependencies=frozenset()):
+        """
+        :param value:
+            The resolved value, or None
 
-    Ensures that the executable path and env dictionary are properly encoded for
-    Sublime Text 2, where byte strings are necessary.
+        :param source:
+            A unicode string of the source of the value, or None
 
-    :param executable_name:
-        A unicode string of the executable to locate, e.g. "go" or "gofmt"
+        :param layer:
+            A unicode string of the kind of layer the value came from:
+            "project", "settings", "auto_gopath" or "shell". None if the value
+            was not found.
 
-    :param required_vars:
-        A list of unicode strings of the environment variables that are
-        required, e.g. "GOPATH". Obtains values from setting_value().
+        :param dependencies:
+            A set of the dependencies recorded while resolving the value
+        """
 
-    :param optional_vars:
-        A list of unicode strings of the environment variables that are
-        optional, but should be pulled from setting_value() if available - e.g.
-        "GOOS", "GOARCH". Obtains values from setting_value().
+        if layer is not None or dependencies:
+            cls = _resolved_variant(layer, frozenset(dependencies))
+        return tuple.__new__(cls, (value, source))
 
-    :param view:
-        A sublime.View object to use in finding project-specific settings. This
-        should be passed whenever available.
+    def __reduce__(self):
+        # Variants are not importable by name, so are pickled via the base
+        return (ResolvedValue, (self[0], self[1], self.layer, self.dependencies))
 
-    :param window:
-        A sublime.Window object to use in finding project-specific settings.
-        This should be passed whenever available.
+    @property
+    def value(self):
+        return self[0]
 
-    :raises:
-        RuntimeError
-            When the function is called from any thread but the UI thread
-        TypeError
-            When any of the parameters are of the wrong type
-        golangconfig.ExecutableError
-            When the executable requested could not be located. The .name
-            attribute contains the name of the executable that could not be
-            located. The .dirs attribute contains a list of unicode strings
-            of the directories searched.
-        golangconfig.EnvVarError
-            When one or more required_vars are not available. The .missing
-            attribute will be a list of the names of missing environment
-            variables.
-        golangconfig.GoPathNotFoundError
-            When one or more directories specified by the GOPATH environment
-            variable could not be found on disk. The .directories attribute will
-            be a list of the directories that could not be found.
-        golangconfig.GoRootNotFoundError
-            When the directory specified by GOROOT environment variable could
-            not be found on disk. The .directory attribute will be the path to
-            the directory that could not be found.
+    @property
+    def source(self):
+        return self[1]
 
-        golangconfig.EnvVarError
-            When one or more required_vars are not available. The .missing
-            attribute will be a list of the names of missing environment
-            variables.
+    def __repr__(self):
+        return 'ResolvedValue(%r, %r, layer=%r)' % (self[0], self[1], self.layer)
 
-    :return:
-        A two-element tuple.
 
-         - [0] A unicode string (byte string for ST2) of the path to the executable
-         - [1] A dict to pass to the env parameter of subprocess.Popen()
+def _resolved_variant(layer, dependencies):
     """
+    Returns the subclass of ResolvedValue with the layer and dependencies as
+    class attributes, creating it the first time the combination is seen
 
-    path, _ = executable_path(executable_name, view=view, window=window)
-    if path is None:
-        name = executable_name
-        if sys.platform == 'win32':
-            name += '.exe'
-        dirs = []
-        settings_path, _ = _get_most_specific_setting('PATH', view=view, window=window)
-        if settings_path and settings_path != _NO_VALUE:
-            dirs.extend(settings_path.split(os.pathsep))
-        _, shell_dirs = shellenv.get_path()
-        for shell_dir in shell_dirs:
-            if shell_dir not in dirs:
-                dirs.append(shell_dir)
-        exception = ExecutableError(
-            'The executable "%s" could not be located in any of the following locations: "%s"' %
-            (
-                name,
-                '", "'.join(dirs)
-            )
-        )
-        exception.name = name
-        exception.dirs = dirs
-        raise exception
+    :param layer:
+        A unicode string of the kind of layer the value came from, or None
 
-    path = shellenv.path_encode(path)
+    :param dependencies:
+        A frozenset of the dependencies recorded while resolving the value
 
-    _, env = shellenv.get_env(for_subprocess=True)
+    :return:
+        A subclass of ResolvedValue
+    """
 
-    var_groups = [required_vars]
-    if optional_vars:
-        var_groups.append(optional_vars)
+    key = (layer, dependencies)
+    variant = _resolved_variants.get(key)
+    if variant is None:
+        attributes = {'__slots__': (), 'layer': layer, 'dependencies': dependencies}
+        variant = type(str('ResolvedValue'), (ResolvedValue,), attributes)
+        _resolved_variants.set(key, variant)
+    return variant
 
-    missing_vars = []
 
-    for var_names in var_groups:
-        for var_name in var_names:
-            value, _ = setting_value(var_name, view=view, window=window)
-            var_key = var_name
+class _Span(object):
 
-            if value is not None:
-                value = str_cls(value)
-                value = shellenv.env_encode(value)
-            var_key = shellenv.env_encode(var_key)
+    """
+    A context manager that records a Chrome trace_event "complete" event
+    covering the code executed within it
+    """
 
-            if value is None:
-                if var_key in env:
-                    del env[var_key]
-                continue
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = _trace_clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = _trace_clock()
+        event = {
+            'name': self.name,
+            'cat': 'golangconfig',
+            'ph': 'X',
+            'ts': int(self.start * 1000000),
+            'dur': int((end - self.start) * 1000000),
+            'pid': os.getpid(),
+            'tid': threading.current_thread().ident,
+        }
+        if self.args:
+            event['args'] = self.args
+        if exc_type is not None:
+            event.setdefault('args', {})['exception'] = exc_type.__name__
+        with _trace_lock:
+            if _trace_events is not None:
+                _trace_events.append(event)
+        return False
+
+
+class _NullSpan(object):
 
-            env[var_key] = value
+    """
+    A no-op stand-in for _Span used when tracing is disabled
+    """
 
-    for required_var in required_vars:
-        var_key = shellenv.env_encode(required_var)
-        if var_key not in env:
-            missing_vars.append(required_var)
+    __slots__ = ()
 
-    if missing_vars:
-        missing_vars = sorted(missing_vars, key=lambda s: s.lower())
-        exception = EnvVarError(
-            'The following environment variable%s currently unset: %s' %
-            (
-                's are' if len(missing_vars) > 1 else ' is',
-                ', '.join(missing_vars)
-            )
-        )
-        exception.missing = missing_vars
-        raise exception
+    def __enter__(self):
+        return self
 
-    encoded_goroot = shellenv.env_encode('GOROOT')
-    if encoded_goroot in env:
-        unicode_sep = shellenv.path_decode(os.sep)
-        name = executable_name
-        if sys.platform == 'win32':
-            name += '.exe'
-        relative_executable_path = shellenv.path_encode('bin%s%s' % (unicode_sep, name))
-        goroot_executable_path = os.path.join(env[encoded_goroot], relative_executable_path)
-        if goroot_executable_path != path:
-            print(
-                'golangconfig: warning - binary %s was found at "%s", which is not inside of the GOROOT "%s"' %
-                (
-                    executable_name,
-                    path,
-                    shellenv.path_decode(env[encoded_goroot])
-                )
-            )
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
 
-    return (path, env)
 
+_NULL_SPAN = _NullSpan()
 
-def setting_value(setting_name, view=None, window=None):
+
+def _span(name, args=None):
     """
-    Returns the user's setting for a specific variable, such as GOPATH or
-    GOROOT. Supports global and per-platform settings. Finds settings by
-    looking in:
+    Creates a context manager that records a trace span if tracing is enabled
 
-    1. If a project is open, the project settings
-    2. The global golang.sublime-settings file
-    3. The user's environment variables, as defined by their login shell
+    :param name:
+        A unicode string of the name of the span
 
-    If the setting is a known name, e.g. GOPATH or GOROOT, the value will be
-    checked to ensure the path exists.
+    :param args:
+        None or a dict of JSON-serializable details to attach to the span
 
-    :param setting_name:
-        A unicode string of the setting to retrieve
+    :return:
+        A context manager
+    """
 
-    :param view:
-        A sublime.View object to use in finding project-specific settings. This
-        should be passed whenever available.
+    if _trace_events is None:
+        return _NULL_SPAN
+    return _Span(name, args)
 
-    :param window:
-        A sublime.Window object to use in finding project-specific settings.
-        This should be passed whenever available.
 
-    :raises:
-        RuntimeError
-            When the function is called from any thread but the UI thread
-        TypeError
-            When any of the parameters are of the wrong type
-        golangconfig.GoPathNotFoundError
-            When one or more directories specified by the GOPATH environment
-            variable could not be found on disk. The .directories attribute will
-            be a list of the directories that could not be found.
-        golangconfig.GoRootNotFoundError
-            When the directory specified by GOROOT environment variable could
-            not be found on disk. The .directory attribute will be the path to
-            the directory that could not be found.
+def _traced(function):
+    """
+    A decorator that records a trace span for each call to a function, using
+    the first argument as a detail when it is a unicode string
+
+    :param function:
+        The function to wrap
 
     :return:
-        A two-element tuple.
+        The wrapped function
+    """
 
-        If no setting was found, the return value will be:
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _trace_events is None:
+            return function(*args, **kwargs)
+        span_args = None
+        if args and isinstance(args[0], str_cls):
+            span_args = {'name': args[0]}
+        with _Span(function.__name__, span_args):
+            return function(*args, **kwargs)
+    return wrapper
 
-         - [0] None
-         - [1] None
 
-        If a setting was found, the return value will be:
+def _trace_str(value):
+    """
+    Converts a byte string or unicode string to a unicode string for
+    inclusion in a trace
 
-         - [0] The setting value
-         - [1] The source of the setting, a unicode string:
-           - "project file (os-specific)"
-           - "golang.sublime-settings (os-specific)"
-           - "project file"
-           - "golang.sublime-settings"
-           - A unicode string of the path to the user's login shell
+    :param value:
+        A byte string or unicode string
 
-        The second element of the tuple is intended to be used in the display
-        of debugging information to end users.
+    :return:
+        A unicode string
     """
 
-    _require_unicode('setting_name', setting_name)
-    _check_view_window(view, window)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return value
 
-    setting, source = _get_most_specific_setting(setting_name, view, window)
 
-    if setting == _NO_VALUE:
-        setting = None
-        source = None
+def _profiled(function):
+    """
+    A decorator for public entry points that captures a cProfile session when
+    the "profile" setting is enabled. The outermost call on the UI thread is
+    profiled, and once the bounded number of calls or seconds is reached, the
+    stats are written to a .pstats file and profiling stops until the
+    setting is changed. A call made after the deadline has passed is not
+    profiled.
 
-        shell, env = shellenv.get_env()
-        if setting_name in env:
-            source = shell
-            setting = env[setting_name]
+    :param function:
+        The function to wrap
 
-    if setting_name not in set(['GOPATH', 'GOROOT']):
-        return (setting, source)
+    :return:
+        The wrapped function
+    """
 
-    if setting is None and source is None:
-        return (setting, source)
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        session = _profile_session
+        if session['depth'] > 0:
+            return function(*args, **kwargs)
+        if not _on_main_thread():
+            return function(*args, **kwargs)
+
+        if session['limits'] == _NO_VALUE:
+            _update_profile_limits()
+        limits = session['limits']
+        if session['finished'] or limits is None:
+            return function(*args, **kwargs)
+        max_calls, max_seconds = limits
+
+        if session['profiler'] is None:
+            profiler = _new_profiler()
+            if profiler is None:
+                session['finished'] = True
+                _log('unable to profile since the cProfile module is not available')
+                return function(*args, **kwargs)
+            session['profiler'] = profiler
+            session['started'] = time.time()
+            session['deadline'] = session['started'] + max_seconds
+
+        elif time.time() >= session['deadline']:
+            _finish_profile()
+            return function(*args, **kwargs)
+
+        session['depth'] += 1
+        session['profiler'].enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            session['profiler'].disable()
+            session['depth'] -= 1
+            session['calls'] += 1
+            if session['calls'] >= max_calls or time.time() >= session['deadline']:
+                _finish_profile()
+    return wrapper
+
+
+def _update_profile_limits():
+    """
+    Caches the limits from the "profile" setting in _profile_session. If the
+    value of the setting changed, any session in progress is written to disk
+    and a new session may be started.
+    """
 
-    # We add some extra processing here for known settings to improve the
-    # user experience, especially around debugging
-    _debug_unicode_string(setting_name, setting, source)
+    session = _profile_session
+    value = _package_setting('profile')
+    if value != session['setting']:
+        if session['profiler'] is not None:
+            _finish_profile()
+        session.update({
+            'profiler': None,
+            'calls': 0,
+            'started': None,
+            'deadline': None,
+            'setting': value,
+            'finished': False,
+        })
+    session['limits'] = _profile_limits(value)
+
+
+def _profile_limits(value):
+    """
+    Parses the "profile" setting, which may be true, or a dict with the keys
+    "calls" and "seconds" to control how long the profiling session lasts
 
-    if not isinstance(setting, str_cls):
-        setting = str_cls(setting)
+    :param value:
+        The value of the "profile" setting
 
-    if setting_name == 'GOROOT':
-        if os.path.exists(setting):
-            return (setting, source)
+    :return:
+        None if profiling is disabled, otherwise a two-element tuple of the
+        maximum number of calls and the maximum number of seconds to profile
+    """
 
-    has_multiple = False
-    if setting_name == 'GOPATH':
-        values = setting.split(os.pathsep)
-        has_multiple = len(values) > 1
-        missing = []
+    if not value or value == '0':
+        return None
 
-        for value in values:
-            if not os.path.exists(value):
-                missing.append(value)
+    max_calls = _PROFILE_DEFAULT_CALLS
+    max_seconds = _PROFILE_DEFAULT_SECONDS
+    if isinstance(value, dict):
+        max_calls = value.get('calls', max_calls)
+        max_seconds = value.get('seconds', max_seconds)
+        # JSON true and false are bools, which are a subclass of int
+        valid_calls = isinstance(max_calls, int) and not isinstance(max_calls, bool)
+        valid_seconds = isinstance(max_seconds, (int, float)) and not isinstance(max_seconds, bool)
+        if not valid_calls or not valid_seconds:
+            _log('the "profile" setting must contain integer "calls" and "seconds" values')
+            return None
+    return (max_calls, max_seconds)
 
-        if not missing:
-            return (setting, source)
 
-    if setting_name == 'GOROOT':
-        message = 'The GOROOT environment variable value "%s" does not exist on the filesystem'
-        e = GoRootNotFoundError(message % setting)
-        e.directory = setting
-        raise e
+def _new_profiler():
+    """
+    Creates a profiler object. The pure-Python profile module is not used as a
+    fallback since it does not support enabling and disabling around calls.
 
-    if not has_multiple:
-        suffix = 'value "%s" does not exist on the filesystem' % missing[0]
-    elif len(missing) == 1:
-        suffix = 'contains the directory "%s" that does not exist on the filesystem' % missing[0]
-    else:
-        paths = ', '.join('"' + path + '"' for path in missing)
-        suffix = 'contains %s directories that do not exist on the filesystem: %s' % (len(missing), paths)
+    :return:
+        None if the cProfile module is not available, otherwise a
+        cProfile.Profile object
+    """
 
-    message = 'The GOPATH environment variable ' + suffix
-    e = GoPathNotFoundError(message)
-    e.directories = missing
-    raise e
+    try:
+        import cProfile
+    except (ImportError):
+        return None
+    return cProfile.Profile()
 
 
-def executable_path(executable_name, view=None, window=None):
+def _finish_profile():
+    """
+    Writes the stats for the current profiling session to disk and prevents
+    any further profiling until Sublime Text is restarted
     """
-    Uses the user's Sublime Text settings and then PATH environment variable
-    as set by their login shell to find a go executable
 
-    :param name:
-        The name of the binary to find - a unicode string of "go", "gofmt" or
-        "godoc"
+    session = _profile_session
+    session['finished'] = True
+    profiler = session['profiler']
+    session['profiler'] = None
 
-    :param view:
-        A sublime.View object to use in finding project-specific settings. This
-        should be passed whenever available.
+    file_name = 'golangconfig-%d-%d.pstats' % (os.getpid(), int(session['started']))
+    path = os.path.join(_cache_dir('profiles'), file_name)
+    try:
+        profiler.dump_stats(path)
+    except (IOError, OSError) as e:
+        _log('unable to write profile to "%s" - %s' % (path, str_cls(e)))
+        return
+    _log('wrote profile of %d calls to "%s"' % (session['calls'], path))
 
-    :param window:
-        A sublime.Window object to use in finding project-specific settings.
-        This should be passed whenever available.
 
-    :raises:
-        RuntimeError
-            When the function is called from any thread but the UI thread
-        TypeError
-            When any of the parameters are of the wrong type
+def _guarded(function):
+    """
+    A decorator for public entry points that measures the time spent in calls
+    on the UI thread, aggregated by the module of the caller. Once a call
+    exceeds the "main_thread_budget_ms" setting, a warning is printed and, for
+    the next _BUDGET_SNAPSHOT_SECONDS, subsequent calls from the same module
+    with the same arguments are served from a recent result instead of being
+    recalculated. The first call of each function from a module is not
+    counted, since it includes populating the caches.
+
+    :param function:
+        The function to wrap
 
     :return:
-        A 2-element tuple.
+        The wrapped function
+    """
 
-        If the executable was not found, the return value will be:
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _budget_depth[0] > 0:
+            return function(*args, **kwargs)
+        if not _on_main_thread():
+            return function(*args, **kwargs)
+
+        budget = _package_setting('main_thread_budget_ms')
+        if not isinstance(budget, (int, float)) or budget <= 0:
+            return function(*args, **kwargs)
+
+        # Calls made within golangconfig return above, so the direct caller
+        # is the module making the call
+        caller = sys._getframe(1).f_globals.get('__name__', '__main__')
+        stats = _budget_stats.get(caller)
+        if stats is None:
+            stats = {
+                'calls': 0,
+                'over_budget': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'snapshot': False,
+                'warned': 0,
+                'snapshot_started': 0,
+                'warm': set(),
+            }
+            _budget_stats[caller] = stats
+
+        if stats['snapshot'] and time.time() - stats['snapshot_started'] > _BUDGET_SNAPSHOT_SECONDS:
+            stats['snapshot'] = False
+
+        key = None
+        if stats['snapshot']:
+            key = _budget_key(caller, function, args, kwargs)
+            cached = _budget_results.get(key) if key is not None else None
+            if cached is not None and time.time() - cached[0] < _BUDGET_SNAPSHOT_SECONDS:
+                stats['calls'] += 1
+                return _copy_result(cached[1])
+
+        cold = function.__name__ not in stats['warm']
+        start = _trace_clock()
+        _budget_depth[0] += 1
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            _budget_depth[0] -= 1
+            elapsed_ms = (_trace_clock() - start) * 1000
+            stats['calls'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['warm'].add(function.__name__)
+
+        if elapsed_ms > budget and not cold:
+            stats['over_budget'] += 1
+            if not stats['snapshot']:
+                stats['snapshot'] = True
+                stats['snapshot_started'] = time.time()
+            if time.time() - stats['warned'] > _BUDGET_WARNING_INTERVAL:
+                stats['warned'] = time.time()
+                _log(
+                    'warning - %s() called from %s took %.1fms, exceeding the budget of %sms; '
+                    'recent results will be reused for calls from %s' %
+                    (
+                        function.__name__,
+                        caller,
+                        elapsed_ms,
+                        budget,
+                        caller
+                    )
+                )
 
-         - [0] None
-         - [1] None
+        if stats['snapshot']:
+            if key is None:
+                key = _budget_key(caller, function, args, kwargs)
+            if key is not None:
+                _budget_results.set(key, (time.time(), _copy_result(result)))
 
-        If the exeutable was found, the return value will be:
+        return result
+    return wrapper
 
-         - [0] A unicode string of the full path to the executable
-         - [1] A unicode string of the source of the PATH value
-           - "project file (os-specific)"
-           - "golang.sublime-settings (os-specific)"
-           - "project file"
-           - "golang.sublime-settings"
-           - A unicode string of the path to the user's login shell
 
-        The second element of the tuple is intended to be used in the display
-        of debugging information to end users.
+def _budget_key(caller, function, args, kwargs):
     """
+    Builds a hashable key for a call to a public function from a module
 
-    _require_unicode('executable_name', executable_name)
-    _check_view_window(view, window)
+    :param caller:
+        A unicode string of the name of the calling module
 
-    executable_suffix = '.exe' if sys.platform == 'win32' else ''
-    suffixed_name = executable_name + executable_suffix
+    :param function:
+        The function being called
 
-    setting, source = _get_most_specific_setting('PATH', view, window)
-    if setting is not _NO_VALUE:
-        is_str = isinstance(setting, str_cls)
-        if not is_str:
-            if debug_enabled():
-                _debug_unicode_string('PATH', setting, source)
-        else:
-            for dir_ in setting.split(os.pathsep):
-                possible_executable_path = os.path.join(dir_, suffixed_name)
-                if _check_executable(possible_executable_path, source, setting):
-                    return (possible_executable_path, source)
+    :param args:
+        A tuple of the positional arguments
 
-            if debug_enabled():
-                print(
-                    'golangconfig: binary %s not found in PATH from %s - "%s"' %
-                    (
-                        executable_name,
-                        source,
-                        setting
-                    )
-                )
+    :param kwargs:
+        A dict of the keyword arguments
+
+    :return:
+        None if the arguments could not be converted into a key, otherwise a
+        hashable tuple
+    """
 
-    shell, path_dirs = shellenv.get_path()
-    for dir_ in path_dirs:
-        possible_executable_path = os.path.join(dir_, suffixed_name)
-        if _check_executable(possible_executable_path, shell, os.pathsep.join(path_dirs)):
-            return (possible_executable_path, shell)
+    key = _call_key(function, args, kwargs)
+    if key is None:
+        return None
+    return (caller,) + key
 
-    if debug_enabled():
-        print(
-            'golangconfig: binary %s not found in PATH from %s - "%s"' %
-            (
-                executable_name,
-                shell,
-                os.pathsep.join(path_dirs)
-            )
-        )
 
-    return (None, None)
+def _call_key(function, args, kwargs):
+    """
+    Builds a hashable key for a call to a public function
 
+    :param function:
+        The function being called
 
-def _get_most_specific_setting(name, view, window):
+    :param args:
+        A tuple of the positional arguments
+
+    :param kwargs:
+        A dict of the keyword arguments
+
+    :return:
+        None if the arguments could not be converted into a key, otherwise a
+        hashable tuple
     """
-    Looks up a setting in the following order:
 
-    1. View settings, looking inside of the "osx", "windows" or "linux" key
-       based on the OS that Sublime Text is running on. These settings are from
-       a project file.
-    2. Window settings (ST3 only), looking inside of the "osx", "windows" or
-       "linux" key based on the OS that Sublime Text is running on. These
-       settings are from a project file.
-    3. golang.sublime-settings, looking inside of the "osx", "windows" or
-       "linux" key based on the OS that Sublime Text is running on.
-    4. The view settings. These settings are from a project file.
-    5. The window settings (ST3 only). These settings are from a project file.
-    6. golang.sublime-settings
+    def convert(value):
+        if isinstance(value, (list, tuple)):
+            return tuple([convert(v) for v in value])
+        if isinstance(value, dict):
+            return tuple(sorted([(k, convert(v)) for k, v in value.items()]))
+        if isinstance(value, sublime.View) or isinstance(value, sublime.Window):
+            return (value.__class__.__name__, _object_id(value))
+        return value
+
+    key = (function.__name__, convert(args), convert(kwargs))
+    try:
+        hash(key)
+    except (TypeError):
+        return None
+    return key
+
+
+def _tracked(function):
+    """
+    A decorator for public functions that resolve values from the settings,
+    the shell environment and the filesystem. Results are cached along with
+    the dependencies recorded while resolving them, so that a change to one
+    settings layer, environment variable or directory evicts only the results
+    that used it. The function must accept view and window parameters.
+
+    :param function:
+        The function to wrap
+
+    :return:
+        The wrapped function
+    """
+
+    code = function.__code__
+    arg_names = code.co_varnames[:code.co_argcount]
+    defaults = function.__defaults__ or ()
+    num_required = len(arg_names) - len(defaults)
+    view_index = arg_names.index('view')
+    window_index = arg_names.index('window')
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # The key is built from the value of every parameter, so that calls
+        # passing the same values positionally or by keyword share results
+        if len(args) > len(arg_names):
+            return function(*args, **kwargs)
+        values = list(args) + [_NO_VALUE] * (len(arg_names) - len(args))
+        for name, value in kwargs.items():
+            if name not in arg_names or values[arg_names.index(name)] is not _NO_VALUE:
+                return function(*args, **kwargs)
+            values[arg_names.index(name)] = value
+        for index in range(num_required, len(arg_names)):
+            if values[index] is _NO_VALUE:
+                values[index] = defaults[index - num_required]
+        # Leaves reporting a missing required argument to the function itself
+        if any(value is _NO_VALUE for value in values[:num_required]):
+            return function(*args, **kwargs)
+
+        key = _call_key(function, tuple(values), {})
+        if key is None:
+            return function(*args, **kwargs)
+
+        view = values[view_index]
+        window = values[window_index]
+        _check_view_window(view, window)
+
+        # Reading the layers writes through to the settings mirror, which
+        # invalidates any results that depended on a layer that changed
+        _settings_layers(view, window)
+        if not _package_settings_observed:
+            return function(*args, **kwargs)
+
+        cached = _resolved_results.get(key)
+        if cached is not None and (cached[2] is None or cached[2] > time.time()):
+            if cached[3]:
+                # Starts a background refresh of the shell environment once
+                # it is older than the "shell_env_refresh_interval" setting
+                _shell_env()
+            _record_dependencies(cached[1])
+            return _copy_result(cached[0])
+
+        generation = _resolved_generation[0]
+        dependencies = set()
+        stack = _dependency_stack()
+        stack.append(dependencies)
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            stack.pop()
+
+        _record_dependencies(dependencies)
+        if isinstance(result, ResolvedValue):
+            result = ResolvedValue(result[0], result[1], result.layer, dependencies)
+        _store_resolved(key, result, dependencies, generation)
+        return result
+    return wrapper
+
+
+def _dependency_stack():
+    """
+    :return:
+        The list of dependency sets being recorded by the current thread
+    """
+
+    stack = getattr(_dependency_local, 'stack', None)
+    if stack is None:
+        stack = []
+        _dependency_local.stack = stack
+    return stack
+
+
+def _depend(kind, name):
+    """
+    Records a dependency of the result currently being resolved
+
+    :param kind:
+        A unicode string of "layer", "env" or "path"
 
     :param name:
-        A unicode string of the setting to fetch
+        The layer key, environment variable name or directory
+    """
 
-    :param view:
-        A sublime.View object to use in finding project-specific settings. This
-        should be passed whenever available.
+    stack = _dependency_stack()
+    if stack:
+        stack[-1].add((kind, name))
+
+
+def _record_dependencies(dependencies):
+    """
+    Adds the dependencies of a nested result to the result currently being
+    resolved
+
+    :param dependencies:
+        An iterable of dependency tuples
+    """
+
+    stack = _dependency_stack()
+    if stack:
+        stack[-1].update(dependencies)
+
+
+def _store_resolved(key, result, dependencies, generation):
+    """
+    Caches a result and indexes it by each of its dependencies
+
+    :param key:
+        The hashable key from _call_key()
+
+    :param result:
+        The return value of the function
+
+    :param dependencies:
+        A set of dependency tuples
+
+    :param generation:
+        The value of _resolved_generation when resolving started. If anything
+        was invalidated since, the result may be stale and is not stored.
+    """
+
+    expires = None
+    uses_env = False
+    for kind, _ in dependencies:
+        if kind == 'path' and expires is None:
+            expires = time.time() + _RESOLVED_PATH_SECONDS
+        elif kind == 'env':
+            uses_env = True
+
+    with _resolved_lock:
+        if generation != _resolved_generation[0]:
+            return
+        for dependency in dependencies:
+            _resolved_dependents.setdefault(dependency, set()).add(key)
+        _resolved_results.set(key, (_copy_result(result), frozenset(dependencies), expires, uses_env))
+
+
+def _forget_resolved(key, entry):
+    """
+    Removes a cached result from the dependency index. Called when a result is
+    evicted from _resolved_results.
+
+    :param key:
+        The hashable key of the result
+
+    :param entry:
+        The cached tuple of (result, dependencies, expires, uses_env)
+    """
+
+    with _resolved_lock:
+        for dependency in entry[1]:
+            keys = _resolved_dependents.get(dependency)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del _resolved_dependents[dependency]
 
-    :param window:
-        A sublime.Window object to use in finding project-specific settings.
-        This should be passed whenever available.
+
+def _invalidate_dependencies(matches):
+    """
+    Evicts the cached results that depend on anything matching a predicate
+
+    :param matches:
+        A callable that accepts a dependency tuple and returns a boolean
 
     :return:
-        A two-element tuple.
+        An integer of the number of results evicted
+    """
 
-        If no setting was found, the return value will be:
+    with _resolved_lock:
+        _resolved_generation[0] += 1
+        keys = set()
+        for dependency in list(_resolved_dependents.keys()):
+            if matches(dependency):
+                keys.update(_resolved_dependents[dependency])
+        for key in keys:
+            entry = _resolved_results.pop(key)
+            if entry is not None:
+                _forget_resolved(key, entry)
+    if keys:
+        _budget_results.clear()
+    return len(keys)
+
+
+def _bump_stamp(key):
+    """
+    Records that a settings layer or the shell environment changed
 
-         - [0] golangconfig._NO_VALUE
-         - [1] None
+    :param key:
+        The layer key, or "shell"
+    """
 
-        If a setting was found, the return value will be:
+    _config_stamps[key] = next(_stamp_counter)
+    # Results reused while over the UI thread budget may depend on the layer
+    _budget_results.clear()
 
-         - [0] The setting value
-         - [1] A unicode string of the source:
-           - "project file (os-specific)"
-           - "golang.sublime-settings (os-specific)"
-           - "project file"
-           - "golang.sublime-settings"
+
+def _invalidate_env(names):
     """
+    Evicts the cached results that used the shell environment
 
-    # The Sublime Text API is not threadsafe in ST2, so we
-    # double check here to prevent crashes
-    if not isinstance(threading.current_thread(), threading._MainThread):
-        raise RuntimeError('golangconfig.setting_value() must be called from the main thread')
+    :param names:
+        None to evict results that used any variable, otherwise a list of
+        unicode strings of the variables that changed
 
-    if view is not None and not isinstance(view, sublime.View):
-        raise TypeError('view must be an instance of sublime.View, not %s' % _type_name(view))
+    :return:
+        An integer of the number of results evicted
+    """
 
-    if window is not None and not isinstance(window, sublime.Window):
-        raise TypeError('window must be an instance of sublime.Window, not %s' % _type_name(window))
+    def matches(dependency):
+        if dependency[0] != 'env':
+            return False
+        return names is None or dependency[1] is None or dependency[1] in names
+    return _invalidate_dependencies(matches)
 
-    st_settings = sublime.load_settings('golang.sublime-settings')
 
-    view_settings = view.settings().get('golang', {}) if view else {}
+def _invalidate_paths(paths):
+    """
+    Evicts the cached results that checked a path, a directory within it, or
+    a directory containing it
 
-    if view and not window:
-        window = view.window()
+    :param paths:
+        A list of unicode strings of filesystem paths
 
-    window_settings = {}
-    if window:
-        if sys.version_info >= (3,) and window.project_data():
-            window_settings = window.project_data().get('settings', {}).get('golang', {})
-        elif not view and window.active_view():
-            window_settings = window.active_view().settings().get('golang', {})
-
-    settings_objects = [
-        (view_settings, 'project file'),
-        (window_settings, 'project file'),
-        (st_settings, 'golang.sublime-settings'),
-    ]
-
-    for settings_object, source in settings_objects:
-        platform_settings = settings_object.get(_platform, _NO_VALUE)
-        if platform_settings == _NO_VALUE:
-            continue
-        if not isinstance(platform_settings, dict):
-            continue
-        if platform_settings.get(name, _NO_VALUE) != _NO_VALUE:
-            return (platform_settings.get(name), source + ' (os-specific)')
+    :return:
+        An integer of the number of results evicted
+    """
 
-    for settings_object, source in settings_objects:
-        result = settings_object.get(name, _NO_VALUE)
-        if result != _NO_VALUE:
-            return (settings_object.get(name), source)
+    normalized = [os.path.normpath(path) for path in paths]
 
-    return (_NO_VALUE, None)
+    def related(a, b):
+        return a == b or a.startswith(b.rstrip(os.sep) + os.sep)
 
+    def matches_directory(directory):
+        directory = os.path.normpath(directory)
+        for path in normalized:
+            if related(directory, path) or related(path, directory):
+                return True
+        return False
 
-def _require_unicode(name, value):
+    for executable_path_ in _executable_statuses.keys():
+        if matches_directory(os.path.dirname(executable_path_)):
+            _executable_statuses.pop(executable_path_)
+
+    return _invalidate_dependencies(
+        lambda dependency: dependency[0] == 'path' and matches_directory(dependency[1])
+    )
+
+
+def _copy_result(result):
     """
-    Requires that a parameter be a unicode string
+    Copies any dicts or lists in a result tuple or ResolvedValue so cached
+    results can not be modified by callers
 
-    :param name:
-        A unicode string of the parameter name
+    :param result:
+        The return value of a public function
 
-    :param value:
-        The parameter value
+    :return:
+        A copy of the result
+    """
 
-    :raises:
-        TypeError
-            When the value is not a unicode string
+    if isinstance(result, ResolvedValue):
+        return ResolvedValue(_copy_result(result.value), result.source, result.layer, result.dependencies)
+    if isinstance(result, tuple):
+        return tuple([_copy_result(r) for r in result])
+    if isinstance(result, dict):
+        return result.copy()
+    if isinstance(result, list):
+        return [_copy_result(r) for r in result]
+    return result
+
+
+def budget_stats():
     """
+    Returns the time spent in golangconfig calls on the UI thread, grouped by
+    the module that made the calls. Statistics are only recorded while the
+    "main_thread_budget_ms" setting is set.
 
-    if not isinstance(value, str_cls):
-        raise TypeError('%s must be a unicode string, not %s' % (name, _type_name(value)))
+    :return:
+        A dict with unicode string keys of module names, and dict values with
+        the keys:
+
+         - "calls": an integer of the number of calls made
+         - "over_budget": an integer of the number of calls over the budget
+         - "total_ms": a float of the total milliseconds spent in calls
+         - "max_ms": a float of the longest call, in milliseconds
+         - "snapshot": a boolean - if calls are being served from recent results
+    """
 
+    output = {}
+    for caller, stats in list(_budget_stats.items()):
+        caller_stats = stats.copy()
+        del caller_stats['warned']
+        del caller_stats['snapshot_started']
+        del caller_stats['warm']
+        output[caller] = caller_stats
+    return output
 
-def _check_view_window(view, window):
+
+def invalidate(view=None, window=None, env_vars=None, paths=None):
     """
-    Ensures that the view and window parameters to a function are suitable
-    objects for our purposes. There is not a strict check for type to allow for
-    mocking during testing.
+    Discards the results cached by setting_value(), executable_path() and
+    subprocess_info() that depend on a specific view, window, environment
+    variable or path. Changes to settings and to the shell environment are
+    detected automatically, however changes to the filesystem, such as
+    installing a tool, are only noticed after a few seconds unless reported
+    via this function. Reporting a path also clears any record of it being
+    slow to respond. With no parameters, all cached results are discarded.
 
     :param view:
-        The view parameter to check
+        A sublime.View object whose settings changed
 
     :param window:
-        The window parameter to check
+        A sublime.Window object whose project settings changed
+
+    :param env_vars:
+        A list of unicode strings of the names of environment variables that
+        changed
+
+    :param paths:
+        A list of unicode strings of files or directories that changed
 
     :raises:
         TypeError
-            When the view or window parameters are not of the appropriate type
+            When any of the parameters are of the wrong type
+
+    :return:
+        An integer of the number of results discarded
     """
 
+    _check_view_window(view, window)
+    for name, value in (('env_vars', env_vars), ('paths', paths)):
+        if value is not None and not isinstance(value, (list, tuple)):
+            raise TypeError('%s must be a list, not %s' % (name, _type_name(value)))
+
+    if view is None and window is None and env_vars is None and paths is None:
+        _bump_stamp('golang.sublime-settings')
+        _bump_stamp('shell')
+        _slow_dirs.clear()
+        _executable_statuses.clear()
+        return _invalidate_dependencies(lambda dependency: True)
+
+    layer_keys = set()
     if view is not None:
-        if not isinstance(view, sublime.View):
-            raise TypeError('view must be an instance of sublime.View, not %s' % _type_name(view))
+        layer_keys.add(_mirror_key(view))
+    if window is not None:
+        layer_keys.add(_mirror_key(window))
+    for layer_key in layer_keys:
+        _bump_stamp(layer_key)
+    if env_vars:
+        _bump_stamp('shell')
+
+    evicted = _invalidate_dependencies(
+        lambda dependency: dependency[0] == 'layer' and dependency[1] in layer_keys
+    )
+    if env_vars:
+        evicted += _invalidate_env(list(env_vars))
+    if paths:
+        for path in paths:
+            _slow_dirs.pop(path, None)
+        evicted += _invalidate_paths(list(paths))
+
+    if _API_THREADSAFE or _on_main_thread():
+        if view is not None:
+            _view_settings_changed(view)
+        if window is not None:
+            _window_layer(window, None)
+    return evicted
+
+
+def fingerprint(view=None, window=None):
+    """
+    Returns a version number of the effective configuration for a view or
+    window, which increases whenever the project settings,
+    golang.sublime-settings or the shell environment change. Once a view or
+    window has been seen, this is computed from state maintained as changes
+    are reported, without calling the Sublime Text API, so packages may call
+    it frequently to determine if derived data needs to be rebuilt. Changes to
+    the filesystem, such as installing a tool, are not reflected. May be
+    called from any thread.
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+
+    :return:
+        An integer
+    """
+
+    _check_view_window(view, window)
+
+    if _shell_env_snapshot is None:
+        _shell_env()
 
+    keys = ['golang.sublime-settings', 'shell']
+    if view is not None:
+        view_key = _mirror_key(view)
+        cached_window = _view_attributes.get((view_key, 'window'))
+        if _project_layers.get(view_key) is None or cached_window is None:
+            _settings_layers(view, window)
+            cached_window = _view_attributes.get((view_key, 'window'), (None,))
+        keys.append(view_key)
+        if window is None:
+            window = cached_window[0]
     if window is not None:
-        if not isinstance(window, sublime.Window) and sys.version_info >= (3,):
-            raise TypeError('window must be an instance of sublime.Window, not %s' % _type_name(window))
+        keys.append(_mirror_key(window))
+        if view is None and _project_layers.get(keys[-1]) is None:
+            _settings_layers(None, window)
 
+    _global_layer()
+    if not _package_settings_observed:
+        # Without change notifications, any lookup may see new values
+        _bump_stamp('golang.sublime-settings')
 
-def _type_name(value):
+    return max([_config_stamps.get(key, 0) for key in keys])
+
+
+def debug_enabled():
     """
-    :param value:
-        The value to get the type name of
+    Checks to see if the "debug" setting is true. May be called from any
+    thread.
 
     :return:
-        A unicode string of the name of the value's type
+        A boolean - if debug is enabled
     """
 
-    value_cls = value.__class__
-    value_module = value_cls.__module__
-    if value_module in set(['builtins', '__builtin__']):
-        return value_cls.__name__
+    value = _package_setting('debug')
+    return False if value == '0' else bool(value)
 
-    return '%s.%s' % (value_module, value_cls.__name__)
 
+def recent_diagnostics():
+    """
+    Returns the most recent distinct diagnostic messages generated by
+    golangconfig, including those that were not printed to the console due to
+    deduplication or rate limiting. May be called from any thread.
 
-def _debug_unicode_string(name, value, source):
+    :return:
+        A list of dicts, oldest first, each with the keys:
+
+         - "message": a unicode string of the message
+         - "count": an integer of the number of times the message occurred
+         - "first": a float timestamp of the first occurrence
+         - "last": a float timestamp of the most recent occurrence
+         - "printed": a float timestamp of when the message was last printed
+           to the console, or None if it has not been printed
     """
-    Displays a debug message to the console if the value is not a unicode string
 
-    :param name:
-        A unicode string of the name of the setting
+    with _log_lock:
+        return [entry.copy() for entry in _log_entries]
 
-    :param value:
-        The setting value to check
 
-    :param source:
-        A unicode string of the source of the setting
+def show_diagnostics(window):
     """
+    Displays the recent diagnostic messages from golangconfig in an output
+    panel named "golangconfig"
 
-    if value is not None and not isinstance(value, str_cls):
-        print(
-            'golangconfig: the value for %s from %s is not a string, but instead a %s' %
-            (
-                name,
-                source,
-                _type_name(value)
-            )
-        )
-
+    :param window:
+        A sublime.Window object to show the output panel in
 
-def _check_executable(possible_executable_path, source, setting):
+    :raises:
+        RuntimeError
+            When the function is called from any thread but the UI thread
+        TypeError
+            When any of the parameters are of the wrong type
     """
-    Checks to see if a path to an executable exists and that it is, in fact,
-    executable. Will display debug info if the path exists, but is not
-    executable.
 
-    :param possible_executable_path:
-        A unicode string of the full file path to the executable
+    if not _on_main_thread():
+        raise RuntimeError('golangconfig.show_diagnostics() must be called from the main thread')
 
-    :param source:
-        A unicode string of the source of the setting
+    if not isinstance(window, sublime.Window):
+        raise TypeError('window must be an instance of sublime.Window, not %s' % _type_name(window))
 
-    :param setting:
-        A unicode string of the PATH value that the executable was found in
+    lines = []
+    for entry in recent_diagnostics():
+        timestamp = time.strftime('%H:%M:%S', time.localtime(entry['last']))
+        suffix = ' (x%d)' % entry['count'] if entry['count'] > 1 else ''
+        lines.append('[%s] %s%s' % (timestamp, entry['message'], suffix))
+    if not lines:
+        lines.append('No diagnostic messages')
+
+    # create_output_panel() is only available in ST3
+    if hasattr(window, 'create_output_panel'):
+        panel = window.create_output_panel('golangconfig')
+    else:
+        panel = window.get_output_panel('golangconfig')
+    panel.run_command('append', {'characters': '\n'.join(lines) + '\n'})
+    window.run_command('show_panel', {'panel': 'output.golangconfig'})
 
-    :return:
-        A boolean - if the possible_executable_path is a file that is executable
+
+@_guarded
+@_profiled
+@_tracked
+def subprocess_info(executable_name, required_vars, optional_vars=None, view=None, window=None):
     """
+    Gathers and formats information necessary to use subprocess.Popen() to
+    run one of the go executables, with details pulled from setting_value() and
+    executable_path().
 
-    if os.path.exists(possible_executable_path):
-        is_executable = os.path.isfile(possible_executable_path) and os.access(possible_executable_path, os.X_OK)
-        if is_executable:
-            return True
+    Ensures that the executable path and env dictionary are properly encoded for
+    Sublime Text 2, where byte strings are necessary.
 
-        if debug_enabled():
-            executable_name = os.path.basename(possible_executable_path)
-            print(
-                'golangconfig: binary %s found in PATH from %s - "%s" - is not executable' %
-                (
-                    executable_name,
-                    source,
-                    setting
-                )
-            )
+    :param executable_name:
+        A unicode string of the executable to locate, e.g. "go" or "gofmt"
 
-    return False
+    :param required_vars:
+        A list of unicode strings of the environment variables that are
+        required, e.g. "GOPATH". Obtains values from setting_value().
+
+    :param optional_vars:
+        A list of unicode strings of the environment variables that are
+        optional, but should be pulled from setting_value() if available - e.g.
+        "GOOS", "GOARCH". Obtains values from setting_value().
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+        golangconfig.ExecutableError
+            When the executable requested could not be located. The .name
+            attribute contains the name of the executable that could not be
+            located. The .dirs attribute contains a list of unicode strings
+            of the directories searched.
+        golangconfig.EnvVarError
+            When one or more required_vars are not available. The .missing
+            attribute will be a list of the names of missing environment
+            variables.
+        golangconfig.GoPathNotFoundError
+            When one or more directories specified by the GOPATH environment
+            variable could not be found on disk. The .directories attribute will
+            be a list of the directories that could not be found.
+        golangconfig.GoRootNotFoundError
+            When the directory specified by GOROOT environment variable could
+            not be found on disk. The .directory attribute will be the path to
+            the directory that could not be found.
+
+        golangconfig.EnvVarError
+            When one or more required_vars are not available. The .missing
+            attribute will be a list of the names of missing environment
+            variables.
+
+    :return:
+        A two-element tuple.
+
+         - [0] A unicode string (byte string for ST2) of the path to the executable
+         - [1] A dict to pass to the env parameter of subprocess.Popen()
+    """
+
+    path, _ = executable_path(executable_name, view=view, window=window)
+    if path is None:
+        name = executable_name
+        if sys.platform == 'win32':
+            name += '.exe'
+        dirs = [dir_ for dir_, _, _ in _path_dirs(view, window)]
+        exception = ExecutableError(
+            'The executable "%s" could not be located in any of the following locations: "%s"' %
+            (
+                name,
+                '", "'.join(dirs)
+            )
+        )
+        exception.name = name
+        exception.dirs = dirs
+        raise exception
+
+    path = shellenv.path_encode(path)
+
+    _depend('env', None)
+    _, env = _shell_env_for_subprocess()
+    _apply_setting_vars(env, required_vars, optional_vars, view, window, shellenv.env_encode)
+
+    encoded_goroot = shellenv.env_encode('GOROOT')
+    if encoded_goroot in env:
+        unicode_sep = shellenv.path_decode(os.sep)
+        name = executable_name
+        if sys.platform == 'win32':
+            name += '.exe'
+        relative_executable_path = shellenv.path_encode('bin%s%s' % (unicode_sep, name))
+        goroot_executable_path = os.path.join(env[encoded_goroot], relative_executable_path)
+        if goroot_executable_path != path:
+            _log(
+                'warning - binary %s was found at "%s", which is not inside of the GOROOT "%s"' %
+                (
+                    executable_name,
+                    path,
+                    shellenv.path_decode(env[encoded_goroot])
+                )
+            )
+
+    return (path, env)
+
+
+@_guarded
+@_profiled
+def subprocess_info_matrix(executable_name, required_vars, targets, optional_vars=None, view=None, window=None):
+    """
+    Gathers the information necessary to run one of the go executables once
+    per cross-compilation target. The executable path and base environment are
+    resolved a single time via subprocess_info(), and each target receives a
+    copy of the base env with its GOOS, GOARCH and extra variables applied.
+
+    The env dicts that are returned are independent of each other and may be
+    handed off to a pool of threads or processes to run builds in parallel.
+
+    :param executable_name:
+        A unicode string of the executable to locate, e.g. "go" or "gofmt"
+
+    :param required_vars:
+        A list of unicode strings of the environment variables that are
+        required, e.g. "GOPATH". Obtains values from setting_value().
+
+    :param targets:
+        A list of tuples of (GOOS, GOARCH) or (GOOS, GOARCH, extra_vars). GOOS
+        and GOARCH are unicode strings. extra_vars is a dict with unicode
+        string keys of environment variable names and values that are either
+        unicode strings, or None to remove the variable from the env.
+
+    :param optional_vars:
+        A list of unicode strings of the environment variables that are
+        optional, but should be pulled from setting_value() if available - e.g.
+        "GOROOT", "GOARM". Obtains values from setting_value().
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+        golangconfig.ExecutableError
+            When the executable requested could not be located. The .name
+            attribute contains the name of the executable that could not be
+            located. The .dirs attribute contains a list of unicode strings
+            of the directories searched.
+        golangconfig.EnvVarError
+            When one or more required_vars are not available. The .missing
+            attribute will be a list of the names of missing environment
+            variables.
+        golangconfig.GoPathNotFoundError
+            When one or more directories specified by the GOPATH environment
+            variable could not be found on disk. The .directories attribute will
+            be a list of the directories that could not be found.
+        golangconfig.GoRootNotFoundError
+            When the directory specified by GOROOT environment variable could
+            not be found on disk. The .directory attribute will be the path to
+            the directory that could not be found.
+
+    :return:
+        A two-element tuple.
+
+         - [0] A unicode string (byte string for ST2) of the path to the executable
+         - [1] A list of dicts, one per target in the order passed, to pass to
+               the env parameter of subprocess.Popen()
+    """
+
+    if not isinstance(targets, (list, tuple)):
+        raise TypeError('targets must be a list, not %s' % _type_name(targets))
+
+    normalized_targets = []
+    for target in targets:
+        if not isinstance(target, tuple) or len(target) not in set([2, 3]):
+            raise TypeError('each target must be a two or three-element tuple, not %s' % _type_name(target))
+        _require_unicode('GOOS', target[0])
+        _require_unicode('GOARCH', target[1])
+        extra_vars = target[2] if len(target) == 3 else {}
+        if not isinstance(extra_vars, dict):
+            raise TypeError('extra_vars must be a dict, not %s' % _type_name(extra_vars))
+        for var_name, var_value in extra_vars.items():
+            _require_unicode('extra_vars key', var_name)
+            if var_value is not None:
+                _require_unicode('extra_vars value', var_value)
+        normalized_targets.append((target[0], target[1], extra_vars))
+
+    path, base_env = subprocess_info(
+        executable_name,
+        required_vars,
+        optional_vars=optional_vars,
+        view=view,
+        window=window
+    )
+
+    encoded_goos = shellenv.env_encode('GOOS')
+    encoded_goarch = shellenv.env_encode('GOARCH')
+
+    envs = []
+    for goos, goarch, extra_vars in normalized_targets:
+        env = base_env.copy()
+        env[encoded_goos] = shellenv.env_encode(goos)
+        env[encoded_goarch] = shellenv.env_encode(goarch)
+        for var_name, var_value in extra_vars.items():
+            var_key = shellenv.env_encode(var_name)
+            if var_value is None:
+                if var_key in env:
+                    del env[var_key]
+                continue
+            env[var_key] = shellenv.env_encode(var_value)
+        envs.append(env)
+
+    return (path, envs)
+
+
+@_guarded
+@_profiled
+@_tracked
+def setting_value(setting_name, view=None, window=None):
+    """
+    Returns the user's setting for a specific variable, such as GOPATH or
+    GOROOT. Supports global and per-platform settings. Finds settings by
+    looking in:
+
+    1. If a project is open, the project settings
+    2. The global golang.sublime-settings file
+    3. For GOPATH, when the "auto_gopath" setting is true, the parent of the
+       nearest "src" directory containing the file of the view
+    4. The user's environment variables, as defined by their login shell
+
+    If the setting is a known name, e.g. GOPATH or GOROOT, the value will be
+    checked to ensure the path exists.
+
+    :param setting_name:
+        A unicode string of the setting to retrieve
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+        golangconfig.GoPathNotFoundError
+            When one or more directories specified by the GOPATH environment
+            variable could not be found on disk. The .directories attribute will
+            be a list of the directories that could not be found.
+        golangconfig.GoRootNotFoundError
+            When the directory specified by GOROOT environment variable could
+            not be found on disk. The .directory attribute will be the path to
+            the directory that could not be found.
+
+    :return:
+        A golangconfig.ResolvedValue object, a two-element tuple that also
+        has a .layer attribute of "project", "settings", "auto_gopath" or
+        "shell".
+
+        If no setting was found, the return value will be:
+
+         - [0] None
+         - [1] None
+
+        If a setting was found, the return value will be:
+
+         - [0] The setting value
+         - [1] The source of the setting, a unicode string:
+           - "project file (os-specific)"
+           - "golang.sublime-settings (os-specific)"
+           - "project file"
+           - "golang.sublime-settings"
+           - "auto-detected from file path"
+           - A unicode string of the path to the user's login shell
+           - A unicode string of the path to the user's login shell followed
+             by " (last known environment)" if the shell had not yet loaded
+           - "Sublime Text environment" if the shell timed out and no
+             previous environment was known
+
+        The second element of the tuple is intended to be used in the display
+        of debugging information to end users.
+    """
+
+    _require_unicode('setting_name', setting_name)
+    _check_view_window(view, window)
+
+    entry, source, origin = _get_most_specific_setting(setting_name, view, window)
+
+    if entry is _NO_VALUE:
+        entry = None
+        source = None
+
+        if setting_name == 'GOPATH' and view is not None and _package_setting('auto_gopath') is True:
+            entry = _auto_gopath_entry(view)
+            if entry is not None:
+                source = 'auto-detected from file path'
+                origin = 'auto_gopath'
+
+        if entry is None:
+            _depend('env', setting_name)
+            shell, layer = _shell_env_layer()
+            entry = layer.entry(setting_name, False)
+            if entry is not None:
+                source = shell
+                origin = layer.origin
+
+    if entry is None:
+        return ResolvedValue(None, None)
+
+    if setting_name not in _VALIDATED_SETTINGS:
+        return ResolvedValue(entry.value, source, origin)
+
+    # We add some extra processing here for known settings to improve the
+    # user experience, especially around debugging
+    if not entry.is_str:
+        _debug_unicode_string(setting_name, entry.value, source)
+
+    setting = entry.text
+
+    if setting_name == 'GOROOT':
+        if not _missing_paths([setting]):
+            return ResolvedValue(setting, source, origin)
+
+    has_multiple = False
+    if setting_name == 'GOPATH':
+        values = entry.parts
+        has_multiple = len(values) > 1
+
+        with _span('gopath_validation', {'GOPATH': setting}):
+            missing = _missing_paths(values)
+
+        if not missing:
+            return ResolvedValue(setting, source, origin)
+
+    if setting_name == 'GOROOT':
+        message = 'The GOROOT environment variable value "%s" does not exist on the filesystem'
+        e = GoRootNotFoundError(message % setting)
+        e.directory = setting
+        raise e
+
+    if not has_multiple:
+        suffix = 'value "%s" does not exist on the filesystem' % missing[0]
+    elif len(missing) == 1:
+        suffix = 'contains the directory "%s" that does not exist on the filesystem' % missing[0]
+    else:
+        paths = ', '.join('"' + path + '"' for path in missing)
+        suffix = 'contains %s directories that do not exist on the filesystem: %s' % (len(missing), paths)
+
+    message = 'The GOPATH environment variable ' + suffix
+    e = GoPathNotFoundError(message)
+    e.directories = missing
+    raise e
+
+
+@_guarded
+@_profiled
+@_traced
+@_tracked
+def executable_path(executable_name, view=None, window=None):
+    """
+    Uses the user's Sublime Text settings and then PATH environment variable
+    as set by their login shell to find a go executable
+
+    :param name:
+        The name of the binary to find - a unicode string of "go", "gofmt" or
+        "godoc"
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+
+    :return:
+        A golangconfig.ResolvedValue object, a two-element tuple that also
+        has a .layer attribute of "project", "settings" or "shell".
+
+        If the executable was not found, the return value will be:
+
+         - [0] None
+         - [1] None
+
+        If the exeutable was found, the return value will be:
+
+         - [0] A unicode string of the full path to the executable
+         - [1] A unicode string of the source of the PATH value
+           - "project file (os-specific)"
+           - "golang.sublime-settings (os-specific)"
+           - "project file"
+           - "golang.sublime-settings"
+           - A unicode string of the path to the user's login shell
+           - A unicode string of the path to the user's login shell followed
+             by " (last known environment)" if the shell had not yet loaded
+           - "Sublime Text environment" if the shell timed out and no
+             previous environment was known
+
+        The second element of the tuple is intended to be used in the display
+        of debugging information to end users.
+    """
+
+    _require_unicode('executable_name', executable_name)
+    _check_view_window(view, window)
+
+    executable_suffix = '.exe' if sys.platform == 'win32' else ''
+    suffixed_name = executable_name + executable_suffix
+
+    # PATH values often contain duplicates, which only need to be checked once
+    checked = set()
+
+    entry, source, origin = _get_most_specific_setting('PATH', view, window)
+    if entry is not _NO_VALUE:
+        setting = entry.value
+        if not entry.is_str:
+            if debug_enabled():
+                _debug_unicode_string('PATH', setting, source)
+        else:
+            dirs = _unchecked_dirs(entry.parts, checked)
+            possible_executable_path = _find_executable(dirs, suffixed_name, source, setting)
+            if possible_executable_path is not None:
+                return ResolvedValue(possible_executable_path, source, origin)
+
+            if debug_enabled():
+                _log(
+                    'binary %s not found in PATH from %s - "%s"' %
+                    (
+                        executable_name,
+                        source,
+                        setting
+                    )
+                )
+
+    _depend('env', 'PATH')
+    shell, path_dirs = _shell_path()
+    shell_setting = os.pathsep.join(path_dirs)
+    dirs = _unchecked_dirs(path_dirs, checked)
+    possible_executable_path = _find_executable(dirs, suffixed_name, shell, shell_setting)
+    if possible_executable_path is not None:
+        return ResolvedValue(possible_executable_path, shell, 'shell')
+
+    if debug_enabled():
+        _log(
+            'binary %s not found in PATH from %s - "%s"' %
+            (
+                executable_name,
+                shell,
+                shell_setting
+            )
+        )
+
+    return ResolvedValue(None, None)
+
+
+def launch(executable_name, args, required_vars, optional_vars=None, view=None, window=None,
+           cwd=None, stdin=None, stdout=None, stderr=None):
+    """
+    Starts a go executable using the path and environment from
+    subprocess_info(). The process is started in the cheapest way for the
+    platform and version of Python, which matters when running many tools from
+    the large plugin_host process. On Python 3.4+ the descriptors of
+    plugin_host are not closed, since they are not inheritable unless other
+    code made them so. Passing no cwd allows Python 3.8+ to use posix_spawn()
+    on Linux and OS X.
+
+    :param executable_name:
+        A unicode string of the executable to run, e.g. "go" or "gofmt"
+
+    :param args:
+        A list of unicode strings of the arguments to pass to the executable
+
+    :param required_vars:
+        A list of unicode strings of the environment variables that are
+        required, e.g. "GOPATH". Obtains values from setting_value().
+
+    :param optional_vars:
+        A list of unicode strings of the environment variables that are
+        optional, but should be pulled from setting_value() if available - e.g.
+        "GOOS", "GOARCH". Obtains values from setting_value().
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :param cwd:
+        None, or a unicode string of the working directory for the process
+
+    :param stdin:
+        None, subprocess.PIPE or a file object, as accepted by
+        subprocess.Popen()
+
+    :param stdout:
+        None, subprocess.PIPE or a file object, as accepted by
+        subprocess.Popen()
+
+    :param stderr:
+        None, subprocess.PIPE, subprocess.STDOUT or a file object, as accepted
+        by subprocess.Popen()
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+        OSError
+            When the executable could not be started
+        golangconfig.ExecutableError
+            When the executable requested could not be located. The .name
+            attribute contains the name of the executable that could not be
+            located. The .dirs attribute contains a list of unicode strings of
+            the directories searched.
+        golangconfig.EnvVarError
+            When one or more required_vars are not available. The .missing
+            attribute will be a list of the names of missing environment
+            variables.
+        golangconfig.GoPathNotFoundError
+            When one or more directories specified by the GOPATH environment
+            variable could not be found on disk. The .directories attribute will
+            be a list of the directories that could not be found.
+        golangconfig.GoRootNotFoundError
+            When the directory specified by GOROOT environment variable could
+            not be found on disk. The .directory attribute will be the path to
+            the directory that could not be found.
+
+    :return:
+        A subprocess.Popen object
+    """
+
+    if not isinstance(args, (list, tuple)):
+        raise TypeError('args must be a list, not %s' % _type_name(args))
+    for arg in args:
+        _require_unicode('args', arg)
+    if cwd is not None:
+        _require_unicode('cwd', cwd)
+        cwd = shellenv.path_encode(cwd)
+
+    path, env = subprocess_info(executable_name, required_vars, optional_vars, view=view, window=window)
+    with _span('run', {'executable': _trace_str(path), 'args': list(args)}):
+        return subprocess.Popen(
+            [path] + [shellenv.path_encode(arg) for arg in args],
+            stdin=stdin,
+            stdout=stdout,
+            stderr=stderr,
+            env=env,
+            **_popen_options(cwd, spawn=True)
+        )
+
+
+def executable_candidates(executable_name, view=None, window=None):
+    """
+    Lists every location an executable is looked for, in the order used by
+    executable_path(), similar to "which -a". Each location is only checked
+    as the generator is consumed, and checks made by a recent call to
+    executable_path() are reused rather than repeated.
+
+    :param executable_name:
+        The name of the binary to find - a unicode string of "go", "gofmt" or
+        "godoc"
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+
+    :return:
+        A generator of three-element tuples:
+
+         - [0] A unicode string of the full path to the possible executable
+         - [1] A unicode string of the source of the PATH value, as returned
+           by executable_path()
+         - [2] A unicode string of "executable", "not executable",
+           "not found" or "timed out". A directory is reported as timed out
+           when the "filesystem_timeout" setting is set and it did not
+           respond in time, or was recently slow to respond.
+    """
+
+    _require_unicode('executable_name', executable_name)
+    _check_view_window(view, window)
+
+    executable_suffix = '.exe' if sys.platform == 'win32' else ''
+    suffixed_name = executable_name + executable_suffix
+
+    # The settings are read before returning, so that any Sublime Text API
+    # calls happen on the calling thread
+    return _iter_candidates(_path_dirs(view, window), suffixed_name, _probe_timeout())
+
+
+def _iter_candidates(dirs, suffixed_name, timeout):
+    """
+    Checks each possible location of an executable
+
+    :param dirs:
+        A list of the three-element tuples from _path_dirs()
+
+    :param suffixed_name:
+        A unicode string of the executable filename, including any ".exe"
+
+    :param timeout:
+        None to check the directories serially, otherwise the number of
+        seconds from the "filesystem_timeout" setting
+
+    :return:
+        A generator of three-element tuples of (path, source, status)
+    """
+
+    if timeout is None:
+        for dir_, source, _ in dirs:
+            possible_executable_path = os.path.join(dir_, suffixed_name)
+            status = _executable_status(possible_executable_path)
+            yield (possible_executable_path, source, _CANDIDATE_STATUSES[status])
+        return
+
+    # Directories that were recently slow are reported without being checked
+    responsive = set(_skip_slow([dir_ for dir_, _, _ in dirs]))
+    paths = [os.path.join(dir_, suffixed_name) for dir_, _, _ in dirs if dir_ in responsive]
+    results = _probe(paths, _executable_status, timeout, os.path.dirname)
+    try:
+        for dir_, source, _ in dirs:
+            possible_executable_path = os.path.join(dir_, suffixed_name)
+            status = _NO_VALUE
+            if dir_ in responsive:
+                status = next(results)[1]
+                if status is _NO_VALUE:
+                    _mark_slow(dir_, timeout)
+            yield (possible_executable_path, source, _CANDIDATE_STATUSES[status])
+    finally:
+        results.close()
+
+
+@_guarded
+@_profiled
+def config_snapshot(executable_names, required_vars, optional_vars=None, view=None, window=None):
+    """
+    Captures the resolved configuration for use in processes outside of
+    Sublime Text, such as multiprocessing workers. The result contains only
+    JSON-compatible data and may be pickled, or passed to json.dumps(). It is
+    loaded in the other process via golangconfig.ConfigSnapshot, which does
+    not require the sublime module.
+
+    :param executable_names:
+        A list of unicode strings of the executables to locate, e.g. "go"
+
+    :param required_vars:
+        A list of unicode strings of the environment variables that are
+        required, e.g. "GOPATH". Obtains values from setting_value().
+
+    :param optional_vars:
+        A list of unicode strings of the environment variables that are
+        optional, but should be pulled from setting_value() if available - e.g.
+        "GOOS", "GOARCH". Obtains values from setting_value().
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+        golangconfig.EnvVarError
+            When one or more required_vars are not available. The .missing
+            attribute will be a list of the names of missing environment
+            variables.
+        golangconfig.GoPathNotFoundError
+            When one or more directories specified by the GOPATH environment
+            variable could not be found on disk. The .directories attribute will
+            be a list of the directories that could not be found.
+        golangconfig.GoRootNotFoundError
+            When the directory specified by GOROOT environment variable could
+            not be found on disk. The .directory attribute will be the path to
+            the directory that could not be found.
+
+    :return:
+        A dict with the keys "version", "platform", "executables", "settings",
+        "shell" and "env". Executables that could not be found are included
+        with a path and source of None.
+    """
+
+    if not isinstance(executable_names, (list, tuple)):
+        raise TypeError('executable_names must be a list, not %s' % _type_name(executable_names))
+    _check_view_window(view, window)
+
+    executables = {}
+    for executable_name in executable_names:
+        path, source = executable_path(executable_name, view=view, window=window)
+        executables[executable_name] = [path, source]
+
+    settings = {}
+    for var_name in list(required_vars) + list(optional_vars or []):
+        value, source = setting_value(var_name, view=view, window=window)
+        settings[var_name] = [value, source]
+
+    shell, env = _shell_env()
+    env = dict(env)
+    _apply_setting_vars(env, required_vars, optional_vars, view, window, lambda value: value)
+
+    return {
+        'version': _SNAPSHOT_VERSION,
+        'platform': _platform,
+        'executables': executables,
+        'settings': settings,
+        'shell': shell,
+        'env': env,
+    }
+
+
+class ConfigSnapshot(object):
+
+    """
+    Provides setting_value(), executable_path() and subprocess_info() using
+    the data captured by golangconfig.config_snapshot(). May be used from any
+    thread, and in processes where the sublime module is not available.
+    """
+
+    data = None
+
+    def __init__(self, data):
+        """
+        :param data:
+            A dict returned from golangconfig.config_snapshot()
+
+        :raises:
+            TypeError
+                When data is not a dict
+            ValueError
+                When the data is from an incompatible version of golangconfig
+        """
+
+        if not isinstance(data, dict):
+            raise TypeError('data must be a dict, not %s' % _type_name(data))
+        if data.get('version') != _SNAPSHOT_VERSION:
+            raise ValueError(
+                'The configuration snapshot is version %r, but version %d is required' %
+                (data.get('version'), _SNAPSHOT_VERSION)
+            )
+        self.data = data
+
+    @classmethod
+    def from_json(cls, json_string):
+        """
+        :param json_string:
+            A unicode string of JSON from ConfigSnapshot.to_json()
+
+        :return:
+            A golangconfig.ConfigSnapshot object
+        """
+
+        return cls(json.loads(json_string))
+
+    def to_json(self):
+        """
+        :return:
+            A unicode string of the snapshot serialized as JSON
+        """
+
+        return json.dumps(self.data, sort_keys=True)
+
+    def setting_value(self, setting_name):
+        """
+        :param setting_name:
+            A unicode string of the setting to retrieve
+
+        :raises:
+            KeyError
+                When the setting was not captured in the snapshot
+
+        :return:
+            A golangconfig.ResolvedValue object of the setting value and a
+            unicode string of its source, or (None, None) if not set
+        """
+
+        _require_unicode('setting_name', setting_name)
+        value, source = self.data['settings'][setting_name]
+        return ResolvedValue(value, _intern(source))
+
+    def executable_path(self, executable_name):
+        """
+        :param executable_name:
+            A unicode string of the executable name
+
+        :raises:
+            KeyError
+                When the executable was not captured in the snapshot
+
+        :return:
+            A golangconfig.ResolvedValue object of a unicode string path to the
+            executable and a unicode string of its source, or (None, None) if
+            not found
+        """
+
+        _require_unicode('executable_name', executable_name)
+        path, source = self.data['executables'][executable_name]
+        return ResolvedValue(path, _intern(source))
+
+    def subprocess_info(self, executable_name, required_vars=None):
+        """
+        :param executable_name:
+            A unicode string of the executable name
+
+        :param required_vars:
+            None, or a list of unicode strings of the environment variables
+            that must be set
+
+        :raises:
+            KeyError
+                When the executable was not captured in the snapshot
+            golangconfig.ExecutableError
+                When the executable was not found when the snapshot was captured
+            golangconfig.EnvVarError
+                When one or more required_vars are not set
+
+        :return:
+            A two-element tuple of the path to the executable and a dict to
+            pass to the env parameter of subprocess.Popen(). Byte strings are
+            used on Python 2.
+        """
+
+        path, _ = self.executable_path(executable_name)
+        if path is None:
+            exception = ExecutableError(
+                'The executable "%s" was not found when the snapshot was captured' % executable_name
+            )
+            exception.name = executable_name
+            exception.dirs = []
+            raise exception
+
+        env = self.data['env']
+        missing_vars = [name for name in (required_vars or []) if name not in env]
+        if missing_vars:
+            exception = EnvVarError(
+                'The following environment variable%s currently unset: %s' %
+                (
+                    's are' if len(missing_vars) > 1 else ' is',
+                    ', '.join(missing_vars)
+                )
+            )
+            exception.missing = missing_vars
+            raise exception
+
+        encoded_env = {}
+        for name, value in env.items():
+            encoded_env[shellenv.env_encode(name)] = shellenv.env_encode(value)
+        return (shellenv.path_encode(path), encoded_env)
+
+
+def refresh_shell_env(block=False):
+    """
+    Re-runs the user's login shell to pick up changes to their environment,
+    such as edits to .bashrc or newly-installed tools. Until the new
+    environment is available, the last known environment continues to be used.
+    Once loaded, the new environment replaces the old one atomically, and any
+    cached data that depends on it is discarded.
+
+    The environment is also refreshed in the background automatically when it
+    is older than the number of seconds in the "shell_env_refresh_interval"
+    setting, if set. The shellenv modules are reloaded on the UI thread, so
+    when block is True this must not be called from a thread the UI thread is
+    waiting on.
+
+    :param block:
+        If the function should wait for the login shell to finish running
+        before returning
+
+    :return:
+        A boolean - if the environment changed. Always False when block is
+        False.
+    """
+
+    thread = _start_shell_env_load(True)
+    if not block:
+        return False
+    thread.join()
+    return thread.result.get('changed', False)
+
+
+def start_trace():
+    """
+    Begins recording timing spans for settings lookups, shell environment
+    loading, executable searches, GOPATH validation and tool runs. The spans
+    are kept in memory until stop_trace() is called.
+
+    Calling this function while a trace is already being recorded discards the
+    spans recorded so far.
+    """
+
+    global _trace_events
+
+    with _trace_lock:
+        _trace_events = []
+
+
+def stop_trace(path):
+    """
+    Stops recording timing spans and writes them to a file in the Chrome
+    trace_event JSON format, which may be loaded into chrome://tracing or
+    other trace viewers.
+
+    :param path:
+        A unicode string of the path to write the JSON file to
+
+    :raises:
+        TypeError
+            When any of the parameters are of the wrong type
+        RuntimeError
+            When start_trace() was not called before this function
+
+    :return:
+        An integer of the number of spans written
+    """
+
+    global _trace_events
+
+    _require_unicode('path', path)
+
+    with _trace_lock:
+        events = _trace_events
+        _trace_events = None
+
+    if events is None:
+        raise RuntimeError('golangconfig.start_trace() must be called before golangconfig.stop_trace()')
+
+    with open(path, 'wb') as f:
+        f.write(json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, indent=1).encode('utf-8'))
+
+    return len(events)
+
+
+def cached_output(path, env, args, stdin=None, input_files=None, cwd=None):
+    """
+    Runs an executable using the path and env returned by subprocess_info(),
+    returning the output of a previous run if the binary, arguments, env and
+    inputs are all unchanged. This is intended for deterministic tools such as
+    gofmt, go vet and go list.
+
+    Results are kept in a bounded in-memory cache, and in a size-capped
+    on-disk cache within the Sublime Text cache folder. Since this function
+    does not interact with the Sublime Text API, it may be called from any
+    thread.
+
+    :param path:
+        A unicode string (byte string for ST2) of the path to the executable,
+        as returned by subprocess_info()
+
+    :param env:
+        A dict of the environment to run the executable with, as returned by
+        subprocess_info()
+
+    :param args:
+        A list of unicode strings (byte strings for ST2) of the arguments to
+        pass to the executable
+
+    :param stdin:
+        None, or a byte string to write to the stdin of the process
+
+    :param input_files:
+        None, or a list of unicode strings of the paths of files that are read
+        by the executable. The contents of the files are hashed as part of the
+        cache key.
+
+    :param cwd:
+        None, or a unicode string (byte string for ST2) of the working
+        directory to run the executable in
+
+    :raises:
+        TypeError
+            When any of the parameters are of the wrong type
+        OSError
+            When the executable could not be run, or an input file could not be read
+
+    :return:
+        A three-element tuple:
+
+         - [0] An integer of the exit code of the process
+         - [1] A byte string of the stdout of the process
+         - [2] A byte string of the stderr of the process
+    """
+
+    if not isinstance(env, dict):
+        raise TypeError('env must be a dict, not %s' % _type_name(env))
+    if not isinstance(args, (list, tuple)):
+        raise TypeError('args must be a list, not %s' % _type_name(args))
+    if stdin is not None and not isinstance(stdin, bytes):
+        raise TypeError('stdin must be a byte string, not %s' % _type_name(stdin))
+    if input_files is not None and not isinstance(input_files, (list, tuple)):
+        raise TypeError('input_files must be a list, not %s' % _type_name(input_files))
+
+    key = _result_key(path, env, args, stdin, input_files, cwd)
+
+    result = _memory_results.get(key)
+    if result is not None:
+        return result
+
+    result = _read_disk_result(key)
+    if result is not None:
+        _memory_results.set(key, result)
+        return result
+
+    with _span('run', {'executable': _trace_str(path), 'args': [_trace_str(a) for a in args]}):
+        proc = subprocess.Popen(
+            [path] + list(args),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            **_popen_options(cwd)
+        )
+        stdout, stderr = proc.communicate(stdin)
+    result = (proc.returncode, stdout, stderr)
+
+    _memory_results.set(key, result)
+    _write_disk_result(key, result)
+    return result
+
+
+@_guarded
+@_profiled
+def package_graph(directory, view=None, window=None):
+    """
+    Returns a cached graph of the Go packages in the module or GOPATH workspace
+    that contains a directory. The graph is built using "go list -json" with
+    the environment from subprocess_info(), and is shared between all callers
+    using the same workspace and configuration.
+
+    The returned object is not populated until its .refresh() method is called.
+    Subsequent calls to .refresh() only re-list the packages in directories
+    where Go source files were added, removed or modified, and may be limited
+    to the paths that are known to have changed, such as a saved file.
+
+    :param directory:
+        A unicode string of a directory inside of the workspace - generally
+        the directory containing the file of a view
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+        golangconfig.ExecutableError
+            When the go executable could not be located
+        golangconfig.GoPathNotFoundError
+            When one or more directories specified by the GOPATH environment
+            variable could not be found on disk
+        golangconfig.GoRootNotFoundError
+            When the directory specified by GOROOT environment variable could
+            not be found on disk
+
+    :return:
+        A golangconfig.PackageGraph object
+    """
+
+    _require_unicode('directory', directory)
+
+    go_path, env = subprocess_info(
+        'go',
+        [],
+        optional_vars=['GOPATH', 'GOROOT', 'GOOS', 'GOARCH', 'GO111MODULE', 'GOFLAGS', 'CGO_ENABLED'],
+        view=view,
+        window=window
+    )
+
+    gopath, _ = setting_value('GOPATH', view=view, window=window)
+    root = _workspace_root(os.path.abspath(directory), gopath)
+
+    key = (root, go_path, _env_fingerprint(env))
+    with _package_graphs_lock:
+        graph = _package_graphs.get(key)
+        if graph is None:
+            graph = PackageGraph(root, go_path, env)
+            _package_graphs.set(key, graph)
+    return graph
+
+
+class PackageGraph(object):
+
+    """
+    A cached, incrementally-refreshed graph of the packages in a Go workspace.
+    Obtained via golangconfig.package_graph(). All methods may be called from
+    any thread.
+    """
+
+    root = None
+
+    def __init__(self, root, go_path, env):
+        self.root = root
+        self._go_path = go_path
+        self._env = env
+        self._lock = threading.RLock()
+        self._scanned = False
+        self._signatures = {}
+        self._by_dir = {}
+        self._by_import_path = {}
+        self._importers = None
+
+    def refresh(self, paths=None):
+        """
+        Scans the workspace for changes and runs "go list -json" for each
+        directory containing Go source files that changed since the last call
+
+        :param paths:
+            None to scan the whole workspace, otherwise a list of unicode
+            strings of the files or directories that changed. Only the
+            directory of each file, and everything under each directory, is
+            scanned. The whole workspace is always scanned by the first call.
+
+        :raises:
+            TypeError
+                When paths is not None or a list
+            OSError
+                When the go executable could not be run, or failed without output
+            ValueError
+                When the output of the go executable was not valid JSON
+
+        :return:
+            A list of unicode strings of the directories that were re-listed
+        """
+
+        if paths is not None and not isinstance(paths, (list, tuple)):
+            raise TypeError('paths must be a list, not %s' % _type_name(paths))
+
+        with self._lock:
+            # A change to the module definition can affect every package
+            mod_path = os.path.join(self.root, 'go.mod')
+            mod_signature = _file_signature(mod_path)
+            if mod_signature != self._signatures.get(mod_path):
+                self._signatures = {mod_path: mod_signature}
+                self._by_dir = {}
+                self._by_import_path = {}
+                self._scanned = False
+
+            full = paths is None or not self._scanned
+            scanned = []
+            if full:
+                signatures = _scan_go_dirs(self.root, self.root, True)
+            else:
+                signatures = {}
+                for path in paths:
+                    _require_unicode('paths', path)
+                    path = os.path.abspath(path)
+                    recursive = os.path.isdir(path)
+                    dir_ = path if recursive else os.path.dirname(path)
+                    if dir_ != self.root and not dir_.startswith(self.root + os.sep):
+                        continue
+                    if _go_ignored(os.path.relpath(dir_, self.root)):
+                        continue
+                    scanned.append((dir_, recursive))
+                    signatures.update(_scan_go_dirs(dir_, self.root, recursive))
+
+            changed = []
+            for dir_, signature in signatures.items():
+                if self._signatures.get(dir_) != signature:
+                    changed.append(dir_)
+
+            removed = []
+            for dir_ in self._signatures:
+                if dir_ == mod_path or dir_ in signatures:
+                    continue
+                if full:
+                    removed.append(dir_)
+                    continue
+                for scanned_dir, recursive in scanned:
+                    if dir_ == scanned_dir or (recursive and dir_.startswith(scanned_dir + os.sep)):
+                        removed.append(dir_)
+                        break
+
+            for dir_ in removed:
+                del self._signatures[dir_]
+                self._remove_dir(dir_)
+
+            changed.sort()
+            # Listing in chunks keeps the command line within OS limits
+            for offset in range(0, len(changed), 100):
+                chunk = changed[offset:offset + 100]
+                for dir_ in chunk:
+                    self._remove_dir(dir_)
+                for package in self._go_list(chunk):
+                    package_dir = package.get('Dir')
+                    import_path = package.get('ImportPath')
+                    if not package_dir or not import_path:
+                        continue
+                    # Paths are compared in resolved form since go list
+                    # reports directories with symlinks evaluated
+                    self._by_dir[os.path.realpath(package_dir)] = package
+                    self._by_import_path[import_path] = package
+                for dir_ in chunk:
+                    self._signatures[dir_] = signatures[dir_]
+
+            self._scanned = True
+            if changed or removed:
+                self._importers = None
+            return changed
+
+    def package(self, import_path):
+        """
+        :param import_path:
+            A unicode string of the import path of the package
+
+        :return:
+            None if the package is not in the workspace, otherwise a dict of
+            the package information from "go list -json"
+        """
+
+        with self._lock:
+            return self._by_import_path.get(import_path)
+
+    def package_for_file(self, file_path):
+        """
+        :param file_path:
+            A unicode string of the path to a Go source file
+
+        :return:
+            None if the file is not part of a package in the workspace,
+            otherwise a dict of the package information from "go list -json"
+        """
+
+        with self._lock:
+            return self._by_dir.get(os.path.realpath(os.path.dirname(os.path.abspath(file_path))))
+
+    def importers(self, import_path):
+        """
+        :param import_path:
+            A unicode string of the import path of a package
+
+        :return:
+            A sorted list of unicode strings of the import paths of the
+            packages in the workspace that directly import the package
+        """
+
+        with self._lock:
+            if self._importers is None:
+                importers = {}
+                for package in self._by_import_path.values():
+                    for imported in package.get('Imports', []):
+                        importers.setdefault(imported, set()).add(package['ImportPath'])
+                self._importers = importers
+            return sorted(self._importers.get(import_path, []))
+
+    def packages(self):
+        """
+        :return:
+            A sorted list of unicode strings of the import paths of all
+            packages in the workspace
+        """
+
+        with self._lock:
+            return sorted(self._by_import_path.keys())
+
+    def _remove_dir(self, dir_):
+        package = self._by_dir.pop(os.path.realpath(dir_), None)
+        if package is not None:
+            self._by_import_path.pop(package.get('ImportPath'), None)
+
+    def _go_list(self, dirs):
+        patterns = []
+        for dir_ in dirs:
+            relative = os.path.relpath(dir_, self.root)
+            if relative == '.':
+                patterns.append('.')
+            else:
+                patterns.append('./' + relative.replace(os.sep, '/'))
+
+        env = self._env
+        if _file_signature(os.path.join(self.root, 'go.mod')) is None:
+            # Without this, go 1.16+ refuses to list packages outside of a module
+            env = dict(env)
+            env[shellenv.env_encode('GO111MODULE')] = shellenv.env_encode('off')
+
+        args = [self._go_path, 'list', '-e', '-json'] + [shellenv.path_encode(p) for p in patterns]
+        with _span('run', {'executable': _trace_str(self._go_path), 'args': patterns}):
+            proc = subprocess.Popen(
+                args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=env,
+                **_popen_options(shellenv.path_encode(self.root))
+            )
+            stdout, stderr = proc.communicate()
+        if proc.returncode != 0 and not stdout.strip():
+            raise OSError('go list failed in "%s": %s' % (self.root, stderr.decode('utf-8', 'replace').strip()))
+        return _decode_json_stream(stdout.decode('utf-8', 'replace'))
+
+
+def format_files(file_paths, write=False, executable_name='gofmt', view=None, window=None):
+    """
+    Checks or formats many Go files using as few invocations of gofmt, or a
+    tool with the same -l and -w flags such as goimports, as possible. The
+    files are split into batches that are run in parallel, up to one per CPU.
+
+    :param file_paths:
+        A list of unicode strings of absolute paths to .go files
+
+    :param write:
+        If the files should be rewritten in place. Otherwise the files are
+        only checked to see if they are formatted.
+
+    :param executable_name:
+        A unicode string of the executable to run, "gofmt" or "goimports"
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+        golangconfig.ExecutableError
+            When the executable requested could not be located. The .name
+            attribute contains the name of the executable that could not be
+            located. The .dirs attribute contains a list of unicode strings of
+            the directories searched.
+
+    :return:
+        A dict with unicode string keys of the file paths, and dict values with
+        the keys:
+
+         - "changed": a boolean - if the file was not formatted, and was
+           rewritten when write is True
+         - "errors": a list of unicode strings of the errors for the file
+    """
+
+    if not isinstance(file_paths, (list, tuple)):
+        raise TypeError('file_paths must be a list, not %s' % _type_name(file_paths))
+
+    queue = FormatQueue(executable_name, write)
+    for file_path in file_paths:
+        queue.add(file_path, view=view, window=window)
+    return queue.flush()
+
+
+class FormatQueue(object):
+
+    """
+    Collects requests to check or format Go files, such as from saving many
+    views at once, and runs them in batches via gofmt or goimports. Pending
+    requests are run shortly after the first is added, or when .flush() is
+    called. Files using different executables or environments are run in
+    separate batches.
+    """
+
+    executable_name = None
+    write = False
+    delay = None
+
+    def __init__(self, executable_name='gofmt', write=False, delay=_FORMAT_DEFAULT_DELAY):
+        """
+        :param executable_name:
+            A unicode string of the executable to run, "gofmt" or "goimports"
+
+        :param write:
+            If the files should be rewritten in place. Otherwise the files are
+            only checked to see if they are formatted.
+
+        :param delay:
+            A number of seconds to wait after the first request is added for
+            others to be added to the same batch
+
+        :raises:
+            TypeError
+                When any of the parameters are of the wrong type
+        """
+
+        _require_unicode('executable_name', executable_name)
+        if not isinstance(delay, (int, float)):
+            raise TypeError('delay must be a number, not %s' % _type_name(delay))
+        self.executable_name = executable_name
+        self.write = bool(write)
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+    def add(self, file_path, callback=None, view=None, window=None):
+        """
+        Queues a file to be checked or formatted. The executable and
+        environment are resolved immediately, so this should be called from
+        the UI thread in Sublime Text 2.
+
+        :param file_path:
+            A unicode string of the absolute path to a .go file
+
+        :param callback:
+            None, or a callable accepting the file path and the result dict
+            described in golangconfig.format_files(). Called from a background
+            thread, or the thread calling .flush().
+
+        :param view:
+            A sublime.View object to use in finding project-specific settings.
+            This should be passed whenever available.
+
+        :param window:
+            A sublime.Window object to use in finding project-specific
+            settings. This should be passed whenever available.
+
+        :raises:
+            TypeError
+                When any of the parameters are of the wrong type
+            golangconfig.ExecutableError
+                When the executable could not be located
+        """
+
+        _require_unicode('file_path', file_path)
+        if callback is not None and not callable(callback):
+            raise TypeError('callback must be callable, not %s' % _type_name(callback))
+
+        path, env = subprocess_info(self.executable_name, [], view=view, window=window)
+        with self._lock:
+            self._pending.append((path, env, file_path, callback))
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """
+        Runs all pending requests, blocking until they are complete
+
+        :return:
+            A dict of the results of the requests run, as described in
+            golangconfig.format_files()
+        """
+
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        # Requests are grouped by executable and environment, in the order
+        # they were added
+        groups = {}
+        keys = []
+        for path, env, file_path, _ in pending:
+            key = (path, tuple(sorted(env.items())))
+            if key not in groups:
+                groups[key] = (path, env, [], set())
+                keys.append(key)
+            path, env, file_paths, seen = groups[key]
+            if file_path not in seen:
+                seen.add(file_path)
+                file_paths.append(file_path)
+
+        batches = []
+        batch_keys = []
+        for key in keys:
+            path, env, file_paths, _ = groups[key]
+            for batch in _format_batches(path, env, file_paths):
+                batches.append(batch)
+                batch_keys.append(key)
+
+        results = {}
+        group_errors = {}
+        for key, (batch_results, errors) in zip(batch_keys, _run_parallel(self._run_batch, batches)):
+            results.update(batch_results)
+            key_errors = group_errors.setdefault(key, [])
+            for error in errors:
+                if error not in key_errors:
+                    key_errors.append(error)
+
+        # Errors that do not mention a file, such as a usage error, apply to
+        # every file run with the same executable and environment, so the
+        # result does not depend on how the files were split into batches
+        for key, errors in group_errors.items():
+            for file_path in groups[key][2]:
+                results[file_path]['errors'].extend(errors)
+
+        for _, _, file_path, callback in pending:
+            if callback is not None:
+                callback(file_path, results[file_path])
+        return results
+
+    def _run_batch(self, batch):
+        path, env, file_paths = batch
+        args = [path, '-l']
+        if self.write:
+            args.append('-w')
+        args.extend([shellenv.path_encode(file_path) for file_path in file_paths])
+
+        results = {}
+        for file_path in file_paths:
+            results[file_path] = {'changed': False, 'errors': []}
+        unowned = []
+
+        try:
+            with _span('run', {'executable': _trace_str(path), 'files': len(file_paths)}):
+                proc = subprocess.Popen(
+                    args,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    env=env,
+                    **_popen_options(None)
+                )
+                stdout, stderr = proc.communicate()
+        except (OSError) as e:
+            unowned.append('error running %s: %s' % (self.executable_name, e))
+            return (results, unowned)
+
+        for line in stdout.decode('utf-8', 'replace').splitlines():
+            if line in results:
+                results[line]['changed'] = True
+
+        for line in stderr.decode('utf-8', 'replace').splitlines():
+            if not line.strip():
+                continue
+            # Errors are generally "path:line:col: message", but some, such as
+            # failures to open a file, only mention the path
+            owner = None
+            for file_path in file_paths:
+                if line.startswith(file_path + ':'):
+                    owner = file_path
+                    break
+            if owner is None:
+                for file_path in file_paths:
+                    if file_path in line:
+                        owner = file_path
+                        break
+            if owner is None:
+                unowned.append(line)
+            else:
+                results[owner]['errors'].append(line)
+        return (results, unowned)
+
+
+def _format_batches(path, env, file_paths):
+    """
+    Splits files into batches for one executable and environment, so that
+    large numbers of files are spread across the CPUs and no command line is
+    too long
+
+    :param path:
+        The path to the executable, from subprocess_info()
+
+    :param env:
+        The environment dict, from subprocess_info()
+
+    :param file_paths:
+        A list of unicode strings of file paths
+
+    :return:
+        A list of three-element tuples of (path, env, list of file paths)
+    """
+
+    per_batch = max(_FORMAT_MIN_BATCH, -(-len(file_paths) // _cpu_count()))
+    batches = []
+    current = []
+    length = 0
+    for file_path in file_paths:
+        if current and (len(current) >= per_batch or length + len(file_path) + 1 > _FORMAT_MAX_ARGS_LENGTH):
+            batches.append((path, env, current))
+            current = []
+            length = 0
+        current.append(file_path)
+        length += len(file_path) + 1
+    if current:
+        batches.append((path, env, current))
+    return batches
+
+
+def _run_parallel(function, items):
+    """
+    Calls a function with each item, using up to one thread per CPU
+
+    :param function:
+        A callable accepting one item
+
+    :param items:
+        A list of items
+
+    :return:
+        A list of the return values, in the order of the items
+    """
+
+    results = [None] * len(items)
+    if len(items) <= 1:
+        return [function(item) for item in items]
+
+    remaining = collections.deque(enumerate(items))
+    errors = []
+
+    def work():
+        while True:
+            try:
+                index, item = remaining.popleft()
+            except (IndexError):
+                return
+            try:
+                results[index] = function(item)
+            except (Exception) as e:
+                errors.append(e)
+
+    threads = []
+    for _ in range(min(len(items), _cpu_count())):
+        thread = threading.Thread(target=work)
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return results
+
+
+def _cpu_count():
+    """
+    :return:
+        An integer of the number of CPUs, or 1 if not known
+    """
+
+    cpu_count = getattr(os, 'cpu_count', None)
+    if cpu_count is not None:
+        return cpu_count() or 1
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        return 1
+
+
+def tool_server(executable_name, args, root, required_vars=None, optional_vars=None, view=None, window=None,
+                idle_timeout=_TOOL_SERVER_IDLE_SECONDS):
+    """
+    Returns a long-lived tool process, such as gopls, started with the path
+    and environment from subprocess_info(). One process is shared by all
+    packages and windows requesting the same executable, arguments,
+    environment and workspace root. Callers should call this function each
+    time they need the process, rather than holding on to the result - when
+    the resolved configuration changes, the previous process is stopped and a
+    new one started, and a process that exited is restarted.
+
+    :param executable_name:
+        A unicode string of the executable to run, e.g. "gopls"
+
+    :param args:
+        A list of unicode strings of the arguments to pass to the executable
+
+    :param root:
+        A unicode string of the workspace root, used as the working directory
+
+    :param required_vars:
+        None, or a list of unicode strings of the environment variables that
+        are required, e.g. "GOPATH". Obtains values from setting_value().
+
+    :param optional_vars:
+        None, or a list of unicode strings of the environment variables that
+        are optional, but should be pulled from setting_value() if available -
+        e.g. "GOFLAGS". Obtains values from setting_value().
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :param idle_timeout:
+        A number of seconds after which the process is stopped if this
+        function has not been called for it, and .touch() has not been called
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+        OSError
+            When the executable could not be started
+        golangconfig.ExecutableError
+            When the executable requested could not be located. The .name
+            attribute contains the name of the executable that could not be
+            located. The .dirs attribute contains a list of unicode strings of
+            the directories searched.
+        golangconfig.EnvVarError
+            When one or more required_vars are not available. The .missing
+            attribute will be a list of the names of missing environment
+            variables.
+
+    :return:
+        A golangconfig.ToolServer object
+    """
+
+    if not isinstance(args, (list, tuple)):
+        raise TypeError('args must be a list, not %s' % _type_name(args))
+    for arg in args:
+        _require_unicode('args', arg)
+    _require_unicode('root', root)
+    if isinstance(idle_timeout, bool) or not isinstance(idle_timeout, (int, float)):
+        raise TypeError('idle_timeout must be a number, not %s' % _type_name(idle_timeout))
+
+    path, env = subprocess_info(executable_name, required_vars or [], optional_vars, view=view, window=window)
+    if window is None and view is not None:
+        window = _view_attribute(view, 'window')
+    owner = window if window is not None else view
+    slot = (executable_name, tuple(args), root, _mirror_key(owner) if owner is not None else None)
+    key = (path, _env_fingerprint(env), tuple(args), root)
+
+    stopped = []
+    with _tool_servers_lock:
+        previous_key = _tool_slots.get(slot)
+        _tool_slots[slot] = key
+        if previous_key is not None and previous_key != key and previous_key not in _tool_slots.values():
+            previous = _tool_servers.pop(previous_key, None)
+            if previous is not None:
+                stopped.append(previous)
+
+        server = _tool_servers.get(key)
+        if server is None:
+            server = ToolServer(path, list(args), env, root)
+            _tool_servers[key] = server
+        server.idle_timeout = idle_timeout
+        server.touch()
+        if not server.running:
+            server.start()
+
+        if not _tool_server_reaper:
+            thread = threading.Thread(target=_reap_tool_servers, name='golangconfig-tool-servers')
+            thread.daemon = True
+            thread.start()
+            _tool_server_reaper.append(thread)
+
+    for previous in stopped:
+        if debug_enabled():
+            _log('stopping %s in "%s" since its configuration changed' % (executable_name, root))
+        previous.stop()
+    return server
+
+
+def stop_tool_servers():
+    """
+    Stops all of the processes started by golangconfig.tool_server(). Should
+    be called from the plugin_unloaded() function of packages using
+    tool_server().
+    """
+
+    with _tool_servers_lock:
+        servers = list(_tool_servers.values())
+        _tool_servers.clear()
+        _tool_slots.clear()
+    for server in servers:
+        server.stop()
+
+
+class ToolServer(object):
+
+    """
+    A long-lived tool process started by golangconfig.tool_server(). The
+    process is available via the .process attribute, a subprocess.Popen
+    object with .stdin and .stdout pipes. Anything the process writes to
+    stderr is printed to the console when the "debug" setting is enabled.
+    """
+
+    root = None
+    args = None
+    process = None
+    idle_timeout = _TOOL_SERVER_IDLE_SECONDS
+    last_used = None
+
+    def __init__(self, path, args, env, root):
+        self.root = root
+        self.args = args
+        self._path = path
+        self._env = env
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        """
+        :return:
+            A boolean - if the process is running
+        """
+
+        process = self.process
+        return process is not None and process.poll() is None
+
+    def touch(self):
+        """
+        Records that the process is in use, delaying the idle timeout
+        """
+
+        self.last_used = time.time()
+
+    def start(self):
+        """
+        Starts the process, unless it is already running
+
+        :raises:
+            OSError
+                When the executable could not be started
+        """
+
+        with self._lock:
+            if self.running:
+                return
+            if self.process is not None:
+                _close_pipes(self.process)
+            with _span('run', {'executable': _trace_str(self._path), 'args': self.args}):
+                self.process = subprocess.Popen(
+                    [self._path] + [shellenv.path_encode(arg) for arg in self.args],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    env=self._env,
+                    **_popen_options(shellenv.path_encode(self.root))
+                )
+            thread = threading.Thread(target=self._read_stderr, args=(self.process,))
+            thread.daemon = True
+            thread.start()
+
+    def stop(self):
+        """
+        Stops the process, waiting briefly for it to exit before killing it
+        """
+
+        with self._lock:
+            process = self.process
+            self.process = None
+        if process is None:
+            return
+
+        try:
+            if process.poll() is None:
+                process.stdin.close()
+                process.terminate()
+                deadline = time.time() + _TOOL_SERVER_STOP_SECONDS
+                while process.poll() is None and time.time() < deadline:
+                    time.sleep(0.01)
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+        except (OSError, IOError):
+            # The process exited on its own in the meantime
+            pass
+        _close_pipes(process)
+
+    def _read_stderr(self, process):
+        name = os.path.basename(_trace_str(self._path))
+        try:
+            for line in iter(process.stderr.readline, b''):
+                if debug_enabled():
+                    _log('%s: %s' % (name, line.decode('utf-8', 'replace').rstrip()))
+        except (ValueError, IOError, OSError):
+            # The pipe was closed by .stop()
+            pass
+
+
+def _close_pipes(process):
+    """
+    Closes the stdin, stdout and stderr pipes of a process that has exited
+
+    :param process:
+        A subprocess.Popen object
+    """
+
+    for pipe in (process.stdin, process.stdout, process.stderr):
+        if pipe is None:
+            continue
+        try:
+            pipe.close()
+        except (IOError, OSError):
+            pass
+
+
+def _reap_tool_servers():
+    """
+    Runs in a background thread, stopping servers that have been idle for
+    longer than their idle timeout
+    """
+
+    while True:
+        time.sleep(_TOOL_SERVER_CHECK_SECONDS)
+        _stop_idle_tool_servers()
+
+
+def _stop_idle_tool_servers():
+    """
+    Stops servers that have been idle for longer than their idle timeout
+
+    :return:
+        An integer of the number of servers stopped
+    """
+
+    now = time.time()
+    idle = []
+    with _tool_servers_lock:
+        for key, server in list(_tool_servers.items()):
+            if now - server.last_used > server.idle_timeout:
+                idle.append(server)
+                del _tool_servers[key]
+        for slot, key in list(_tool_slots.items()):
+            if key not in _tool_servers:
+                del _tool_slots[slot]
+
+    for server in idle:
+        if debug_enabled():
+            _log('stopping idle %s in "%s"' % (os.path.basename(_trace_str(server._path)), server.root))
+        server.stop()
+    return len(idle)
+
+
+def stream_diagnostics(executable_name, args, cwd, callback, required_vars=None, optional_vars=None, view=None,
+                       window=None, interval=_DIAGNOSTICS_DEFAULT_INTERVAL):
+    """
+    Runs a go executable, such as "go build" or "go vet", via launch() and
+    parses its output into golangconfig.Diagnostic objects as it is written,
+    rather than once the process exits. Diagnostics are delivered to the
+    callback on the UI thread via sublime.set_timeout(), in batches no more
+    often than the interval.
+
+    :param executable_name:
+        A unicode string of the executable to run, e.g. "go"
+
+    :param args:
+        A list of unicode strings of the arguments to pass to the executable
+
+    :param cwd:
+        A unicode string of the working directory for the process, which
+        relative file paths in the output are resolved against
+
+    :param callback:
+        A callable accepting a list of golangconfig.Diagnostic objects and
+        the exit code of the process. The exit code is None until the final
+        call, which is made once the process exits, and may have an empty
+        list of diagnostics.
+
+    :param required_vars:
+        None, or a list of unicode strings of the environment variables that
+        are required, e.g. "GOPATH". Obtains values from setting_value().
+
+    :param optional_vars:
+        None, or a list of unicode strings of the environment variables that
+        are optional, but should be pulled from setting_value() if available -
+        e.g. "GOOS", "GOARCH". Obtains values from setting_value().
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings,
+        and the open views of files with diagnostics. This should be passed
+        whenever available.
+
+    :param interval:
+        The minimum number of seconds between calls to the callback
+
+    :raises:
+        RuntimeError
+            When called from a thread other than the UI thread in Sublime Text
+            2, before the settings involved were mirrored by a call on the UI
+            thread
+        TypeError
+            When any of the parameters are of the wrong type
+        OSError
+            When the executable could not be started
+        golangconfig.ExecutableError
+            When the executable requested could not be located. The .name
+            attribute contains the name of the executable that could not be
+            located. The .dirs attribute contains a list of unicode strings of
+            the directories searched.
+        golangconfig.EnvVarError
+            When one or more required_vars are not available. The .missing
+            attribute will be a list of the names of missing environment
+            variables.
+
+    :return:
+        The subprocess.Popen object of the process, which may be used to
+        terminate it
+    """
+
+    _require_unicode('cwd', cwd)
+    if not callable(callback):
+        raise TypeError('callback must be callable, not %s' % _type_name(callback))
+    if isinstance(interval, bool) or not isinstance(interval, (int, float)):
+        raise TypeError('interval must be a number, not %s' % _type_name(interval))
+    _check_view_window(view, window)
+
+    if window is None and view is not None:
+        window = _view_attribute(view, 'window')
+
+    process = launch(
+        executable_name,
+        args,
+        required_vars or [],
+        optional_vars,
+        view=view,
+        window=window,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT
+    )
+    stream = _DiagnosticsStream(DiagnosticsParser(cwd), callback, window, interval)
+    thread = threading.Thread(target=stream.read, args=(process,), name='golangconfig-diagnostics')
+    thread.daemon = True
+    thread.start()
+    return process
+
+
+class Diagnostic(object):
+
+    """
+    An error or warning parsed from the output of a go tool by
+    golangconfig.DiagnosticsParser
+    """
+
+    __slots__ = ('file_name', 'line', 'column', 'message', 'view')
+
+    def __init__(self, file_name, line, column, message, view=None):
+        """
+        :param file_name:
+            A unicode string of the absolute path to the file
+
+        :param line:
+            An integer of the 1-based line number
+
+        :param column:
+            None, or an integer of the 1-based column number
+
+        :param message:
+            A unicode string of the message, which may contain multiple lines
+
+        :param view:
+            None, or the sublime.View object of the file if it is open
+        """
+
+        self.file_name = file_name
+        self.line = line
+        self.column = column
+        self.message = message
+        self.view = view
+
+    def __eq__(self, other):
+        if not isinstance(other, Diagnostic):
+            return NotImplemented
+        return (self.file_name, self.line, self.column, self.message) == \
+            (other.file_name, other.line, other.column, other.message)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        return hash((self.file_name, self.line, self.column, self.message))
+
+    def __repr__(self):
+        return 'Diagnostic(%r, %r, %r, %r)' % (self.file_name, self.line, self.column, self.message)
+
+
+class DiagnosticsParser(object):
+
+    """
+    Incrementally parses the output of go tools such as "go build", "go vet"
+    and "go test" into golangconfig.Diagnostic objects. Output may be fed in
+    chunks of any size, split anywhere, including within a line.
+    """
+
+    cwd = None
+
+    def __init__(self, cwd):
+        """
+        :param cwd:
+            A unicode string of the directory relative paths are resolved
+            against - generally the working directory of the process
+        """
+
+        _require_unicode('cwd', cwd)
+        self.cwd = cwd
+        self._buffer = b''
+        self._current = None
+
+    def feed(self, data):
+        """
+        :param data:
+            A byte string of output from the process
+
+        :raises:
+            TypeError
+                When data is not a byte string
+
+        :return:
+            A list of the golangconfig.Diagnostic objects completed by the data.
+            Since messages may continue on following lines, a diagnostic is
+            only returned once the next line is seen, or .close() is called.
+        """
+
+        if not isinstance(data, bytes):
+            raise TypeError('data must be a byte string, not %s' % _type_name(data))
+
+        lines = (self._buffer + data).split(b'\n')
+        self._buffer = lines.pop()
+        output = []
+        for line in lines:
+            self._parse_line(line.decode('utf-8', 'replace').rstrip('\r'), output)
+        return output
+
+    def close(self):
+        """
+        Parses any output remaining after the process exits
+
+        :return:
+            A list of the remaining golangconfig.Diagnostic objects
+        """
+
+        output = []
+        if self._buffer:
+            self._parse_line(self._buffer.decode('utf-8', 'replace').rstrip('\r'), output)
+            self._buffer = b''
+        if self._current is not None:
+            output.append(self._current)
+            self._current = None
+        return output
+
+    def _parse_line(self, line, output):
+        if line.startswith('\t') and self._current is not None:
+            self._current.message += '\n' + line[1:]
+            return
+
+        if self._current is not None:
+            output.append(self._current)
+            self._current = None
+
+        match = _DIAGNOSTIC_RE.match(line.strip())
+        if match is None:
+            return
+
+        file_name, line_number, column, message = match.groups()
+        file_name = os.path.normpath(os.path.join(self.cwd, file_name))
+        self._current = Diagnostic(
+            file_name,
+            int(line_number),
+            int(column) if column is not None else None,
+            message
+        )
+
+
+class _DiagnosticsStream(object):
+
+    """
+    Reads the output of a process started by stream_diagnostics() in a
+    background thread, and delivers the parsed diagnostics to the UI thread
+    no more often than the interval
+    """
+
+    def __init__(self, parser, callback, window, interval):
+        self._parser = parser
+        self._callback = callback
+        self._window = window
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._pending = []
+        self._returncode = None
+        self._scheduled = False
+        self._last_delivery = 0
+
+    def read(self, process):
+        fileno = process.stdout.fileno()
+        try:
+            while True:
+                data = os.read(fileno, 65536)
+                if not data:
+                    break
+                self._queue(self._parser.feed(data), None)
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+            self._queue(self._parser.close(), returncode)
+
+    def _queue(self, diagnostics, returncode):
+        with self._lock:
+            self._pending.extend(diagnostics)
+            if returncode is not None:
+                self._returncode = returncode
+            elif not self._pending:
+                return
+            if self._scheduled:
+                return
+            self._scheduled = True
+            delay = self._last_delivery + self._interval - time.time()
+        sublime.set_timeout(self._deliver, max(0, int(delay * 1000)))
+
+    def _deliver(self):
+        with self._lock:
+            diagnostics = self._pending
+            returncode = self._returncode
+            self._pending = []
+            self._scheduled = False
+            self._last_delivery = time.time()
+
+        if diagnostics and self._window is not None:
+            views = {}
+            for view in self._window.views():
+                file_name = view.file_name()
+                if file_name:
+                    views[os.path.normcase(file_name)] = view
+            for diagnostic in diagnostics:
+                diagnostic.view = views.get(os.path.normcase(diagnostic.file_name))
+
+        self._callback(diagnostics, returncode)
+
+
+class CacheCleanupListener(_EventListener):
+
+    """
+    Releases the settings and results cached for views and windows once they
+    are closed. golangconfig is a dependency rather than a plugin, so a package
+    enables this by importing the class into one of its plugin modules:
+
+        from golangconfig import CacheCleanupListener
+
+    Any number of packages may do so. Without it, the state for closed views
+    and windows is still bounded, but is only discarded as newer entries push
+    it out.
+    """
+
+    def on_close(self, view):
+        _forget_object(view)
+
+    def on_pre_close_window(self, window):
+        # Only called by Sublime Text 4
+        _forget_object(window)
+
+
+def cache_stats():
+    """
+    Returns information about the state golangconfig keeps in memory. May be
+    called from any thread.
+
+    :return:
+        A dict with unicode string keys of the cache names, and dict values
+        with the keys:
+
+         - "entries": an integer of the number of entries
+         - "max_entries": an integer of the maximum number of entries
+         - "bytes": an integer estimate of the memory used by the entries
+
+        The dict also contains the keys "views" and "windows", with integer
+        values of the number of views and windows with mirrored settings.
+    """
+
+    caches = {
+        'resolved_results': _resolved_results,
+        'project_layers': _project_layers,
+        'view_attributes': _view_attributes,
+        'observed_views': _observed_views,
+        'auto_gopaths': _auto_gopaths,
+        'executable_statuses': _executable_statuses,
+        'budget_results': _budget_results,
+        'output_results': _memory_results,
+        'package_graphs': _package_graphs,
+    }
+
+    output = {}
+    for name, cache in caches.items():
+        output[name] = {
+            'entries': len(cache),
+            'max_entries': cache.max_entries,
+            'bytes': cache.approximate_size(),
+        }
+
+    view_class = sublime.View.__name__ if sublime is not None else 'View'
+    kinds = [key[0] for key in _project_layers.keys()]
+    output['views'] = len([kind for kind in kinds if kind == view_class])
+    output['windows'] = len(kinds) - output['views']
+    return output
+
+
+@_traced
+def _get_most_specific_setting(name, view, window):
+    """
+    Looks up a setting in the following order. When called off of the UI
+    thread, the settings mirrored from the most recent UI thread call or
+    change notification are used instead of calling the Sublime Text API.
+
+    1. View settings, looking inside of the "osx", "windows" or "linux" key
+       based on the OS that Sublime Text is running on. These settings are from
+       a project file.
+    2. Window settings (ST3 only), looking inside of the "osx", "windows" or
+       "linux" key based on the OS that Sublime Text is running on. These
+       settings are from a project file.
+    3. golang.sublime-settings, looking inside of the "osx", "windows" or
+       "linux" key based on the OS that Sublime Text is running on.
+    4. The view settings. These settings are from a project file.
+    5. The window settings (ST3 only). These settings are from a project file.
+    6. golang.sublime-settings
+
+    :param name:
+        A unicode string of the setting to fetch
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings. This
+        should be passed whenever available.
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings.
+        This should be passed whenever available.
+
+    :return:
+        A three-element tuple.
+
+        If no setting was found, the return value will be:
+
+         - [0] golangconfig._NO_VALUE
+         - [1] None
+         - [2] None
+
+        If a setting was found, the return value will be:
+
+         - [0] A golangconfig._SettingEntry object of the normalized value
+         - [1] An interned unicode string of the source:
+           - "project file (os-specific)"
+           - "golang.sublime-settings (os-specific)"
+           - "project file"
+           - "golang.sublime-settings"
+         - [2] A unicode string of the origin, "project" or "settings"
+    """
+
+    if view is not None and not isinstance(view, sublime.View):
+        raise TypeError('view must be an instance of sublime.View, not %s' % _type_name(view))
+
+    if window is not None and not isinstance(window, sublime.Window):
+        raise TypeError('window must be an instance of sublime.Window, not %s' % _type_name(window))
+
+    layers = _settings_layers(view, window)
+
+    for layer in layers:
+        entry = layer.entry(name, True)
+        if entry is not None:
+            return (entry, layer.os_source, layer.origin)
+
+    for layer in layers:
+        entry = layer.entry(name, False)
+        if entry is not None:
+            return (entry, layer.source, layer.origin)
+
+    return (_NO_VALUE, None, None)
+
+
+def _settings_layers(view, window):
+    """
+    Returns the compiled settings layers to search, from most to least
+    specific, recording each as a dependency of the result being resolved
+
+    :param view:
+        None or a sublime.View object
+
+    :param window:
+        None or a sublime.Window object
+
+    :return:
+        A list of _SettingsLayer objects
+    """
+
+    layers = []
+
+    if view:
+        _depend('layer', _mirror_key(view))
+        layers.append(_view_layer(view))
+        if _package_setting('auto_gopath') is True:
+            # Refreshes the mirrored file name, which changes on "save as"
+            _view_attribute(view, 'file_name')
+
+    if view and not window:
+        window = _view_attribute(view, 'window')
+
+    if window:
+        _depend('layer', _mirror_key(window))
+        window_layer = _window_layer(window, view)
+        if window_layer is not None:
+            layers.append(window_layer)
+
+    _depend('layer', 'golang.sublime-settings')
+    layers.append(_global_layer())
+    return layers
+
+
+def _auto_gopath_entry(view):
+    """
+    Detects the GOPATH of a legacy workspace by walking up from the file of a
+    view to the nearest directory named "src". Results are memoized for every
+    directory visited, so other files in the same tree are resolved without
+    walking.
+
+    :param view:
+        A sublime.View object
+
+    :return:
+        None if the view has no file or is not inside of a "src" directory,
+        otherwise a _SettingEntry of the GOPATH
+    """
+
+    file_name = _view_attribute(view, 'file_name')
+    if not file_name:
+        return None
+
+    current = os.path.dirname(file_name)
+    visited = []
+    while True:
+        result = _auto_gopaths.get(current)
+        if result is not None:
+            break
+        visited.append(current)
+        parent = os.path.dirname(current)
+        if parent == current:
+            result = (None,)
+            break
+        if os.path.basename(current) == 'src':
+            result = (_SettingEntry('GOPATH', parent),)
+            break
+        current = parent
+
+    for directory in visited:
+        _auto_gopaths.set(directory, result)
+    return result[0]
+
+
+def _apply_setting_vars(env, required_vars, optional_vars, view, window, encode):
+    """
+    Updates an environment dict with the values of settings from
+    setting_value(), removing variables that are set to None
+
+    :param env:
+        The dict of the environment to modify
+
+    :param required_vars:
+        A list of unicode strings of the environment variables that are required
+
+    :param optional_vars:
+        None or a list of unicode strings of optional environment variables
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings
+
+    :param encode:
+        A callable to encode the unicode string keys and values of the env
+
+    :raises:
+        golangconfig.EnvVarError
+            When one or more required_vars are not available
+        golangconfig.GoPathNotFoundError
+            When one or more directories specified by GOPATH do not exist
+        golangconfig.GoRootNotFoundError
+            When the directory specified by GOROOT does not exist
+    """
+
+    var_groups = [required_vars]
+    if optional_vars:
+        var_groups.append(optional_vars)
+
+    missing_vars = []
+
+    for var_names in var_groups:
+        for var_name in var_names:
+            value, _ = setting_value(var_name, view=view, window=window)
+            var_key = var_name
+
+            if value is not None:
+                value = str_cls(value)
+                value = encode(value)
+            var_key = encode(var_key)
+
+            if value is None:
+                if var_key in env:
+                    del env[var_key]
+                continue
+
+            env[var_key] = value
+
+    for required_var in required_vars:
+        var_key = encode(required_var)
+        if var_key not in env:
+            missing_vars.append(required_var)
+
+    if missing_vars:
+        missing_vars = sorted(missing_vars, key=lambda s: s.lower())
+        exception = EnvVarError(
+            'The following environment variable%s currently unset: %s' %
+            (
+                's are' if len(missing_vars) > 1 else ' is',
+                ', '.join(missing_vars)
+            )
+        )
+        exception.missing = missing_vars
+        raise exception
+
+
+def _require_unicode(name, value):
+    """
+    Requires that a parameter be a unicode string
+
+    :param name:
+        A unicode string of the parameter name
+
+    :param value:
+        The parameter value
+
+    :raises:
+        TypeError
+            When the value is not a unicode string
+    """
+
+    if not isinstance(value, str_cls):
+        raise TypeError('%s must be a unicode string, not %s' % (name, _type_name(value)))
+
+
+def _check_view_window(view, window):
+    """
+    Ensures that the view and window parameters to a function are suitable
+    objects for our purposes. There is not a strict check for type to allow for
+    mocking during testing.
+
+    :param view:
+        The view parameter to check
+
+    :param window:
+        The window parameter to check
+
+    :raises:
+        TypeError
+            When the view or window parameters are not of the appropriate type
+    """
+
+    if view is not None:
+        if not isinstance(view, sublime.View):
+            raise TypeError('view must be an instance of sublime.View, not %s' % _type_name(view))
+
+    if window is not None:
+        if not isinstance(window, sublime.Window) and sys.version_info >= (3,):
+            raise TypeError('window must be an instance of sublime.Window, not %s' % _type_name(window))
+
+
+def _type_name(value):
+    """
+    :param value:
+        The value to get the type name of
+
+    :return:
+        A unicode string of the name of the value's type
+    """
+
+    value_cls = value.__class__
+    value_module = value_cls.__module__
+    if value_module in set(['builtins', '__builtin__']):
+        return value_cls.__name__
+
+    return '%s.%s' % (value_module, value_cls.__name__)
+
+
+def _debug_unicode_string(name, value, source):
+    """
+    Displays a debug message to the console if the value is not a unicode string
+
+    :param name:
+        A unicode string of the name of the setting
+
+    :param value:
+        The setting value to check
+
+    :param source:
+        A unicode string of the source of the setting
+    """
+
+    if value is not None and not isinstance(value, str_cls):
+        _log(
+            'the value for %s from %s is not a string, but instead a %s' %
+            (
+                name,
+                source,
+                _type_name(value)
+            )
+        )
+
+
+def _check_executable(possible_executable_path, source, setting):
+    """
+    Checks to see if a path to an executable exists and that it is, in fact,
+    executable. Will display debug info if the path exists, but is not
+    executable.
+
+    :param possible_executable_path:
+        A unicode string of the full file path to the executable
+
+    :param source:
+        A unicode string of the source of the setting
+
+    :param setting:
+        A unicode string of the PATH value that the executable was found in
+
+    :return:
+        A boolean - if the possible_executable_path is a file that is executable
+    """
+
+    _depend('path', os.path.dirname(possible_executable_path))
+    status = _executable_status(possible_executable_path)
+    return _report_executable(possible_executable_path, status, source, setting)
+
+
+def _executable_status(possible_executable_path):
+    """
+    Checks the filesystem for an executable, reusing the result of a check
+    within the last _RESOLVED_PATH_SECONDS. Does not call the Sublime Text
+    API, so may be run from the probe threads.
+
+    :param possible_executable_path:
+        A unicode string of the full file path to the executable
+
+    :return:
+        None if the path does not exist, otherwise a boolean - if the path is a
+        file that is executable
+    """
+
+    now = time.time()
+    cached = _executable_statuses.get(possible_executable_path)
+    if cached is not None and now - cached[1] < _RESOLVED_PATH_SECONDS:
+        return cached[0]
+
+    if not _fs.exists(possible_executable_path):
+        status = None
+    else:
+        status = _fs.is_executable(possible_executable_path)
+    _executable_statuses.set(possible_executable_path, (status, now))
+    return status
+
+
+def _report_executable(possible_executable_path, status, source, setting):
+    """
+    Displays debug info if an executable exists, but is not executable
+
+    :param possible_executable_path:
+        A unicode string of the full file path to the executable
+
+    :param status:
+        The return value of _executable_status()
+
+    :param source:
+        A unicode string of the source of the setting
+
+    :param setting:
+        A unicode string of the PATH value that the executable was found in
+
+    :return:
+        A boolean - if the possible_executable_path is a file that is executable
+    """
+
+    if status is True:
+        return True
+
+    if status is False and debug_enabled():
+        executable_name = os.path.basename(possible_executable_path)
+        _log(
+            'binary %s found in PATH from %s - "%s" - is not executable' %
+            (
+                executable_name,
+                source,
+                setting
+            )
+        )
+
+    return False
+
+
+def _path_dirs(view, window):
+    """
+    Returns the directories searched for executables, in the order they are
+    searched, with duplicates removed
+
+    :param view:
+        A sublime.View object, or None
+
+    :param window:
+        A sublime.Window object, or None
+
+    :return:
+        A list of three-element tuples of (unicode string directory, unicode
+        string source, unicode string PATH value)
+    """
+
+    checked = set()
+    output = []
+
+    entry, source, _ = _get_most_specific_setting('PATH', view, window)
+    if entry is not _NO_VALUE and entry.is_str:
+        for dir_ in _unchecked_dirs(entry.parts, checked):
+            output.append((dir_, source, entry.text))
+
+    _depend('env', 'PATH')
+    shell, shell_dirs = _shell_path()
+    shell_setting = os.pathsep.join(shell_dirs)
+    for dir_ in _unchecked_dirs(shell_dirs, checked):
+        output.append((dir_, shell, shell_setting))
+    return output
+
+
+def _unchecked_dirs(dirs, checked):
+    """
+    Removes directories that were already checked from a PATH value, since
+    PATH values often contain duplicates
+
+    :param dirs:
+        A list of unicode strings of directories
+
+    :param checked:
+        A set of the directories already checked, which is updated
+
+    :return:
+        A list of unicode strings of the directories to check, in order
+    """
+
+    output = []
+    for dir_ in dirs:
+        if dir_ in checked:
+            continue
+        checked.add(dir_)
+        output.append(dir_)
+    return output
+
+
+def _find_executable(dirs, suffixed_name, source, setting):
+    """
+    Finds the first directory of a PATH value that contains an executable.
+    When the "filesystem_timeout" setting is set, the directories are checked
+    concurrently and any that were recently slow to respond are skipped.
+
+    :param dirs:
+        A list of unicode strings of the directories to check, in order
+
+    :param suffixed_name:
+        A unicode string of the executable filename, including any ".exe"
+
+    :param source:
+        A unicode string of the source of the setting
+
+    :param setting:
+        A unicode string of the PATH value the directories are from
+
+    :return:
+        None, or a unicode string of the full path to the executable
+    """
+
+    timeout = _probe_timeout()
+    if timeout is None:
+        for dir_ in dirs:
+            possible_executable_path = os.path.join(dir_, suffixed_name)
+            if _check_executable(possible_executable_path, source, setting):
+                return possible_executable_path
+        return None
+
+    paths = [os.path.join(dir_, suffixed_name) for dir_ in _skip_slow(dirs)]
+    for possible_executable_path, status in _probe(paths, _executable_status, timeout, os.path.dirname):
+        dir_ = os.path.dirname(possible_executable_path)
+        _depend('path', dir_)
+        if status is _NO_VALUE:
+            _mark_slow(dir_, timeout)
+        elif _report_executable(possible_executable_path, status, source, setting):
+            return possible_executable_path
+    return None
+
+
+def _missing_paths(paths):
+    """
+    Finds the directories from a GOPATH or GOROOT value that do not exist.
+    When the "filesystem_timeout" setting is set, the directories are checked
+    concurrently, and any that do not respond in time, or were recently slow
+    to respond, are assumed to exist.
+
+    :param paths:
+        A list of unicode strings of directories
+
+    :return:
+        A list of unicode strings of the directories that do not exist, in the
+        order given
+    """
+
+    for path in paths:
+        _depend('path', path)
+
+    timeout = _probe_timeout()
+    if timeout is None:
+        return [path for path in paths if not _fs.exists(path)]
+
+    missing = set()
+    for path, exists in _probe(_skip_slow(paths), _fs.exists, timeout, None):
+        if exists is _NO_VALUE:
+            _mark_slow(path, timeout)
+        elif not exists:
+            missing.add(path)
+    return [path for path in paths if path in missing]
+
+
+def _probe_timeout():
+    """
+    :return:
+        None if directories should be checked serially, otherwise a number of
+        seconds from the "filesystem_timeout" setting
+    """
+
+    timeout = _package_setting('filesystem_timeout')
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+        return None
+    return timeout
+
+
+def _skip_slow(dirs):
+    """
+    Removes directories that were recently slow to respond from a list,
+    otherwise preserving the order
+
+    :param dirs:
+        A list of unicode strings of directories
+
+    :return:
+        A list of unicode strings of directories
+    """
+
+    if not _slow_dirs:
+        return dirs
+
+    now = time.time()
+    output = []
+    for dir_ in dirs:
+        marked = _slow_dirs.get(dir_)
+        if marked is not None and now - marked > _SLOW_DIR_SECONDS:
+            _slow_dirs.pop(dir_, None)
+            marked = None
+        if marked is None:
+            output.append(dir_)
+    return output
+
+
+def _mark_slow(path, timeout):
+    """
+    Records that a directory did not respond within the "filesystem_timeout"
+
+    :param path:
+        A unicode string of the directory
+
+    :param timeout:
+        The number of seconds waited
+    """
+
+    _slow_dirs[path] = time.time()
+    if debug_enabled():
+        _log(
+            'directory "%s" did not respond within %s seconds and will be skipped for %s seconds' %
+            (
+                path,
+                timeout,
+                _SLOW_DIR_SECONDS
+            )
+        )
+
+
+def _probe(paths, check, timeout, directory):
+    """
+    Runs a filesystem check on each of a list of paths using the probe
+    threads, yielding the results in the order of the paths. Only a few checks
+    are started ahead of the result being consumed, and any that are still
+    queued when the caller stops iterating are cancelled. A path in a
+    directory that a check is still running for is not checked again, so
+    that an unresponsive mount can only ever block one thread.
+
+    :param paths:
+        A list of unicode strings of paths
+
+    :param check:
+        A callable accepting a path. Must not call the Sublime Text API.
+
+    :param timeout:
+        The number of seconds to wait for each check, from when it was queued
+
+    :param directory:
+        None if the paths are directories, otherwise a callable returning the
+        directory of a path
+
+    :return:
+        A generator of two-element tuples of (path, result), where the result
+        is golangconfig._NO_VALUE if the check did not finish in time
+    """
+
+    if not _probe_pool:
+        _probe_pool.append(_ProbePool(_PROBE_MAX_WORKERS))
+    pool = _probe_pool[0]
+
+    remaining = iter(paths)
+    pending = collections.deque()
+    # A path listed more than once, such as a directory repeated in PATH,
+    # shares the check already submitted for it
+    submitted = {}
+    try:
+        while True:
+            while len(pending) < _PROBE_WINDOW:
+                path = next(remaining, None)
+                if path is None:
+                    break
+                task = submitted.get(path)
+                if task is None:
+                    key = path if directory is None else directory(path)
+                    task = pool.submit(check, path, key)
+                    submitted[path] = task
+                pending.append((path, task, time.time() + timeout))
+            if not pending:
+                return
+
+            path, task, deadline = pending.popleft()
+            if task is None:
+                yield (path, _NO_VALUE)
+            elif task.wait(max(0, deadline - time.time())):
+                yield (path, task.result())
+            else:
+                task.cancel()
+                yield (path, _NO_VALUE)
+    finally:
+        for _, task, _ in pending:
+            if task is not None:
+                task.cancel()
+
+
+class _ProbeTask(object):
+
+    """
+    A filesystem check queued in a _ProbePool
+    """
+
+    def __init__(self, function, arg, key):
+        self.function = function
+        self.arg = arg
+        self.key = key
+        self.started = False
+        self.cancelled = False
+        self.value = None
+        self.error = None
+        self.event = threading.Event()
+
+    def run(self):
+        if self.cancelled:
+            return
+        self.started = True
+        try:
+            self.value = self.function(self.arg)
+        except (Exception) as e:
+            self.error = e
+        finally:
+            self.event.set()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def running(self):
+        """
+        :return:
+            A boolean - if the check has started, but not yet finished
+        """
+
+        return self.started and not self.event.is_set()
+
+    def wait(self, timeout):
+        """
+        :param timeout:
+            The number of seconds to wait
+
+        :return:
+            A boolean - if the check finished
+        """
+
+        # Event.wait() returns None on Python 2.6
+        self.event.wait(timeout)
+        return self.event.is_set()
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class _ProbePool(object):
+
+    """
+    A small pool of daemon threads that run filesystem checks, so that a hung
+    network mount blocks a worker instead of the lookup. Workers are started
+    as needed, up to a maximum, and are kept until .shutdown() is called.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._tasks = collections.deque()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._idle = 0
+        self._running = {}
+        self._closed = False
+
+    def submit(self, function, arg, key):
+        """
+        :param function:
+            A callable accepting one argument
+
+        :param arg:
+            The argument to pass to the function
+
+        :param key:
+            A unicode string of the directory the check is for
+
+        :return:
+            None if a check for the same directory is still running, otherwise
+            a _ProbeTask object
+        """
+
+        with self._condition:
+            existing = self._running.get(key)
+            if existing is not None and existing.running():
+                return None
+            task = _ProbeTask(function, arg, key)
+            self._tasks.append(task)
+            if self._idle < len(self._tasks) and len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._work, name='golangconfig-probe')
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+            self._condition.notify()
+        return task
+
+    def shutdown(self):
+        """
+        Cancels any queued checks and waits for the worker threads to exit
+        """
+
+        with self._condition:
+            self._closed = True
+            for task in self._tasks:
+                task.cancel()
+            self._condition.notify_all()
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                self._idle += 1
+                while not self._tasks and not self._closed:
+                    self._condition.wait()
+                self._idle -= 1
+                if not self._tasks:
+                    return
+                task = self._tasks.popleft()
+                if not task.cancelled:
+                    self._running[task.key] = task
+            task.run()
+            with self._condition:
+                if self._running.get(task.key) is task:
+                    del self._running[task.key]
+
+
+class _OsFilesystem(object):
+
+    """
+    The filesystem checks used when resolving settings and executables. The
+    test suite replaces golangconfig._fs with an in-memory implementation
+    providing the same methods.
+    """
+
+    def exists(self, path):
+        """
+        :param path:
+            A unicode string of a file or directory path
+
+        :return:
+            A boolean - if the path exists
+        """
+
+        return os.path.exists(path)
+
+    def is_executable(self, path):
+        """
+        :param path:
+            A unicode string of a file path
+
+        :return:
+            A boolean - if the path is a file that may be executed
+        """
+
+        return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+_fs = _OsFilesystem()
+
+
+def _intern(value):
+    """
+    Returns a shared copy of a unicode string, so that equal sources and path
+    components held by many results and settings entries use one object
+
+    :param value:
+        A unicode string, or any other value, which is returned unchanged
+
+    :return:
+        The interned value
+    """
+
+    if not isinstance(value, str_cls):
+        return value
+    interned = _interned.get(value)
+    if interned is None:
+        if len(_interned) >= _INTERN_MAX_ENTRIES:
+            _interned.clear()
+        interned = _interned.setdefault(value, value)
+    return interned
+
+
+class _SettingEntry(object):
+
+    """
+    A setting value that has been validated and normalized once, when the
+    settings it came from were loaded
+    """
+
+    __slots__ = ('value', 'is_str', 'text', 'parts')
+
+    def __init__(self, name, value):
+        self.value = value
+        self.is_str = isinstance(value, str_cls)
+        # Values of other types, including null, are coerced so that a
+        # validated setting such as GOPATH reports the value as not found
+        if self.is_str:
+            self.text = value
+        else:
+            self.text = str_cls(value)
+        self.parts = None
+        if name in _PATH_LIST_SETTINGS:
+            self.parts = [_intern(part) for part in self.text.split(os.pathsep)]
+
+
+class _SettingsLayer(object):
+
+    """
+    The compiled form of one source of golang settings, such as the settings
+    of a project, golang.sublime-settings or the shell environment. Values are
+    compiled into _SettingEntry objects either up front from a dict, or lazily
+    from a sublime.Settings object, which can not be enumerated. The origin is
+    the kind of layer reported via ResolvedValue.layer.
+    """
+
+    __slots__ = ('source', 'os_source', 'origin', 'raw', '_settings_obj', '_entries', '_os_entries')
+
+    def __init__(self, source, origin, raw=None, settings_obj=None):
+        self.source = _intern(source)
+        self.os_source = _intern(source + ' (os-specific)')
+        self.origin = origin
+        self.raw = raw
+        self._settings_obj = settings_obj
+        self._entries = {}
+        self._os_entries = {}
+        if raw is not None:
+            for name, value in raw.items():
+                self._entries[name] = _SettingEntry(name, value)
+            os_settings = raw.get(_platform)
+            if isinstance(os_settings, dict):
+                for name, value in os_settings.items():
+                    self._os_entries[name] = _SettingEntry(name, value)
+
+    def entry(self, name, os_specific):
+        """
+        :param name:
+            A unicode string of the setting name
+
+        :param os_specific:
+            If the setting should be looked for in the sub-dict for the
+            current OS
+
+        :return:
+            None if the setting is not present, otherwise a _SettingEntry
+        """
+
+        entries = self._os_entries if os_specific else self._entries
+        if name in entries:
+            return entries[name]
+        if self._settings_obj is None:
+            return None
+
+        _require_api('The "%s" setting from %s' % (name, self.source))
+        if os_specific:
+            os_settings = self._settings_obj.get(_platform, _NO_VALUE)
+            if not isinstance(os_settings, dict) or name not in os_settings:
+                entries[name] = None
+                return None
+            value = os_settings[name]
+        else:
+            value = self._settings_obj.get(name, _NO_VALUE)
+            if value == _NO_VALUE:
+                entries[name] = None
+                return None
+        entry = _SettingEntry(name, value)
+        entries[name] = entry
+        return entry
+
+
+_global_layers = []
+
+
+def _global_layer():
+    """
+    Returns the compiled settings from golang.sublime-settings. The compiled
+    form is reused until Sublime Text reports that the settings changed, and
+    serves as the mirror used for lookups from other threads.
+
+    :return:
+        A _SettingsLayer object
+    """
+
+    if _package_settings_observed and _global_layers:
+        return _global_layers[0]
+
+    _require_api('golang.sublime-settings')
+    st_settings = sublime.load_settings('golang.sublime-settings')
+    _observe_package_settings(st_settings)
+    # Settings.to_dict() is only available in ST4
+    if hasattr(st_settings, 'to_dict'):
+        layer = _SettingsLayer('golang.sublime-settings', 'settings', raw=st_settings.to_dict())
+    else:
+        layer = _SettingsLayer('golang.sublime-settings', 'settings', settings_obj=st_settings)
+
+    if _package_settings_observed:
+        _global_layers[:] = [layer]
+    return layer
+
+
+def _project_layer(obj, settings):
+    """
+    Returns the compiled form of the golang settings of a view or window,
+    reusing the compiled form from a previous call if the settings are equal
+
+    :param obj:
+        The sublime.View or sublime.Window the settings came from
+
+    :param settings:
+        A dict of the golang settings
+
+    :return:
+        A _SettingsLayer object
+    """
+
+    if not isinstance(settings, dict):
+        settings = {}
+    key = _mirror_key(obj)
+    layer = _project_layers.get(key)
+    if layer is None or layer.raw != settings:
+        if layer is not None:
+            _invalidate_dependencies(lambda dependency: dependency == ('layer', key))
+        # The stamp is bumped even for a new layer, since one that was evicted
+        # from _project_layers took its stamp with it
+        _bump_stamp(key)
+        layer = _SettingsLayer('project file', 'project', raw=settings)
+        _project_layers.set(key, layer)
+    return layer
+
+
+def _view_layer(view):
+    """
+    Returns the compiled golang settings of a view. Off of the UI thread the
+    mirrored copy is used, so that no API call is necessary.
+
+    :param view:
+        A sublime.View object
+
+    :raises:
+        RuntimeError
+            When called off of the UI thread in ST2 and the view has not been
+            mirrored
+
+    :return:
+        A _SettingsLayer object
+    """
+
+    if not _on_main_thread():
+        layer = _project_layers.get(_mirror_key(view))
+        if layer is not None:
+            return layer
+        _require_api('The project settings of the view')
+
+    _observe_view_settings(view)
+    return _project_layer(view, view.settings().get('golang', {}))
+
+
+def _view_attribute(view, name):
+    """
+    Returns the result of calling a method of a view that takes no arguments,
+    such as window() or file_name(), using the mirrored value off of the UI
+    thread
+
+    :param view:
+        A sublime.View object
+
+    :param name:
+        A unicode string of the method name
+
+    :raises:
+        RuntimeError
+            When called off of the UI thread in ST2 and the view has not been
+            mirrored
+
+    :return:
+        The return value of the method
+    """
+
+    key = (_mirror_key(view), name)
+    if not _on_main_thread():
+        cached = _view_attributes.get(key)
+        if cached is not None:
+            return cached[0]
+        _require_api('The %s of the view' % name)
+
+    value = getattr(view, name)()
+    cached = _view_attributes.get(key)
+    if cached is not None and cached[0] != value:
+        view_key = _mirror_key(view)
+        _bump_stamp(view_key)
+        _invalidate_dependencies(lambda dependency: dependency == ('layer', view_key))
+    _view_attributes.set(key, (value,))
+    return value
+
+
+def _window_layer(window, view):
+    """
+    Returns the compiled golang settings of a window's project. Off of the UI
+    thread the mirrored copy is used, so that no API call is necessary.
+
+    :param window:
+        A sublime.Window object
+
+    :param view:
+        None or the sublime.View object the lookup is for. When None, the
+        settings of the active view are used if there is no project data.
+
+    :raises:
+        RuntimeError
+            When called off of the UI thread in ST2 and the window has not been
+            mirrored
+
+    :return:
+        None or a _SettingsLayer object
+    """
+
+    if not _on_main_thread():
+        layer = _project_layers.get(_mirror_key(window))
+        if layer is not None:
+            return layer
+        _require_api('The project settings of the window')
+
+    # Project settings are merged into view settings, so observing one view
+    # of the window reports changes to the project file. Once a view is being
+    # observed, the active view is only needed on ST2, which has no
+    # project_data().
+    window_key = _mirror_key(window)
+    observer_key = _view_attributes.get((window_key, 'observer'))
+    active_view = None
+    if not view and (observer_key is None or not _observed_views.get(observer_key[0]) or sys.version_info < (3,)):
+        active_view = window.active_view()
+    if active_view:
+        if _observe_view_settings(active_view):
+            _view_attributes.set((window_key, 'observer'), (_mirror_key(active_view),))
+
+    if sys.version_info >= (3,) and window.project_data():
+        window_settings = window.project_data().get('settings', {}).get('golang', {})
+        return _project_layer(window, window_settings)
+
+    if active_view:
+        window_settings = active_view.settings().get('golang', {})
+        return _project_layer(window, window_settings)
+
+    return None
+
+
+def _observe_view_settings(view):
+    """
+    Registers a callback to keep the mirrored settings of a view, and of its
+    window, up to date. Project settings are merged into the settings of each
+    view, so this also catches changes to the project file.
+
+    :param view:
+        A sublime.View object
+
+    :return:
+        A boolean - if changes to the settings of the view are reported
+    """
+
+    key = _mirror_key(view)
+    if _observed_views.get(key):
+        return True
+    view_settings = view.settings()
+    if not hasattr(view_settings, 'add_on_change'):
+        return False
+    _observed_views.set(key, True)
+    # A view evicted from _observed_views may already have a callback, which
+    # must be replaced rather than added to
+    view_settings.clear_on_change('golangconfig')
+    view_settings.add_on_change('golangconfig', lambda: _view_settings_changed(view))
+    return True
+
+
+def _view_settings_changed(view):
+    """
+    Called by Sublime Text on the UI thread when the settings of a view change
+
+    :param view:
+        A sublime.View object
+    """
+
+    # This is called for changes to any view setting, such as those made
+    # while typing, so nothing is done unless the golang settings changed
+    settings = view.settings().get('golang', {})
+    layer = _project_layers.get(_mirror_key(view))
+    if layer is not None and layer.raw == (settings if isinstance(settings, dict) else {}):
+        return
+
+    _project_layer(view, settings)
+    window = view.window()
+    _view_attributes.set((_mirror_key(view), 'window'), (window,))
+    if window is not None:
+        _window_layer(window, None)
+
+
+def _forget_object(obj):
+    """
+    Discards the mirrored settings and cached results of a view or window that
+    was closed
+
+    :param obj:
+        A sublime.View or sublime.Window object
+    """
+
+    key = _mirror_key(obj)
+    _project_layers.pop(key)
+    _observed_views.pop(key)
+    _config_stamps.pop(key, None)
+    for name in ('window', 'file_name', 'observer'):
+        _view_attributes.pop((key, name))
+    _invalidate_dependencies(lambda dependency: dependency == ('layer', key))
+
+
+def _mirror_key(obj):
+    """
+    :param obj:
+        A sublime.View or sublime.Window object
+
+    :return:
+        A tuple used to identify the mirrored settings of the view or window
+    """
+
+    return (obj.__class__.__name__, _object_id(obj))
+
+
+def _on_main_thread():
+    """
+    :return:
+        A boolean - if the current thread is the UI thread
+    """
+
+    return isinstance(threading.current_thread(), threading._MainThread)
+
+
+def _require_api(description):
+    """
+    Ensures the Sublime Text API may be used from the current thread
+
+    :param description:
+        A unicode string describing the data that is needed from the API
+
+    :raises:
+        RuntimeError
+            When called off of the UI thread in ST2
+    """
+
+    if not _API_THREADSAFE and not _on_main_thread():
+        raise RuntimeError(
+            '%s has not been mirrored yet, and the Sublime Text 2 API may only be used from the main thread' %
+            description
+        )
+
+
+def _object_id(obj):
+    """
+    :param obj:
+        A sublime.View or sublime.Window object
+
+    :return:
+        An integer that uniquely identifies the view or window
+    """
+
+    id_method = getattr(obj, 'id', None)
+    if id_method is not None:
+        return id_method()
+    return id(obj)
+
+
+class _LruCache(object):
+
+    """
+    A bounded mapping that discards the least-recently-used entries once it
+    grows beyond its maximum size. Safe to use from multiple threads.
+    """
+
+    def __init__(self, max_entries, on_evict=None):
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self._entries = {}
+        self._tick = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._tick += 1
+            entry[0] = self._tick
+            return entry[1]
+
+    def set(self, key, value):
+        evicted = []
+        with self._lock:
+            self._tick += 1
+            self._entries[key] = [self._tick, value]
+            if len(self._entries) > self.max_entries:
+                # Evicting in chunks keeps the cost of the sort amortized
+                # across many insertions
+                ordered = sorted(self._entries.items(), key=lambda item: item[1][0])
+                num_evict = len(self._entries) - int(self.max_entries * 0.9)
+                for evict_key, evict_entry in ordered[:num_evict]:
+                    del self._entries[evict_key]
+                    evicted.append((evict_key, evict_entry[1]))
+        if self.on_evict is not None:
+            for evict_key, evict_value in evicted:
+                self.on_evict(evict_key, evict_value)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def approximate_size(self):
+        """
+        :return:
+            An integer estimate of the number of bytes used by the entries
+        """
+
+        with self._lock:
+            items = [(key, entry[1]) for key, entry in self._entries.items()]
+        size = sys.getsizeof(self._entries)
+        for key, value in items:
+            size += _approximate_size(key) + _approximate_size(value)
+        return size
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _approximate_size(value, depth=0):
+    """
+    Estimates the memory used by a value, including the containers, strings
+    and slotted objects it references
+
+    :param value:
+        The value to measure
+
+    :param depth:
+        The recursion depth, used to bound the cost of the estimate
+
+    :return:
+        An integer number of bytes
+    """
+
+    size = sys.getsizeof(value)
+    if depth > 4:
+        return size
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += _approximate_size(key, depth + 1) + _approximate_size(item, depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += _approximate_size(item, depth + 1)
+    elif hasattr(value, '__slots__'):
+        for name in value.__slots__:
+            size += _approximate_size(getattr(value, name, None), depth + 1)
+    return size
+
+
+def _forget_stamp(key, layer):
+    """
+    Discards the stamp of a settings layer evicted from _project_layers
+
+    :param key:
+        The layer key
+
+    :param layer:
+        The _SettingsLayer object
+    """
+
+    _config_stamps.pop(key, None)
+
+
+_memory_results = _LruCache(_RESULT_MEMORY_ENTRIES)
+_budget_results = _LruCache(512)
+_project_layers = _LruCache(1024, on_evict=_forget_stamp)
+_resolved_results = _LruCache(_RESOLVED_MAX_ENTRIES, on_evict=_forget_resolved)
+_view_attributes = _LruCache(2048)
+_auto_gopaths = _LruCache(1024)
+# The status of each executable path checked, with the time it was checked,
+# so executable_candidates() may list what executable_path() already checked
+_executable_statuses = _LruCache(_RESOLVED_MAX_ENTRIES)
+# The subclasses of ResolvedValue for each layer and set of dependencies.
+# Evicting one only means that a new result gets a separate copy, since
+# existing results keep their class alive.
+_resolved_variants = _LruCache(_RESOLVED_MAX_ENTRIES)
+_observed_views = _LruCache(1024)
+_disk_results_lock = threading.Lock()
+# The total size of the files in the on-disk results cache, found by listing
+# the folder on the first write and then kept up to date as results are
+# written, so that the folder is only listed again when results are evicted
+_disk_results_size = [None]
+
+
+def _cache_dir(name):
+    """
+    Returns the path to a folder for golangconfig to store cached data in,
+    creating it if necessary
+
+    :param name:
+        A unicode string of the name of the sub-folder
+
+    :return:
+        A unicode string of the path to the folder
+    """
+
+    # sublime.cache_path() is only available in ST3
+    if hasattr(sublime, 'cache_path'):
+        base = sublime.cache_path()
+    else:
+        base = tempfile.gettempdir()
+    path = os.path.join(base, 'golangconfig', name)
+    if not os.path.exists(path):
+        try:
+            os.makedirs(path)
+        except (OSError):
+            # Another thread may have created the folder concurrently
+            if not os.path.isdir(path):
+                raise
+    return path
+
+
+def _hash_update(hash_obj, value):
+    """
+    Adds a value to a hash object in an unambiguous way, such that the
+    concatenation of different values can not produce the same digest
+
+    :param hash_obj:
+        A hashlib hash object
+
+    :param value:
+        None, an integer, a byte string or a unicode string
+    """
+
+    if value is None:
+        data = b'\x00'
+    else:
+        if isinstance(value, int):
+            value = str_cls(value)
+        if isinstance(value, str_cls):
+            value = value.encode('utf-8')
+        data = b'\x01' + str_cls(len(value)).encode('ascii') + b':' + value
+    hash_obj.update(data)
+
+
+def _env_fingerprint(env):
+    """
+    Calculates a hash of the contents of an environment dict
+
+    :param env:
+        A dict of environment variables, with unicode or byte string keys and
+        values
+
+    :return:
+        A unicode string of the hex digest
+    """
+
+    hash_obj = hashlib.sha1()
+    for name in sorted(env.keys()):
+        _hash_update(hash_obj, name)
+        _hash_update(hash_obj, env[name])
+    return hash_obj.hexdigest()
+
+
+def _result_key(path, env, args, stdin, input_files, cwd):
+    """
+    Generates the cache key for a tool invocation
+
+    :param path:
+        A unicode or byte string of the path to the executable
+
+    :param env:
+        A dict of the environment of the process
+
+    :param args:
+        A list of the arguments to the process
+
+    :param stdin:
+        None or a byte string of the data written to stdin
+
+    :param input_files:
+        None or a list of unicode strings of files read by the process
+
+    :param cwd:
+        None or a unicode or byte string of the working directory
+
+    :return:
+        A unicode string of the hex digest to use as the key
+    """
+
+    hash_obj = hashlib.sha1()
+
+    # The binary is identified by its location, size and modification time so
+    # that upgrading a tool in-place causes a new result to be generated
+    _hash_update(hash_obj, path)
+    try:
+        stat_info = os.stat(path)
+        _hash_update(hash_obj, int(stat_info.st_size))
+        _hash_update(hash_obj, int(stat_info.st_mtime * 1000))
+    except (OSError):
+        _hash_update(hash_obj, None)
+
+    _hash_update(hash_obj, len(args))
+    for arg in args:
+        _hash_update(hash_obj, arg)
+
+    _hash_update(hash_obj, _env_fingerprint(env))
+    _hash_update(hash_obj, cwd)
+    _hash_update(hash_obj, stdin)
+
+    if input_files:
+        for input_file in input_files:
+            _hash_update(hash_obj, input_file)
+            file_hash = hashlib.sha1()
+            with open(input_file, 'rb') as f:
+                for chunk in iter(lambda: f.read(65536), b''):
+                    file_hash.update(chunk)
+            _hash_update(hash_obj, file_hash.hexdigest())
+
+    return hash_obj.hexdigest()
+
+
+def _read_disk_result(key):
+    """
+    Reads a tool result from the on-disk cache
+
+    :param key:
+        A unicode string of the cache key
+
+    :return:
+        None if no result was found, otherwise a three-element tuple of
+        (returncode, stdout, stderr)
+    """
+
+    path = os.path.join(_cache_dir('results'), key)
+    try:
+        with open(path, 'rb') as f:
+            header = f.readline().decode('ascii').split()
+            returncode = int(header[0])
+            stdout = f.read(int(header[1]))
+            stderr = f.read()
+        # Touching the file allows the size cap to evict the least recently used
+        os.utime(path, None)
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+    return (returncode, stdout, stderr)
+
+
+def _write_disk_result(key, result):
+    """
+    Writes a tool result to the on-disk cache, evicting the least-recently
+    used results if the cache has grown beyond _RESULT_DISK_BYTES
+
+    :param key:
+        A unicode string of the cache key
+
+    :param result:
+        A three-element tuple of (returncode, stdout, stderr)
+    """
+
+    returncode, stdout, stderr = result
+    cache_dir = _cache_dir('results')
+    path = os.path.join(cache_dir, key)
+    temp_path = '%s.%s.tmp' % (path, threading.current_thread().ident)
+
+    with _disk_results_lock:
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(('%d %d\n' % (returncode, len(stdout))).encode('ascii'))
+                f.write(stdout)
+                f.write(stderr)
+            size = os.path.getsize(temp_path)
+            replaced_size = 0
+            if os.path.exists(path):
+                replaced_size = os.path.getsize(path)
+                os.remove(path)
+            os.rename(temp_path, path)
+        except (IOError, OSError):
+            try:
+                os.remove(temp_path)
+            except (OSError):
+                pass
+            return
+
+        if _disk_results_size[0] is not None:
+            _disk_results_size[0] += size - replaced_size
+            if _disk_results_size[0] <= _RESULT_DISK_BYTES:
+                return
+
+        # Other Sublime Text processes may share the folder, so the total is
+        # recalculated whenever it may be over the cap
+        entries = []
+        total_size = 0
+        for name in os.listdir(cache_dir):
+            entry_path = os.path.join(cache_dir, name)
+            try:
+                stat_info = os.stat(entry_path)
+            except (OSError):
+                continue
+            entries.append((stat_info.st_mtime, stat_info.st_size, entry_path))
+            total_size += stat_info.st_size
+
+        if total_size > _RESULT_DISK_BYTES:
+            for _, size, entry_path in sorted(entries):
+                try:
+                    os.remove(entry_path)
+                except (OSError):
+                    continue
+                total_size -= size
+                if total_size <= _RESULT_DISK_BYTES:
+                    break
+        _disk_results_size[0] = total_size
+
+
+def _popen_options(cwd, spawn=False):
+    """
+    Builds the keyword arguments for subprocess.Popen()
+
+    :param cwd:
+        None, or the working directory for the process
+
+    :param spawn:
+        If the process should be started in the cheapest way for the platform
+        and version of Python, at the cost of passing on any file descriptors
+        that other code in plugin_host explicitly made inheritable
+
+    :return:
+        A dict of keyword arguments
+    """
+
+    options = {'startupinfo': _startupinfo()}
+    if spawn and os.name == 'posix' and sys.version_info >= (3, 4):
+        # Since Python 3.4 file descriptors are not inheritable by default, so
+        # scanning every descriptor of plugin_host to close them is mostly
+        # wasted work. Without close_fds, an absolute executable and no cwd,
+        # Python 3.8+ starts the process via posix_spawn() instead of fork().
+        options['close_fds'] = False
+    if cwd is not None:
+        options['cwd'] = cwd
+    return options
+
+
+def _startupinfo():
+    """
+    Constructs a subprocess.STARTUPINFO object to prevent a console window from
+    being shown on Windows when running an executable
+
+    :return:
+        None on non-Windows platforms, otherwise a subprocess.STARTUPINFO object
+    """
+
+    if sys.platform != 'win32':
+        return None
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = subprocess.SW_HIDE
+    return startupinfo
+
+
+_package_graphs = _LruCache(32)
+_package_graphs_lock = threading.Lock()
+
+
+def _workspace_root(directory, gopath):
+    """
+    Determines the root of the Go workspace that a directory is part of
+
+    :param directory:
+        A unicode string of an absolute path to a directory
+
+    :param gopath:
+        None or a unicode string of the GOPATH setting
+
+    :return:
+        A unicode string of the directory containing go.mod, the src/ folder
+        of the GOPATH entry containing the directory, or the directory itself
+    """
+
+    current = directory
+    while True:
+        if os.path.exists(os.path.join(current, 'go.mod')):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            break
+        current = parent
+
+    if gopath:
+        for entry in gopath.split(os.pathsep):
+            src_dir = os.path.join(os.path.abspath(entry), 'src')
+            if directory == src_dir or directory.startswith(src_dir + os.sep):
+                return src_dir
+
+    return directory
+
+
+def _file_signature(path):
+    """
+    :param path:
+        A unicode string of a file path
+
+    :return:
+        None if the file does not exist, otherwise a tuple of the size and
+        modification time of the file
+    """
+
+    try:
+        stat_info = os.stat(path)
+    except (OSError):
+        return None
+    return (stat_info.st_size, stat_info.st_mtime)
+
+
+def _scan_go_dirs(root, workspace_root, recursive):
+    """
+    Finds all directories under a root that contain Go source files, skipping
+    the directories that the go tool ignores
+
+    :param root:
+        A unicode string of the directory to scan
+
+    :param workspace_root:
+        A unicode string of the root of the workspace, within which any other
+        folder containing go.mod is a separate module
+
+    :param recursive:
+        If the directories under the root should be scanned
+
+    :return:
+        A dict with unicode string keys of directory paths and values that are
+        a tuple of the names, sizes and modification times of the .go files
+    """
+
+    signatures = {}
+    for dir_, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if recursive and not _go_ignored(d)]
+        if dir_ != workspace_root and os.path.exists(os.path.join(dir_, 'go.mod')):
+            # Nested modules are separate workspaces
+            dirnames[:] = []
+            continue
+        files = []
+        for filename in sorted(filenames):
+            if not filename.endswith('.go'):
+                continue
+            signature = _file_signature(os.path.join(dir_, filename))
+            if signature is not None:
+                files.append((filename,) + signature)
+        if files:
+            signatures[dir_] = tuple(files)
+    return signatures
+
+
+def _go_ignored(relative_path):
+    """
+    :param relative_path:
+        A unicode string of a directory path relative to the workspace root
+
+    :return:
+        A boolean - if the go tool ignores the directory
+    """
+
+    for name in relative_path.split(os.sep):
+        if name == 'testdata' or (name != '.' and name.startswith('.')) or name.startswith('_'):
+            return True
+    return False
+
+
+def _decode_json_stream(text):
+    """
+    Decodes a sequence of concatenated JSON objects, as output by "go list -json"
+
+    :param text:
+        A unicode string of the JSON
+
+    :return:
+        A list of the decoded objects
+    """
+
+    decoder = json.JSONDecoder()
+    results = []
+    index = 0
+    length = len(text)
+    while True:
+        while index < length and text[index].isspace():
+            index += 1
+        if index >= length:
+            break
+        obj, index = decoder.raw_decode(text, index)
+        results.append(obj)
+    return results
+
+
+def _shell_env():
+    """
+    Returns the environment of the user's login shell, loading it the first
+    time it is requested. If the snapshot of the environment is older than the
+    "shell_env_refresh_interval" setting, the stale value is returned while a
+    fresh copy is loaded in the background.
+
+    :return:
+        A two-element tuple of (unicode string path to shell, dict of unicode
+        strings of the environment)
+    """
+
+    snapshot = _shell_env_snapshot
+    if snapshot is None:
+        snapshot = _initial_shell_env()
+
+    interval = snapshot['interval']
+    if interval and time.time() - snapshot['loaded'] > interval:
+        thread = _shell_env_refresh_thread
+        if thread is None or not thread.is_alive():
+            refresh_shell_env()
+
+    return (snapshot['shell'], snapshot['env'])
+
+
+def _shell_env_for_subprocess():
+    """
+    Returns the environment of the user's login shell, encoded for use with
+    subprocess.Popen()
+
+    :return:
+        A two-element tuple of (shell, env). On ST2 these are byte strings.
+        The env dict is a copy that may be modified by the caller.
+    """
+
+    _shell_env()
+    snapshot = _shell_env_snapshot
+    return (snapshot['shell'], snapshot['subprocess_env'].copy())
+
+
+def _shell_path():
+    """
+    Returns the PATH of the user's login shell
+
+    :return:
+        A two-element tuple of (unicode string path to shell, list of unicode
+        strings of the directories in the PATH)
+    """
+
+    shell, layer = _shell_env_layer()
+    entry = layer.entry('PATH', False)
+    return (shell, list(entry.parts) if entry is not None and entry.parts is not None else [''])
+
+
+def _shell_env_layer():
+    """
+    Returns the compiled form of the shell environment
+
+    :return:
+        A two-element tuple of (unicode string path to shell, _SettingsLayer)
+    """
+
+    _shell_env()
+    layer = _shell_env_snapshot['layer']
+    return (layer.source, layer)
+
+
+def _initial_shell_env():
+    """
+    Loads the shell environment for the first time. The login shell is run in
+    a background thread, and if it does not finish within the "shell_timeout"
+    setting, the last known environment persisted to disk, or the environment
+    of the Sublime Text process, is used until the shell finishes.
+
+    :return:
+        The new snapshot dict
+    """
+
+    global _shell_env_snapshot
+
+    settings = _shell_env_settings()
+    thread = _start_shell_env_load(False)
+    last_known = _read_shell_env()
+    waited = last_known is None or settings['timeout_set']
+    thread.join(settings['timeout'] if waited else 0)
+
+    with _shell_env_lock:
+        if _shell_env_snapshot is None:
+            _shell_env_snapshot = _fallback_shell_env(settings, last_known)
+            if not thread.is_alive():
+                message = 'loading the environment from the login shell failed, using %s instead'
+            elif waited:
+                message = 'loading the environment from the login shell timed out, using %s instead'
+            else:
+                message = 'using %s while the login shell loads'
+            _log(message % _shell_env_snapshot['shell'])
+        return _shell_env_snapshot
+
+
+def _start_shell_env_load(fresh):
+    """
+    Starts a background thread to load the shell environment, unless one is
+    already running
+
+    :param fresh:
+        If any copy of the environment memoized by shellenv should be discarded
+
+    :return:
+        The threading.Thread object loading the environment. The .result
+        attribute is a dict that will have the key "changed" set once the
+        environment has been loaded.
+    """
+
+    global _shell_env_refresh_thread
+
+    settings = _shell_env_settings()
+    with _shell_env_lock:
+        thread = _shell_env_refresh_thread
+        if thread is None or not thread.is_alive():
+            if fresh and _on_main_thread():
+                _reload_shellenv()
+                fresh = False
+            result = {}
+            thread = threading.Thread(target=_refresh_shell_env, args=(result, fresh, settings))
+            thread.daemon = True
+            thread.result = result
+            _shell_env_refresh_thread = thread
+            thread.start()
+    return thread
+
+
+def _refresh_shell_env(result, fresh, settings):
+    """
+    Loads the shell environment and swaps it in place of the current one.
+    Runs in a background thread started by _start_shell_env_load().
+
+    :param result:
+        A dict to store the key "changed" in, with a boolean value
+
+    :param fresh:
+        If any copy of the environment memoized by shellenv should be discarded
+
+    :param settings:
+        A dict of the shell env settings from _shell_env_settings()
+    """
+
+    global _shell_env_snapshot
+
+    try:
+        snapshot = _load_shell_env(fresh, settings)
+    except (Exception) as e:
+        _log('error loading the shell environment - %s' % str_cls(e))
+        return
+
+    with _shell_env_lock:
+        # A load that was abandoned by _reset_state() must not replace the
+        # environment loaded after it
+        if threading.current_thread() is not _shell_env_refresh_thread:
+            return
+        old_snapshot = _shell_env_snapshot
+        _shell_env_snapshot = snapshot
+
+    changed = old_snapshot is None or old_snapshot['env'] != snapshot['env'] \
+        or old_snapshot['shell'] != snapshot['shell']
+    if changed and old_snapshot is not None:
+        _shell_env_changed(old_snapshot, snapshot)
+    result['changed'] = changed
+
+    _persist_shell_env(snapshot)
+
+
+def _shell_env_changed(old_snapshot, snapshot):
+    """
+    Discards cached data that was derived from the previous shell environment
+
+    :param old_snapshot:
+        The previous snapshot dict of the shell environment
+
+    :param snapshot:
+        The new snapshot dict of the shell environment
+    """
+
+    _package_graphs.clear()
+    _bump_stamp('shell')
+
+    if old_snapshot['shell'] != snapshot['shell']:
+        _invalidate_env(None)
+        return
+    old_env = old_snapshot['env']
+    env = snapshot['env']
+    names = [name for name in set(old_env) | set(env) if old_env.get(name) != env.get(name)]
+    _invalidate_env(names)
+
+
+def _shell_env_settings():
+    """
+    Reads the settings controlling the loading of the shell environment. When
+    called off of the UI thread, the settings from the current snapshot are
+    used.
+
+    :return:
+        A dict with the keys "interval" and "timeout", each None or a number of
+        seconds, and "timeout_set", a boolean - if the "shell_timeout" setting
+        is set. Off of the UI thread, blocking is harmless, so "timeout_set" is
+        always True.
+    """
+
+    if not _on_main_thread():
+        snapshot = _shell_env_snapshot
+        if snapshot is None:
+            return {'interval': None, 'timeout': _SHELL_DEFAULT_TIMEOUT, 'timeout_set': True}
+        return {'interval': snapshot['interval'], 'timeout': snapshot['timeout'], 'timeout_set': True}
+
+    interval = _package_setting('shell_env_refresh_interval')
+    if not isinstance(interval, (int, float)) or interval <= 0:
+        interval = None
+
+    timeout = _package_setting('shell_timeout')
+    timeout_set = timeout is not None
+    if not timeout_set:
+        timeout = _SHELL_DEFAULT_TIMEOUT
+    if not isinstance(timeout, (int, float)) or timeout <= 0:
+        timeout = None
+
+    return {'interval': interval, 'timeout': timeout, 'timeout_set': timeout_set}
+
+
+def _load_shell_env(fresh, settings):
+    """
+    Runs the user's login shell via shellenv and builds a snapshot of the result
+
+    :param fresh:
+        If any copy of the environment memoized by shellenv should be
+        discarded. Since other code may be using shellenv, this is done on
+        the UI thread, which is waited for.
+
+    :param settings:
+        A dict of the shell env settings from _shell_env_settings()
+
+    :return:
+        A snapshot dict with the keys "shell", "env", "layer",
+        "subprocess_env", "loaded", "interval" and "timeout"
+    """
+
+    if fresh and isinstance(shellenv, types.ModuleType):
+        reloaded = threading.Event()
+
+        def reload_on_main_thread():
+            try:
+                _reload_shellenv()
+            finally:
+                reloaded.set()
+
+        sublime.set_timeout(reload_on_main_thread, 0)
+        reloaded.wait()
+
+    with _span('shellenv.get_env'):
+        shell, env = shellenv.get_env()
+        _, encoded_env = shellenv.get_env(for_subprocess=True)
+
+    env = dict(env)
+    return {
+        'shell': shell,
+        'env': env,
+        'layer': _SettingsLayer(shell, 'shell', raw=env),
+        'subprocess_env': dict(encoded_env),
+        'loaded': time.time(),
+        'interval': settings['interval'],
+        'timeout': settings['timeout'],
+    }
+
+
+def _fallback_shell_env(settings, last_known):
+    """
+    Builds a snapshot to use when the login shell could not be run in time,
+    from the last environment persisted to disk, or the environment of the
+    Sublime Text process
+
+    :param settings:
+        A dict of the shell env settings from _shell_env_settings()
+
+    :param last_known:
+        None, or a two-element tuple from _read_shell_env()
+
+    :return:
+        A snapshot dict, where the "shell" key describes the fallback used
+    """
+
+    env = {}
+    for name, value in os.environ.items():
+        if isinstance(name, bytes):
+            name = name.decode('utf-8', 'replace')
+            value = value.decode('utf-8', 'replace')
+        env[name] = value
+
+    # Only PATH and the GO* variables are persisted, so the rest of the
+    # environment comes from the Sublime Text process either way
+    if last_known is not None:
+        shell = '%s (last known environment)' % last_known[0]
+        env.update(last_known[1])
+    else:
+        shell = 'Sublime Text environment'
+
+    subprocess_env = {}
+    for name, value in env.items():
+        subprocess_env[shellenv.env_encode(name)] = shellenv.env_encode(value)
+
+    return {
+        'shell': shell,
+        'env': env,
+        'layer': _SettingsLayer(shell, 'shell', raw=env),
+        'subprocess_env': subprocess_env,
+        'loaded': time.time(),
+        'interval': settings['interval'],
+        'timeout': settings['timeout'],
+    }
+
+
+def _shell_env_file():
+    """
+    :return:
+        None if the shell environment should not be persisted, otherwise a
+        unicode string of the path to the file to save it in
+    """
+
+    # On ST2 there is no per-user cache folder, and a file at a predictable
+    # path in the shared temp folder could be planted by another user
+    if not hasattr(sublime, 'cache_path'):
+        return None
+    return os.path.join(_cache_dir('shell'), 'env.json')
+
+
+def _read_shell_env():
+    """
+    Reads the last known shell environment persisted by _persist_shell_env().
+    The file is ignored unless it is a regular file owned by the current user.
+
+    :return:
+        None, or a two-element tuple of (unicode string shell, dict of
+        environment variables)
+    """
+
+    path = _shell_env_file()
+    if path is None:
+        return None
+
+    try:
+        info = os.lstat(path)
+        if not stat.S_ISREG(info.st_mode):
+            return None
+        if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+            return None
+        with open(path, 'rb') as f:
+            data = json.loads(f.read().decode('utf-8'))
+        shell = data['shell']
+        env = data['env']
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        return None
+
+    if not isinstance(shell, str_cls) or not isinstance(env, dict):
+        return None
+    return (shell, env)
+
+
+def _persist_shell_env(snapshot):
+    """
+    Saves the PATH and GO* variables of the shell environment to disk so they
+    may be used if the login shell times out in a future session
+
+    :param snapshot:
+        A snapshot dict from _load_shell_env()
+    """
+
+    path = _shell_env_file()
+    if path is None:
+        return
+
+    env = {}
+    for name, value in snapshot['env'].items():
+        if name in _PERSISTED_ENV_VARS or name.startswith(_PERSISTED_ENV_PREFIX):
+            env[name] = value
+    data = json.dumps({'shell': snapshot['shell'], 'env': env}).encode('utf-8')
+    temp_path = path + '.tmp'
+    try:
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_path, path)
+    except (IOError, OSError) as e:
+        _log('unable to save the shell environment to "%s" - %s' % (path, str_cls(e)))
+
+
+def _reload_shellenv():
+    """
+    Reloads the shellenv modules, since shellenv memoizes the environment for
+    the life of the process and the login shell must be run again. Must be
+    called on the UI thread, so that the reload does not race with the UI
+    thread calling shellenv.env_encode() or shellenv.path_encode().
+    """
+
+    if not isinstance(shellenv, types.ModuleType):
+        return
+    for module_name in sorted(sys.modules.keys(), reverse=True):
+        module = sys.modules[module_name]
+        if module is not None and module_name.startswith('shellenv.'):
+            _reload(module)
+    _reload(shellenv)
+
+
+def _reload(module):
+    """
+    Re-executes the code of a module
+
+    :param module:
+        The module object to reload
+    """
+
+    if sys.version_info >= (3, 4):
+        import importlib
+        importlib.reload(module)
+    elif sys.version_info >= (3,):
+        import imp
+        imp.reload(module)
+    else:
+        reload(module)  # noqa
+
+
+def _reset_state():
+    """
+    Discards all cached state. Used by the test suite to isolate tests from
+    one another.
+    """
+
+    global _shell_env_snapshot, _shell_env_refresh_thread, _package_settings_observed
+
+    _shell_env_snapshot = None
+    _shell_env_refresh_thread = None
+    stop_tool_servers()
+    with _log_lock:
+        _log_entries.clear()
+        _log_index.clear()
+        _log_rate.update({'second': 0, 'printed': 0, 'suppressed': 0})
+    _package_settings_cache.clear()
+    _package_settings_observed = False
+    _global_layers[:] = []
+    _project_layers.clear()
+    _view_attributes.clear()
+    _auto_gopaths.clear()
+    _executable_statuses.clear()
+    _observed_views.clear()
+    _budget_stats.clear()
+    _budget_results.clear()
+    _memory_results.clear()
+    _resolved_variants.clear()
+    _disk_results_size[0] = None
+    _package_graphs.clear()
+    with _resolved_lock:
+        _resolved_results.clear()
+        _resolved_dependents.clear()
+    _config_stamps.clear()
+    _slow_dirs.clear()
+    if _probe_pool:
+        _probe_pool.pop().shutdown()
+    _profile_session.update({
+        'profiler': None,
+        'calls': 0,
+        'started': None,
+        'deadline': None,
+        'setting': None,
+        'limits': _NO_VALUE,
+        'depth': 0,
+        'finished': False,
+    })
+
+
+def _package_setting(name, default=None):
+    """
+    Reads a setting from golang.sublime-settings that controls the behavior
+    of golangconfig itself. Values are cached until Sublime Text reports that
+    the settings changed, to avoid an IPC call per lookup in ST3. In ST2,
+    uncached settings read off of the UI thread use the default.
+
+    :param name:
+        A unicode string of the setting name
+
+    :param default:
+        The value to return if the setting is not set
+
+    :return:
+        The setting value
+    """
+
+    if name in _package_settings_cache:
+        value = _package_settings_cache[name]
+        return default if value is None else value
+
+    if not _API_THREADSAFE and not _on_main_thread():
+        return default
+
+    st_settings = sublime.load_settings('golang.sublime-settings')
+    value = st_settings.get(name)
+
+    if _observe_package_settings(st_settings):
+        _package_settings_cache[name] = value
+
+    return default if value is None else value
+
+
+def _observe_package_settings(st_settings):
+    """
+    Registers a callback to be notified when golang.sublime-settings changes,
+    so that values read from it may be cached
+
+    :param st_settings:
+        The sublime.Settings object for golang.sublime-settings
+
+    :return:
+        A boolean - if changes are being observed, and thus caching is safe
+    """
+
+    global _package_settings_observed
+
+    if not _package_settings_observed and hasattr(st_settings, 'add_on_change'):
+        st_settings.add_on_change('golangconfig', _package_settings_changed)
+        _package_settings_observed = True
+    return _package_settings_observed
+
+
+def _package_settings_changed():
+    """
+    Called by Sublime Text when golang.sublime-settings is modified
+    """
+
+    _package_settings_cache.clear()
+    _profile_session['limits'] = _NO_VALUE
+    _global_layers[:] = []
+    _bump_stamp('golang.sublime-settings')
+    _invalidate_dependencies(lambda dependency: dependency == ('layer', 'golang.sublime-settings'))
+
+
+def _log(message):
+    """
+    Records a diagnostic message and prints it to the Sublime Text console,
+    unless an identical message was printed recently or too many messages
+    have been printed in the last second
+
+    :param message:
+        A unicode string of the message, without a "golangconfig: " prefix
+    """
+
+    now = time.time()
+    with _log_lock:
+        entry = _log_index.get(message)
+        if entry is not None:
+            entry['count'] += 1
+            entry['last'] = now
+            if entry['printed'] is not None and now - entry['printed'] < _LOG_DEDUPE_SECONDS:
+                return
+        else:
+            entry = {'message': message, 'count': 1, 'first': now, 'last': now, 'printed': None}
+            _log_entries.append(entry)
+            _log_index[message] = entry
+            while len(_log_entries) > _LOG_MAX_ENTRIES:
+                evicted = _log_entries.popleft()
+                del _log_index[evicted['message']]
+
+        second = int(now)
+        if _log_rate['second'] != second:
+            _log_rate['second'] = second
+            _log_rate['printed'] = 0
+        if _log_rate['printed'] >= _LOG_RATE_LIMIT:
+            _log_rate['suppressed'] += 1
+            return
+        _log_rate['printed'] += 1
+        entry['printed'] = now
+        suppressed = _log_rate['suppressed']
+        _log_rate['suppressed'] = 0
+
+    if suppressed:
+        print('golangconfig: %d messages were not printed due to rate limiting, see show_diagnostics()' % suppressed)
+    print('golangconfig: %s' % message)
@@ -61,8 +61,16 @@ def _get_func_info(docstring, def_lineno, code_lines, prefix):
          - [1] A markdown snippet of the function description
     """
 
+    # Signatures may be wrapped over multiple lines, so continuation lines
+    # are kept, with their indentation relative to the def
     definition = code_lines[def_lineno - 1]
-    definition = definition.strip().rstrip(':')
+    indent = len(definition) - len(definition.lstrip())
+    definition = definition.strip()
+    lineno = def_lineno
+    while not definition.endswith('):') and lineno < len(code_lines):
+        definition += '\n%s%s' % (prefix, code_lines[lineno][indent:].rstrip())
+        lineno += 1
+    definition = definition.rstrip(':')
 
     description = ''
     found_colon = False
@@ -0,0 +1,89 @@
+# coding: utf-8
+"""
+Benchmarks that are run from the Sublime Text console, so that the size and
+open files of the plugin_host process are accounted for:
+
+    from golangconfig.dev import benchmarks
+    benchmarks.launch()
+"""
+
+from __future__ import unicode_literals, division, absolute_import, print_function
+
+import subprocess
+import time
+
+import golangconfig
+
+
+def launch(executable_name='go', args=None, runs=50, view=None, window=None):
+    """
+    Compares the time taken to start a go executable via golangconfig.launch()
+    with passing the result of golangconfig.subprocess_info() to
+    subprocess.Popen() using its default options. Only the time until the
+    process is started is measured, not the time for it to run.
+
+    :param executable_name:
+        A unicode string of the executable to run
+
+    :param args:
+        A list of unicode strings of arguments, defaults to ["version"]
+
+    :param runs:
+        An integer of the number of times to start the executable each way
+
+    :param view:
+        A sublime.View object to use in finding project-specific settings
+
+    :param window:
+        A sublime.Window object to use in finding project-specific settings
+
+    :return:
+        A dict with the keys "popen_ms" and "launch_ms", each a float of the
+        mean number of milliseconds taken to start the process
+    """
+
+    if args is None:
+        args = ['version']
+
+    path, _ = golangconfig.subprocess_info(executable_name, [], view=view, window=window)
+
+    def popen():
+        path, env = golangconfig.subprocess_info(executable_name, [], view=view, window=window)
+        return subprocess.Popen(
+            [path] + args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env
+        )
+
+    def golangconfig_launch():
+        return golangconfig.launch(
+            executable_name,
+            args,
+            [],
+            view=view,
+            window=window,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+
+    output = {}
+    for name, start in (('popen_ms', popen), ('launch_ms', golangconfig_launch)):
+        elapsed = 0.0
+        for _ in range(runs):
+            before = time.time()
+            proc = start()
+            elapsed += time.time() - before
+            proc.communicate()
+        output[name] = elapsed * 1000 / runs
+
+    print(
+        'golangconfig: started "%s" %d times - subprocess.Popen() %.2fms, golangconfig.launch() %.2fms' %
+        (
+            path,
+            runs,
+            output['popen_ms'],
+            output['launch_ms']
+        )
+    )
+    return output
@@ -3,9 +3,13 @@ from __future__ import unicode_literals, division, absolute_import, print_functi
 
 import os
 import sys
+import copy
 import shutil
 import locale
 import stat
+import time
+import tempfile
+import itertools
 
 import golangconfig
 
@@ -17,14 +21,25 @@ else:
     str_cls = str
 
 
+_mock_ids = itertools.count(1)
+
+
 class SublimeViewMock():
 
     _settings = None
     _context = None
+    _window = None
+    _file_name = None
+    _id = None
 
-    def __init__(self, settings, context):
+    def __init__(self, settings, context, window=None):
         self._settings = settings
         self._context = context
+        self._window = window
+        self._id = next(_mock_ids)
+
+    def id(self):
+        return self._id
 
     def settings(self):
         if self.window():
@@ -42,28 +57,62 @@ class SublimeViewMock():
         return {'golang': merged_golang_settings}
 
     def window(self):
+        if self._window is not None:
+            return self._window
         return self._context.window
 
+    def file_name(self):
+        return self._file_name
+
 
 class SublimeWindowMock():
 
     _settings = None
     _context = None
+    _id = None
 
     def __init__(self, settings, context):
         self._settings = settings
         self._context = context
+        self._id = next(_mock_ids)
+
+    def id(self):
+        return self._id
 
     def project_data(self):
         if self._settings is None:
             return None
-        return {'settings': {'golang': self._settings}}
+        # Sublime Text decodes a new copy of the project data on every call
+        return {'settings': {'golang': copy.deepcopy(self._settings)}}
 
     def active_view(self):
         if self._context.view:
             return self._context.view
         return SublimeViewMock({}, self._context)
 
+    def views(self):
+        view = self._context.view
+        if view is not None and view.window() is self:
+            return [view]
+        return []
+
+    def create_output_panel(self, name):
+        panel = OutputPanelMock()
+        self._context.panels[name] = panel
+        return panel
+
+    def run_command(self, command, args=None):
+        self._context.commands.append((command, args))
+
+
+class OutputPanelMock():
+
+    text = ''
+
+    def run_command(self, command, args=None):
+        if command == 'append':
+            self.text += args['characters']
+
 
 class ShellenvMock():
 
@@ -107,53 +156,162 @@ class ShellenvMock():
         return value.decode(self._fs_encoding)
 
 
+class MemoryFilesystem():
+
+    """
+    An in-memory replacement for golangconfig._fs. Each operation sleeps for
+    the latency, in seconds, to simulate slow network or virtualized
+    filesystems, and is counted in .operations. Paths within a directory
+    passed to add_slow_dir() sleep for the delay given instead.
+    """
+
+    latency = 0
+    operations = 0
+    _files = None
+    _dirs = None
+    _slow_dirs = None
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self._files = {}
+        self._dirs = set()
+        self._slow_dirs = {}
+
+    def add_dir(self, path):
+        path = os.path.normpath(path)
+        while path not in self._dirs:
+            self._dirs.add(path)
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+
+    def add_file(self, path, executable=False):
+        path = os.path.normpath(path)
+        self.add_dir(os.path.dirname(path))
+        self._files[path] = executable
+
+    def add_slow_dir(self, path, delay):
+        self._slow_dirs[os.path.normpath(path)] = delay
+
+    def _operation(self, path):
+        self.operations += 1
+        path = os.path.normpath(path)
+        delay = self._slow_dirs.get(path, self._slow_dirs.get(os.path.dirname(path), self.latency))
+        if delay:
+            time.sleep(delay)
+        return path
+
+    def exists(self, path):
+        path = self._operation(path)
+        return path in self._files or path in self._dirs
+
+    def is_executable(self, path):
+        path = self._operation(path)
+        return self._files.get(path, False)
+
+
 class SublimeSettingsMock():
 
     _values = None
+    _callbacks = None
+    get_calls = 0
 
     def __init__(self, values):
         self._values = values
+        self._callbacks = {}
 
     def get(self, name, default=None):
+        self.get_calls += 1
         return self._values.get(name, default)
 
+    def set(self, name, value):
+        self._values[name] = value
+        for callback in list(self._callbacks.values()):
+            callback()
+
+    def add_on_change(self, key, callback):
+        self._callbacks[key] = callback
+
+    def clear_on_change(self, key):
+        self._callbacks.pop(key, None)
+
 
 class SublimeMock():
 
     _settings = None
+    _cache_path = None
+    _timeouts = None
     View = SublimeViewMock
     Window = SublimeWindowMock
 
-    def __init__(self, settings):
+    def __init__(self, settings, cache_path):
         self._settings = SublimeSettingsMock(settings)
+        self._cache_path = cache_path
+        self._timeouts = []
+
+    def set_timeout(self, callback, delay):
+        self._timeouts.append(callback)
+
+    def run_timeouts(self):
+        """
+        Runs the callbacks passed to set_timeout(), as the UI thread would
+
+        :return:
+            An integer of the number of callbacks run
+        """
+
+        # Callbacks may be added by other threads while running
+        num_run = 0
+        while self._timeouts:
+            self._timeouts.pop(0)()
+            num_run += 1
+        return num_run
 
     def load_settings(self, basename):
         return self._settings
 
+    def cache_path(self):
+        return self._cache_path
+
 
 class GolangConfigMock():
 
     _shellenv = None
     _sublime = None
+    _fs = None
     _stdout = None
 
     _tempdir = None
 
+    panels = None
+    commands = None
+
     _shell = None
     _env = None
     _view_settings = None
     _window_settings = None
     _sublime_settings = None
+    _view = None
+    _window = None
+
+    # A MemoryFilesystem used in place of the real filesystem, unless the
+    # test requires real files
+    fs = None
 
-    def __init__(self, shell, env, view_settings, window_settings, sublime_settings):
+    def __init__(self, shell, env, view_settings, window_settings, sublime_settings, real_fs=False):
         self._shell = shell
         self._env = env
         self._view_settings = view_settings
         self._window_settings = window_settings
         self._sublime_settings = sublime_settings
-        self._tempdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mock_fs')
-        if not os.path.exists(self._tempdir):
-            os.mkdir(self._tempdir)
+        self.panels = {}
+        self.commands = []
+        # Each context has its own directory so tests may run in parallel
+        self._tempdir = tempfile.mkdtemp(prefix='golangconfig-')
+        if not real_fs:
+            self.fs = MemoryFilesystem()
+            self.fs.add_dir(self._tempdir)
 
     def replace_tempdir_env(self):
         for key in self._env:
@@ -190,6 +348,10 @@ class GolangConfigMock():
                         )
 
     def make_executable_files(self, executable_temp_files):
+        if self.fs:
+            for temp_file in executable_temp_files:
+                self.fs.add_file(os.path.join(self.tempdir, temp_file), executable=True)
+            return
         self.make_files(executable_temp_files)
         for temp_file in executable_temp_files:
             temp_file_path = os.path.join(self.tempdir, temp_file)
@@ -197,6 +359,10 @@ class GolangConfigMock():
             os.chmod(temp_file_path, st.st_mode | stat.S_IEXEC)
 
     def make_files(self, temp_files):
+        if self.fs:
+            for temp_file in temp_files:
+                self.fs.add_file(os.path.join(self.tempdir, temp_file))
+            return
         for temp_file in temp_files:
             temp_file_path = os.path.join(self.tempdir, temp_file)
             temp_file_dir = os.path.dirname(temp_file_path)
@@ -206,30 +372,58 @@ class GolangConfigMock():
                 pass
 
     def make_dirs(self, temp_dirs):
+        if self.fs:
+            for temp_dir in temp_dirs:
+                self.fs.add_dir(os.path.join(self.tempdir, temp_dir))
+            return
         for temp_dir in temp_dirs:
             temp_dir_path = os.path.join(self.tempdir, temp_dir)
             if not os.path.exists(temp_dir_path):
                 os.makedirs(temp_dir_path)
 
+    def make_windows(self, num_windows, num_views, window_settings):
+        """
+        Creates additional windows, each with views, for tests that simulate
+        large sessions
+
+        :return:
+            A list of two-element tuples of (window, list of views)
+        """
+
+        windows = []
+        for _ in range(num_windows):
+            window = SublimeWindowMock(dict(window_settings), self)
+            views = [SublimeViewMock({}, self, window) for _ in range(num_views)]
+            windows.append((window, views))
+        return windows
+
     @property
     def view(self):
         if self._view_settings is None:
             return None
-        return SublimeViewMock(self._view_settings, self)
+        if self._view is None:
+            self._view = SublimeViewMock(self._view_settings, self)
+        return self._view
 
     @property
     def window(self):
-        return SublimeWindowMock(self._window_settings, self)
+        if self._window is None:
+            self._window = SublimeWindowMock(self._window_settings, self)
+        return self._window
 
     @property
     def tempdir(self):
         return self._tempdir
 
     def __enter__(self):
+        golangconfig._reset_state()
         self._shellenv = golangconfig.shellenv
         golangconfig.shellenv = ShellenvMock(self._shell, self._env)
         self._sublime = golangconfig.sublime
-        golangconfig.sublime = SublimeMock(self._sublime_settings)
+        golangconfig.sublime = SublimeMock(self._sublime_settings, os.path.join(self._tempdir, 'cache'))
+        self._fs = golangconfig._fs
+        if self.fs:
+            golangconfig._fs = self.fs
         self._stdout = sys.stdout
         sys.stdout = StringIO()
         return self
@@ -237,6 +431,8 @@ class GolangConfigMock():
     def __exit__(self, exc_type, exc_value, traceback):
         golangconfig.shellenv = self._shellenv
         golangconfig.sublime = self._sublime
+        golangconfig._fs = self._fs
+        golangconfig._reset_state()
         temp_stdout = sys.stdout
         sys.stdout = self._stdout
         print(temp_stdout.getvalue(), end='')
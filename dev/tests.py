@@ -2,9 +2,15 @@
 from __future__ import unicode_literals, division, absolute_import, print_function
 
 import unittest
+import json
+import pickle
 
 import sys
 import os
+import time
+import threading
+import subprocess
+import types
 
 if sys.version_info < (3,):
     str_cls = unicode  # noqa
@@ -13,10 +19,71 @@ else:
 
 import shellenv
 import golangconfig
-from .mocks import GolangConfigMock
+from .mocks import GolangConfigMock, SublimeSettingsMock
 from .unittest_data import data, data_class
 
 
+# A stand-in for "go list -e -json" that derives import paths from directory
+# names and imports from lines containing a quoted import path
+FAKE_GO_LIST = """#!%s
+import json, os, re, sys
+patterns = sys.argv[4:]
+with open(%r, 'a') as f:
+    f.write(' '.join(patterns) + '\\n')
+for pattern in patterns:
+    dir_ = os.path.normpath(os.path.join(os.getcwd(), pattern))
+    imports = set()
+    for name in os.listdir(dir_):
+        if name.endswith('.go'):
+            with open(os.path.join(dir_, name)) as g:
+                imports.update(re.findall('import "([^"]+)"', g.read()))
+    rel = os.path.relpath(dir_, os.getcwd()).replace(os.sep, '/')
+    print(json.dumps({'Dir': dir_, 'ImportPath': 'example.com/m/' + rel, 'Imports': sorted(imports)}, indent=1))
+"""
+
+
+# A stand-in for "gofmt -l [-w]" that treats files containing "  " as
+# unformatted and files without a package clause as having a syntax error
+FAKE_GOFMT = """#!%s
+import sys
+write = '-w' in sys.argv
+paths = [a for a in sys.argv[1:] if not a.startswith('-')]
+with open(%r, 'a') as f:
+    f.write(' '.join(paths) + '\\n')
+status = 0
+for path in paths:
+    with open(path) as f:
+        source = f.read()
+    if not source.startswith('package'):
+        sys.stderr.write('%%s:1:1: expected \\'package\\', found x\\n' %% path)
+        status = 2
+    elif '  ' in source:
+        sys.stdout.write(path + '\\n')
+        if write:
+            with open(path, 'w') as f:
+                f.write(source.replace('  ', ' '))
+sys.exit(status)
+"""
+
+
+class BlockingShellenv():
+
+    """
+    Wraps a ShellenvMock so that loading the environment blocks until released
+    """
+
+    def __init__(self, shellenv_mock):
+        self._shellenv = shellenv_mock
+        self.release = threading.Event()
+
+    def get_env(self, for_subprocess=False):
+        self.release.wait()
+        return self._shellenv.get_env(for_subprocess=for_subprocess)
+
+    def __getattr__(self, name):
+        return getattr(self._shellenv, name)
+
+
 class CustomString():
 
     value = None
@@ -483,10 +550,28 @@ class GolangconfigTests(unittest.TestCase):
     @data('setting_value_gopath_data', True)
     def setting_value_gopath(self, shell, env, view_settings, window_settings, sublime_settings, setting, result):
 
-        with GolangConfigMock(shell, env, view_settings, window_settings, sublime_settings) as mock_context:
+        # The data uses the home directory, so the real filesystem is needed
+        mock_context = GolangConfigMock(shell, env, view_settings, window_settings, sublime_settings, real_fs=True)
+        with mock_context:
             self.assertEquals(result, golangconfig.setting_value(setting, mock_context.view, mock_context.window))
             self.assertEqual('', sys.stdout.getvalue())
 
+    @staticmethod
+    def setting_value_null_data():
+        return (
+            ('gopath_view', {'GOPATH': None}, None, 'GOPATH', golangconfig.GoPathNotFoundError),
+            ('gopath_window', None, {'GOPATH': None}, 'GOPATH', golangconfig.GoPathNotFoundError),
+            ('goroot_view', {'GOROOT': None}, None, 'GOROOT', golangconfig.GoRootNotFoundError),
+            ('goroot_window', None, {'GOROOT': None}, 'GOROOT', golangconfig.GoRootNotFoundError),
+        )
+
+    @data('setting_value_null_data', True)
+    def setting_value_null(self, view_settings, window_settings, setting, exception_class):
+        with GolangConfigMock('/bin/bash', {'PATH': '/bin'}, view_settings, window_settings, {}) as mock_context:
+            def do_test():
+                golangconfig.setting_value(setting, mock_context.view, mock_context.window)
+            self.assertRaises(exception_class, do_test)
+
     def test_setting_value_bytes_name(self):
         shell = '/bin/bash'
         env = {
@@ -597,3 +682,1478 @@ class GolangconfigTests(unittest.TestCase):
                 window=mock_context.window
             )
             self.assertTrue('which is not inside of the GOROOT' in sys.stdout.getvalue())
+
+    def test_subprocess_info_matrix(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+            'GOPATH': '{tempdir}workspace',
+            'CGO_ENABLED': '1',
+        }
+        with GolangConfigMock(shell, env, None, None, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go'])
+            mock_context.make_dirs(['workspace'])
+
+            targets = [
+                ('linux', 'amd64'),
+                ('windows', '386', {'CGO_ENABLED': None}),
+                ('linux', 'arm', {'GOARM': '7'}),
+            ]
+            path, envs = golangconfig.subprocess_info_matrix(
+                'go',
+                ['GOPATH'],
+                targets,
+                view=mock_context.view,
+                window=mock_context.window
+            )
+
+            self.assertEqual(shellenv.path_encode(os.path.join(mock_context.tempdir, 'bin', 'go')), path)
+            self.assertEqual(3, len(envs))
+            goos = shellenv.env_encode('GOOS')
+            goarch = shellenv.env_encode('GOARCH')
+            self.assertEqual(shellenv.env_encode('linux'), envs[0][goos])
+            self.assertEqual(shellenv.env_encode('amd64'), envs[0][goarch])
+            self.assertEqual(shellenv.env_encode('1'), envs[0][shellenv.env_encode('CGO_ENABLED')])
+            self.assertEqual(shellenv.env_encode('386'), envs[1][goarch])
+            self.assertTrue(shellenv.env_encode('CGO_ENABLED') not in envs[1])
+            self.assertEqual(shellenv.env_encode('7'), envs[2][shellenv.env_encode('GOARM')])
+            self.assertTrue(shellenv.env_encode('GOARM') not in envs[0])
+
+    def test_subprocess_info_matrix_bad_target(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+        }
+        with GolangConfigMock(shell, env, None, None, {}) as mock_context:
+            def do_test():
+                golangconfig.subprocess_info_matrix('go', [], [('linux',)], window=mock_context.window)
+            self.assertRaises(TypeError, do_test)
+
+    def test_config_snapshot(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+            'GOPATH': '{tempdir}workspace',
+        }
+        with GolangConfigMock(shell, env, None, None, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go'])
+            mock_context.make_dirs(['workspace'])
+
+            data = golangconfig.config_snapshot(
+                ['go', 'gofmt'],
+                ['GOPATH'],
+                optional_vars=['GOOS'],
+                view=mock_context.view,
+                window=mock_context.window
+            )
+            snapshot = golangconfig.ConfigSnapshot.from_json(golangconfig.ConfigSnapshot(data).to_json())
+
+            go_path = os.path.join(mock_context.tempdir, 'bin', 'go')
+            self.assertEqual((go_path, shell), snapshot.executable_path('go'))
+            self.assertEqual((None, None), snapshot.executable_path('gofmt'))
+            self.assertEqual((None, None), snapshot.setting_value('GOOS'))
+            self.assertEqual(
+                (os.path.join(mock_context.tempdir, 'workspace'), shell),
+                snapshot.setting_value('GOPATH')
+            )
+
+            path, subprocess_env = snapshot.subprocess_info('go', ['GOPATH'])
+            self.assertEqual(shellenv.path_encode(go_path), path)
+            self.assertEqual(
+                shellenv.env_encode(os.path.join(mock_context.tempdir, 'workspace')),
+                subprocess_env[shellenv.env_encode('GOPATH')]
+            )
+            self.assertRaises(golangconfig.ExecutableError, lambda: snapshot.subprocess_info('gofmt'))
+            self.assertRaises(golangconfig.EnvVarError, lambda: snapshot.subprocess_info('go', ['GOROOT']))
+
+            data['version'] = 0
+            self.assertRaises(ValueError, lambda: golangconfig.ConfigSnapshot(data))
+
+    def test_cached_output(self):
+        with GolangConfigMock('/bin/bash', {'PATH': '/bin'}, None, None, {}, real_fs=True) as mock_context:
+            mock_context.make_files(['input.go', 'count.txt'])
+            input_path = os.path.join(mock_context.tempdir, 'input.go')
+            count_path = os.path.join(mock_context.tempdir, 'count.txt')
+            script = 'import sys; open(sys.argv[1], "a").write("x"); sys.stdout.write(open(sys.argv[2]).read())'
+            args = ['-c', script, count_path, input_path]
+
+            with open(input_path, 'wb') as f:
+                f.write(b'package main\n')
+
+            def run():
+                return golangconfig.cached_output(
+                    sys.executable,
+                    dict(os.environ),
+                    args,
+                    input_files=[input_path]
+                )
+
+            self.assertEqual((0, b'package main\n', b''), run())
+            self.assertEqual((0, b'package main\n', b''), run())
+            with open(count_path, 'rb') as f:
+                self.assertEqual(b'x', f.read())
+
+            # The on-disk tier is used when the in-memory tier does not have the result
+            golangconfig._memory_results.clear()
+            self.assertEqual((0, b'package main\n', b''), run())
+            with open(count_path, 'rb') as f:
+                self.assertEqual(b'x', f.read())
+
+            with open(input_path, 'wb') as f:
+                f.write(b'package foo\n')
+            self.assertEqual((0, b'package foo\n', b''), run())
+            with open(count_path, 'rb') as f:
+                self.assertEqual(b'xx', f.read())
+
+            # The size of the on-disk tier is tracked without listing the folder
+            cache_dir = golangconfig._cache_dir('results')
+            sizes = [os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir)]
+            self.assertEqual(2, len(sizes))
+            self.assertEqual(sum(sizes), golangconfig._disk_results_size[0])
+
+            # Once over the cap, the least recently used results are evicted
+            original_bytes = golangconfig._RESULT_DISK_BYTES
+            golangconfig._RESULT_DISK_BYTES = max(sizes) + 1
+            try:
+                with open(input_path, 'wb') as f:
+                    f.write(b'package bar\n')
+                self.assertEqual((0, b'package bar\n', b''), run())
+            finally:
+                golangconfig._RESULT_DISK_BYTES = original_bytes
+            self.assertEqual(1, len(os.listdir(cache_dir)))
+
+    @unittest.skipIf(sys.platform == 'win32', 'the fake go executable is a shebang script')
+    def test_launch(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+            'GOPATH': '{tempdir}workspace',
+        }
+        with GolangConfigMock(shell, env, None, None, {}, real_fs=True) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go'])
+            mock_context.make_dirs(['workspace'])
+            tempdir = mock_context.tempdir
+            with open(os.path.join(tempdir, 'bin', 'go'), 'w') as f:
+                f.write(
+                    '#!%s\nimport os, sys\n'
+                    'sys.stdout.write("|".join([os.getcwd(), os.environ["GOPATH"]] + sys.argv[1:]))\n' %
+                    sys.executable
+                )
+
+            proc = golangconfig.launch(
+                'go',
+                ['version', '-m'],
+                ['GOPATH'],
+                window=mock_context.window,
+                cwd=tempdir,
+                stdout=subprocess.PIPE
+            )
+            stdout, _ = proc.communicate()
+            expected = [os.path.realpath(tempdir), os.path.join(tempdir, 'workspace'), 'version', '-m']
+            self.assertEqual(expected, stdout.decode('utf-8').split('|'))
+            self.assertEqual(0, proc.returncode)
+
+            with self.assertRaises(TypeError):
+                golangconfig.launch('go', 'version', [], window=mock_context.window)
+
+            # Only launch() leaves inheritable descriptors open
+            self.assertFalse('close_fds' in golangconfig._popen_options(None))
+            if sys.version_info >= (3, 4):
+                self.assertEqual(False, golangconfig._popen_options(None, spawn=True)['close_fds'])
+
+    @unittest.skipIf(sys.platform == 'win32', 'the fake gofmt executable is a shebang script')
+    def test_format_files(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+        }
+        with GolangConfigMock(shell, env, None, None, {}, real_fs=True) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/gofmt'])
+            tempdir = mock_context.tempdir
+            log_path = os.path.join(tempdir, 'gofmt.log')
+            with open(os.path.join(tempdir, 'bin', 'gofmt'), 'w') as f:
+                f.write(FAKE_GOFMT % (sys.executable, log_path))
+
+            contents = {
+                'ok.go': 'package a\n',
+                'spaces.go': 'package  a\n',
+                'broken.go': 'x\n',
+            }
+            for i in range(20):
+                contents['f%d.go' % i] = 'package a\n'
+            paths = []
+            for name, content in sorted(contents.items()):
+                path = os.path.join(tempdir, name)
+                with open(path, 'w') as f:
+                    f.write(content)
+                paths.append(path)
+
+            ok_path = os.path.join(tempdir, 'ok.go')
+            spaces_path = os.path.join(tempdir, 'spaces.go')
+            broken_path = os.path.join(tempdir, 'broken.go')
+
+            results = golangconfig.format_files(paths, window=mock_context.window)
+            self.assertEqual(sorted(paths), sorted(results.keys()))
+            self.assertEqual({'changed': False, 'errors': []}, results[ok_path])
+            self.assertEqual({'changed': True, 'errors': []}, results[spaces_path])
+            self.assertFalse(results[broken_path]['changed'])
+            self.assertEqual(1, len(results[broken_path]['errors']))
+            self.assertTrue(results[broken_path]['errors'][0].startswith(broken_path + ':1:1:'))
+
+            # Every file is passed to exactly one invocation
+            with open(log_path) as f:
+                invocations = f.read().splitlines()
+            self.assertTrue(len(invocations) <= golangconfig._cpu_count())
+            self.assertEqual(sorted(paths), sorted(' '.join(invocations).split(' ')))
+
+            finished = threading.Event()
+            callbacks = []
+
+            def callback(path, result):
+                callbacks.append((path, result))
+                if len(callbacks) == 2:
+                    finished.set()
+
+            queue = golangconfig.FormatQueue(write=True, delay=0.01)
+            queue.add(spaces_path, callback, window=mock_context.window)
+            queue.add(ok_path, callback, window=mock_context.window)
+            finished.wait(5)
+            self.assertEqual(
+                [
+                    (spaces_path, {'changed': True, 'errors': []}),
+                    (ok_path, {'changed': False, 'errors': []}),
+                ],
+                callbacks
+            )
+            with open(spaces_path) as f:
+                self.assertEqual('package a\n', f.read())
+
+            # Errors that do not mention a file are reported for every file,
+            # however the files are split into batches
+            with open(os.path.join(tempdir, 'bin', 'gofmt'), 'w') as f:
+                f.write(
+                    (FAKE_GOFMT % (sys.executable, log_path)).replace(
+                        'status = 0\n',
+                        'status = 0\nsys.stderr.write("gofmt: warning\\n")\n'
+                    )
+                )
+            golangconfig.invalidate()
+            min_batch = golangconfig._FORMAT_MIN_BATCH
+            cpu_count = golangconfig._cpu_count
+            try:
+                golangconfig._FORMAT_MIN_BATCH = 1
+                golangconfig._cpu_count = lambda: 8
+                small_batches = golangconfig.format_files(paths + [ok_path], window=mock_context.window)
+                golangconfig._FORMAT_MIN_BATCH = len(paths)
+                one_batch = golangconfig.format_files(paths, window=mock_context.window)
+            finally:
+                golangconfig._FORMAT_MIN_BATCH = min_batch
+                golangconfig._cpu_count = cpu_count
+            self.assertEqual(one_batch, small_batches)
+            self.assertEqual({'changed': False, 'errors': ['gofmt: warning']}, one_batch[ok_path])
+            self.assertEqual(2, len(one_batch[broken_path]['errors']))
+
+    @unittest.skipIf(sys.platform == 'win32', 'the fake gopls executable is a shebang script')
+    def test_tool_server(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+        }
+        with GolangConfigMock(shell, env, None, {}, {}, real_fs=True) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/gopls'])
+            tempdir = mock_context.tempdir
+            window = mock_context.window
+            with open(os.path.join(tempdir, 'bin', 'gopls'), 'w') as f:
+                f.write(
+                    '#!%s\nimport os, sys\n'
+                    'for line in iter(sys.stdin.readline, ""):\n'
+                    '    sys.stdout.write("%%s %%s %%s" %% (os.getpid(), os.environ.get("GOFLAGS"), line))\n'
+                    '    sys.stdout.flush()\n' %
+                    sys.executable
+                )
+
+            def request(server):
+                server.process.stdin.write(b'ping\n')
+                server.process.stdin.flush()
+                return server.process.stdout.readline().decode('utf-8').split()
+
+            def get_server():
+                return golangconfig.tool_server('gopls', ['serve'], tempdir, optional_vars=['GOFLAGS'], window=window)
+
+            server = get_server()
+            self.assertTrue(server.running)
+            pid, goflags, _ = request(server)
+            self.assertEqual('None', goflags)
+
+            # The process is shared until the configuration changes
+            self.assertTrue(server is get_server())
+            window._settings = {'GOFLAGS': '-mod=mod'}
+            new_server = get_server()
+            self.assertFalse(server is new_server)
+            self.assertFalse(server.running)
+            new_pid, goflags, _ = request(new_server)
+            self.assertNotEqual(pid, new_pid)
+            self.assertEqual('-mod=mod', goflags)
+
+            # A process that exited is restarted, closing the pipes of the old one
+            old_process = new_server.process
+            old_process.kill()
+            old_process.wait()
+            restarted = get_server()
+            self.assertTrue(restarted is new_server)
+            self.assertTrue(restarted.running)
+            self.assertTrue(old_process.stdin.closed)
+            self.assertTrue(old_process.stdout.closed)
+            self.assertTrue(old_process.stderr.closed)
+
+            # Windows with different configurations for the same root each
+            # keep their own process
+            other_window = golangconfig.sublime.Window({}, mock_context)
+            other_server = golangconfig.tool_server(
+                'gopls',
+                ['serve'],
+                tempdir,
+                optional_vars=['GOFLAGS'],
+                window=other_window
+            )
+            self.assertFalse(other_server is restarted)
+            self.assertTrue(restarted is get_server())
+            self.assertTrue(other_server.running)
+            self.assertTrue(restarted.running)
+            other_server.stop()
+            self.assertTrue(other_server.process is None)
+
+            self.assertEqual(0, golangconfig._stop_idle_tool_servers())
+            restarted.last_used -= golangconfig._TOOL_SERVER_IDLE_SECONDS + 1
+            other_server.last_used -= golangconfig._TOOL_SERVER_IDLE_SECONDS + 1
+            self.assertEqual(2, golangconfig._stop_idle_tool_servers())
+            self.assertFalse(restarted.running)
+            self.assertEqual({}, golangconfig._tool_slots)
+
+            with self.assertRaises(TypeError):
+                golangconfig.tool_server('gopls', 'serve', tempdir, window=window)
+
+    def test_diagnostics_parser(self):
+        root = os.path.join(os.sep, 'work', 'mod')
+        parser = golangconfig.DiagnosticsParser(root)
+        output = (
+            '# example.com/m/a\n'
+            './a/a.go:3:2: undefined: x\n'
+            'a/b.go:10:5: cannot use y (variable of type int) as string value\r\n'
+            '\thave int\n'
+            '\twant string\n'
+            '    a/a_test.go:12: got \u2713\n'
+            '%s:1: expected package\n' % os.path.join(root, 'c.go')
+        ).encode('utf-8')
+
+        diagnostics = []
+        # Chunks split lines and multi-byte characters
+        for i in range(0, len(output), 7):
+            diagnostics.extend(parser.feed(output[i:i + 7]))
+        self.assertEqual(3, len(diagnostics))
+        diagnostics.extend(parser.close())
+
+        self.assertEqual(
+            [
+                golangconfig.Diagnostic(os.path.join(root, 'a', 'a.go'), 3, 2, 'undefined: x'),
+                golangconfig.Diagnostic(
+                    os.path.join(root, 'a', 'b.go'),
+                    10,
+                    5,
+                    'cannot use y (variable of type int) as string value\nhave int\nwant string'
+                ),
+                golangconfig.Diagnostic(os.path.join(root, 'a', 'a_test.go'), 12, None, 'got \u2713'),
+                golangconfig.Diagnostic(os.path.join(root, 'c.go'), 1, None, 'expected package'),
+            ],
+            diagnostics
+        )
+
+        with self.assertRaises(TypeError):
+            parser.feed('a.go:1: text')
+
+    @unittest.skipIf(sys.platform == 'win32', 'the fake go executable is a shebang script')
+    def test_stream_diagnostics(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+        }
+        with GolangConfigMock(shell, env, {}, None, {}, real_fs=True) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go'])
+            tempdir = mock_context.tempdir
+            with open(os.path.join(tempdir, 'bin', 'go'), 'w') as f:
+                f.write(
+                    '#!%s\nimport sys, time\n'
+                    'for i in range(1, 4):\n'
+                    '    sys.stdout.write("./main.go:%%d:1: error %%d\\n" %% (i, i))\n'
+                    '    sys.stdout.flush()\n'
+                    '    time.sleep(0.02)\n'
+                    'sys.stdout.write("other.go:1:1: error\\n")\n'
+                    'sys.exit(1)\n' %
+                    sys.executable
+                )
+            view = mock_context.view
+            view._file_name = os.path.join(tempdir, 'main.go')
+
+            calls = []
+
+            def callback(diagnostics, returncode):
+                calls.append((diagnostics, returncode))
+
+            process = golangconfig.stream_diagnostics('go', ['vet'], tempdir, callback, view=view)
+            deadline = time.time() + 5
+            while (not calls or calls[-1][1] is None) and time.time() < deadline:
+                golangconfig.sublime.run_timeouts()
+                time.sleep(0.01)
+
+            self.assertEqual(1, process.returncode)
+            self.assertEqual(1, calls[-1][1])
+            self.assertTrue(all(returncode is None for _, returncode in calls[:-1]))
+            diagnostics = [d for batch, _ in calls for d in batch]
+            self.assertEqual(
+                ['error 1', 'error 2', 'error 3', 'error'],
+                [d.message for d in diagnostics]
+            )
+            self.assertEqual([view, view, view, None], [d.view for d in diagnostics])
+
+    @unittest.skipIf(sys.platform == 'win32', 'the fake go executable is a shebang script')
+    def test_package_graph(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+        }
+        with GolangConfigMock(shell, env, None, None, {}, real_fs=True) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go'])
+            mock_context.make_files(['mod/go.mod', 'mod/a/a.go', 'mod/b/b.go', 'mod/b/testdata/x.go'])
+
+            tempdir = mock_context.tempdir
+            log_path = os.path.join(tempdir, 'go.log')
+            with open(os.path.join(tempdir, 'bin', 'go'), 'w') as f:
+                f.write(FAKE_GO_LIST % (sys.executable, log_path))
+            with open(os.path.join(tempdir, 'mod', 'b', 'b.go'), 'w') as f:
+                f.write('package b\nimport "example.com/m/a"\n')
+
+            mod_dir = os.path.join(tempdir, 'mod')
+            graph = golangconfig.package_graph(os.path.join(mod_dir, 'b'), window=mock_context.window)
+            self.assertEqual(mod_dir, graph.root)
+
+            self.assertEqual([os.path.join(mod_dir, 'a'), os.path.join(mod_dir, 'b')], graph.refresh())
+            self.assertEqual(['example.com/m/a', 'example.com/m/b'], graph.packages())
+            self.assertEqual(['example.com/m/b'], graph.importers('example.com/m/a'))
+            self.assertEqual(
+                'example.com/m/b',
+                graph.package_for_file(os.path.join(mod_dir, 'b', 'b.go'))['ImportPath']
+            )
+            self.assertTrue(graph is golangconfig.package_graph(mod_dir, window=mock_context.window))
+
+            self.assertEqual([], graph.refresh())
+
+            with open(os.path.join(tempdir, 'mod', 'b', 'b.go'), 'w') as f:
+                f.write('package b\n')
+            self.assertEqual([os.path.join(mod_dir, 'b')], graph.refresh())
+            self.assertEqual([], graph.importers('example.com/m/a'))
+
+            # Only the paths reported as changed are scanned
+            with open(os.path.join(tempdir, 'mod', 'a', 'a.go'), 'w') as f:
+                f.write('package a\n')
+            with open(os.path.join(tempdir, 'mod', 'b', 'b.go'), 'w') as f:
+                f.write('package b\nimport "example.com/m/a"\n')
+            self.assertEqual([os.path.join(mod_dir, 'b')], graph.refresh([os.path.join(mod_dir, 'b', 'b.go')]))
+            self.assertEqual(['example.com/m/b'], graph.importers('example.com/m/a'))
+            self.assertEqual([os.path.join(mod_dir, 'a')], graph.refresh())
+
+            mock_context.make_files(['mod/c/c.go'])
+            self.assertEqual([os.path.join(mod_dir, 'c')], graph.refresh([mod_dir]))
+            os.remove(os.path.join(mod_dir, 'c', 'c.go'))
+            self.assertEqual([], graph.refresh([os.path.join(mod_dir, 'c', 'c.go')]))
+            self.assertEqual(['example.com/m/a', 'example.com/m/b'], graph.packages())
+
+            with open(log_path) as f:
+                self.assertEqual(['./a ./b', './b', './b', './a', './c'], f.read().splitlines())
+
+    def test_package_graph_gopath(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+            'GOPATH': '{tempdir}workspace',
+        }
+        with GolangConfigMock(shell, env, None, None, {}, real_fs=True) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go'])
+            mock_context.make_files(['workspace/src/example.com/m/a/a.go', 'workspace/src/example.com/m/b/b.go'])
+
+            tempdir = mock_context.tempdir
+            log_path = os.path.join(tempdir, 'go.log')
+            with open(os.path.join(tempdir, 'bin', 'go'), 'w') as f:
+                f.write(FAKE_GO_LIST.replace("' '.join(patterns)", "os.environ.get('GO111MODULE', '')") %
+                        (sys.executable, log_path))
+
+            src_dir = os.path.join(tempdir, 'workspace', 'src')
+            package_dir = os.path.join(src_dir, 'example.com', 'm', 'a')
+            other_dir = os.path.join(src_dir, 'example.com', 'm', 'b')
+            graph = golangconfig.package_graph(package_dir, window=mock_context.window)
+            self.assertEqual(src_dir, graph.root)
+
+            # The first call scans the whole workspace, even if given paths
+            self.assertEqual([package_dir, other_dir], graph.refresh([os.path.join(package_dir, 'a.go')]))
+            self.assertTrue(graph.package_for_file(os.path.join(other_dir, 'b.go')) is not None)
+            self.assertEqual([], graph.refresh([os.path.join(package_dir, 'a.go')]))
+
+            # GOPATH workspaces are listed with modules disabled
+            with open(log_path) as f:
+                self.assertEqual(['off'], f.read().splitlines())
+
+    def test_trace(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+            'GOPATH': '{tempdir}workspace',
+        }
+        with GolangConfigMock(shell, env, None, None, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go'])
+            mock_context.make_dirs(['workspace'])
+
+            golangconfig.start_trace()
+            golangconfig.subprocess_info('go', ['GOPATH'], window=mock_context.window)
+            trace_path = os.path.join(mock_context.tempdir, 'trace.json')
+            num_spans = golangconfig.stop_trace(trace_path)
+
+            with open(trace_path, 'rb') as f:
+                events = json.loads(f.read().decode('utf-8'))['traceEvents']
+            self.assertEqual(num_spans, len(events))
+            names = set([event['name'] for event in events])
+            for name in ['executable_path', '_get_most_specific_setting', 'shellenv.get_env', 'gopath_validation']:
+                self.assertTrue(name in names)
+            for event in events:
+                self.assertEqual('X', event['ph'])
+
+            def do_test():
+                golangconfig.stop_trace(trace_path)
+            self.assertRaises(RuntimeError, do_test)
+
+    def test_profile_setting(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+        }
+        with GolangConfigMock(shell, env, None, None, {'profile': {'calls': 2, 'seconds': 600}}) as mock_context:
+            golangconfig.setting_value('PATH', window=mock_context.window)
+            profiles_dir = os.path.join(mock_context.tempdir, 'cache', 'golangconfig', 'profiles')
+            self.assertFalse(os.path.exists(profiles_dir))
+
+            golangconfig.setting_value('PATH', window=mock_context.window)
+            self.assertEqual(1, len(os.listdir(profiles_dir)))
+            self.assertTrue(os.listdir(profiles_dir)[0].endswith('.pstats'))
+            self.assertTrue('wrote profile of 2 calls' in sys.stdout.getvalue())
+
+            # Profiling only happens once per session
+            golangconfig.setting_value('PATH', window=mock_context.window)
+            self.assertEqual(1, len(os.listdir(profiles_dir)))
+
+            # Changing the setting starts a new session
+            st_settings = golangconfig.sublime.load_settings('golang.sublime-settings')
+            st_settings.set('profile', {'calls': 1, 'seconds': 600})
+            golangconfig.setting_value('PATH', window=mock_context.window)
+            self.assertTrue('wrote profile of 1 calls' in sys.stdout.getvalue())
+
+            # JSON booleans are not accepted as integers
+            st_settings.set('profile', {'calls': True, 'seconds': 600})
+            golangconfig.setting_value('PATH', window=mock_context.window)
+            self.assertTrue('must contain integer "calls" and "seconds" values' in sys.stdout.getvalue())
+            self.assertEqual(None, golangconfig._profile_session['limits'])
+
+    def test_profile_setting_deadline(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+        }
+        with GolangConfigMock(shell, env, None, None, {'profile': {'calls': 100, 'seconds': 600}}) as mock_context:
+            limit_reads = []
+            profile_limits = golangconfig._profile_limits
+
+            def counting_profile_limits(value):
+                limit_reads.append(True)
+                return profile_limits(value)
+
+            golangconfig._profile_limits = counting_profile_limits
+            try:
+                golangconfig.setting_value('PATH', window=mock_context.window)
+                golangconfig.setting_value('PATH', window=mock_context.window)
+                self.assertEqual(1, len(limit_reads))
+
+                # A call after the deadline ends the session without being profiled
+                golangconfig._profile_session['deadline'] = time.time() - 1
+                golangconfig.setting_value('PATH', window=mock_context.window)
+                self.assertTrue('wrote profile of 2 calls' in sys.stdout.getvalue())
+                self.assertTrue(golangconfig._profile_session['finished'])
+                self.assertEqual(1, len(limit_reads))
+            finally:
+                golangconfig._profile_limits = profile_limits
+
+    def test_refresh_shell_env(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+            'GOOS': 'linux',
+        }
+        with GolangConfigMock(shell, env, None, None, {}) as mock_context:
+            self.assertEqual(('linux', shell), golangconfig.setting_value('GOOS', window=mock_context.window))
+
+            golangconfig.shellenv._data = {'PATH': '/bin', 'GOOS': 'darwin'}
+            self.assertEqual(('linux', shell), golangconfig.setting_value('GOOS', window=mock_context.window))
+
+            self.assertTrue(golangconfig.refresh_shell_env(block=True))
+            self.assertEqual(('darwin', shell), golangconfig.setting_value('GOOS', window=mock_context.window))
+            self.assertFalse(golangconfig.refresh_shell_env(block=True))
+
+    def test_refresh_shell_env_reload_thread(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+            'GOOS': 'linux',
+        }
+        with GolangConfigMock(shell, env, None, None, {}) as mock_context:
+            self.assertEqual(('linux', shell), golangconfig.setting_value('GOOS', window=mock_context.window))
+
+            # The shellenv modules are only ever reloaded on the UI thread
+            module = types.ModuleType('shellenv')
+            for name in ('get_env', 'get_path', 'env_encode', 'path_encode', 'path_decode'):
+                setattr(module, name, getattr(golangconfig.shellenv, name))
+            golangconfig.shellenv = module
+            reload_threads = []
+            reload_shellenv = golangconfig._reload_shellenv
+            golangconfig._reload_shellenv = lambda: reload_threads.append(threading.current_thread())
+            try:
+                golangconfig.refresh_shell_env(block=True)
+                self.assertEqual([threading.current_thread()], reload_threads)
+
+                refresher = threading.Thread(target=golangconfig.refresh_shell_env)
+                refresher.start()
+                refresher.join()
+                self.assertEqual(1, len(reload_threads))
+                while golangconfig.sublime.run_timeouts() == 0:
+                    time.sleep(0.01)
+                golangconfig._shell_env_refresh_thread.join()
+                self.assertEqual([threading.current_thread()] * 2, reload_threads)
+            finally:
+                golangconfig._reload_shellenv = reload_shellenv
+
+    def test_shell_env_refresh_interval(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+            'GOOS': 'linux',
+        }
+        with GolangConfigMock(shell, env, None, None, {'shell_env_refresh_interval': 60}) as mock_context:
+            self.assertEqual(('linux', shell), golangconfig.setting_value('GOOS', window=mock_context.window))
+
+            golangconfig.shellenv._data = {'PATH': '/bin', 'GOOS': 'darwin'}
+            golangconfig._shell_env_snapshot['loaded'] -= 120
+
+            # The stale value is returned while the refresh happens in the background
+            self.assertEqual(('linux', shell), golangconfig.setting_value('GOOS', window=mock_context.window))
+            golangconfig._shell_env_refresh_thread.join()
+            self.assertEqual(('darwin', shell), golangconfig.setting_value('GOOS', window=mock_context.window))
+
+    def test_shell_timeout_process_env(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+            'GOOS': 'plan9',
+        }
+        with GolangConfigMock(shell, env, None, None, {'shell_timeout': 0.01}) as mock_context:
+            blocking_shellenv = BlockingShellenv(golangconfig.shellenv)
+            golangconfig.shellenv = blocking_shellenv
+
+            try:
+                self.assertEqual(
+                    (os.environ['PATH'], 'Sublime Text environment'),
+                    golangconfig.setting_value('PATH', window=mock_context.window)
+                )
+                self.assertTrue('timed out' in sys.stdout.getvalue())
+            finally:
+                blocking_shellenv.release.set()
+
+            golangconfig._shell_env_refresh_thread.join()
+            self.assertEqual(('plan9', shell), golangconfig.setting_value('GOOS', window=mock_context.window))
+
+    def test_shell_timeout_last_known_env(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+            'GOOS': 'plan9',
+        }
+        with GolangConfigMock(shell, env, None, None, {'shell_timeout': 0.01}) as mock_context:
+            self.assertEqual(('plan9', shell), golangconfig.setting_value('GOOS', window=mock_context.window))
+
+            golangconfig._reset_state()
+            blocking_shellenv = BlockingShellenv(golangconfig.shellenv)
+            golangconfig.shellenv = blocking_shellenv
+
+            try:
+                self.assertEqual(
+                    ('plan9', '/bin/bash (last known environment)'),
+                    golangconfig.setting_value('GOOS', window=mock_context.window)
+                )
+            finally:
+                blocking_shellenv.release.set()
+
+    def test_shell_env_persisted(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+            'GOOS': 'plan9',
+            'AWS_SECRET_ACCESS_KEY': 'secret',
+        }
+        with GolangConfigMock(shell, env, None, None, {}) as mock_context:
+            self.assertEqual(('plan9', shell), golangconfig.setting_value('GOOS', window=mock_context.window))
+
+            path = golangconfig._shell_env_file()
+            with open(path, 'rb') as f:
+                data = json.loads(f.read().decode('utf-8'))
+            self.assertEqual({'PATH': '/bin', 'GOOS': 'plan9'}, data['env'])
+
+            # The last known environment is used without waiting for the shell
+            golangconfig._reset_state()
+            blocking_shellenv = BlockingShellenv(golangconfig.shellenv)
+            golangconfig.shellenv = blocking_shellenv
+            try:
+                start = time.time()
+                self.assertEqual(
+                    ('plan9', '/bin/bash (last known environment)'),
+                    golangconfig.setting_value('GOOS', window=mock_context.window)
+                )
+                self.assertTrue(time.time() - start < 1)
+                output = sys.stdout.getvalue()
+                self.assertTrue('using /bin/bash (last known environment) while the login shell loads' in output)
+                self.assertFalse('timed out' in output)
+            finally:
+                blocking_shellenv.release.set()
+            golangconfig._shell_env_refresh_thread.join()
+
+            # A file that is not a regular file is ignored
+            if hasattr(os, 'symlink'):
+                os.rename(path, path + '.real')
+                os.symlink(path + '.real', path)
+                self.assertEqual(None, golangconfig._read_shell_env())
+                os.remove(path)
+
+            # ST2 has no per-user cache folder, so nothing is persisted
+            sublime_mock = golangconfig.sublime
+            golangconfig.sublime = object()
+            try:
+                self.assertEqual(None, golangconfig._shell_env_file())
+                self.assertEqual(None, golangconfig._read_shell_env())
+            finally:
+                golangconfig.sublime = sublime_mock
+
+    def test_main_thread_budget(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+        }
+        sublime_settings = {'main_thread_budget_ms': 0.000001, 'GOARCH': 'amd64'}
+        with GolangConfigMock(shell, env, {'GOOS': 'linux'}, None, sublime_settings) as mock_context:
+            view = mock_context.view
+            st_settings = golangconfig.sublime.load_settings('golang.sublime-settings')
+
+            # The first call populates the caches, so is not held to the budget
+            self.assertEqual(('linux', 'project file'), golangconfig.setting_value('GOOS', view=view))
+            self.assertFalse('exceeding the budget' in sys.stdout.getvalue())
+            self.assertEqual(('linux', 'project file'), golangconfig.setting_value('GOOS', view=view))
+            self.assertTrue('exceeding the budget' in sys.stdout.getvalue())
+
+            # Once over budget, recent results are reused instead of recalculated
+            get_calls = st_settings.get_calls
+            self.assertEqual(
+                ('amd64', 'golang.sublime-settings'),
+                golangconfig.setting_value('GOARCH', view=view)
+            )
+            golangconfig.setting_value('GOARCH', view=view)
+            self.assertEqual(1, sys.stdout.getvalue().count('exceeding the budget'))
+
+            stats = golangconfig.budget_stats()[__name__]
+            self.assertEqual(4, stats['calls'])
+            self.assertEqual(2, stats['over_budget'])
+            self.assertTrue(stats['snapshot'])
+
+            # A change to the settings discards the reused results
+            st_settings.set('GOARCH', 'arm64')
+            self.assertEqual(
+                ('arm64', 'golang.sublime-settings'),
+                golangconfig.setting_value('GOARCH', view=view)
+            )
+            self.assertTrue(st_settings.get_calls > get_calls)
+
+            # Reusing results stops once the snapshot period is over
+            golangconfig._budget_stats[__name__]['snapshot_started'] -= golangconfig._BUDGET_SNAPSHOT_SECONDS + 1
+            golangconfig._budget_results.clear()
+            golangconfig.sublime.load_settings('golang.sublime-settings').set('main_thread_budget_ms', 1000)
+            golangconfig.setting_value('GOOS', view=view)
+            self.assertFalse(golangconfig.budget_stats()[__name__]['snapshot'])
+
+    def test_view_settings_changed(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+        }
+        with GolangConfigMock(shell, env, {'GOOS': 'linux'}, {}, {}) as mock_context:
+            view = mock_context.view
+            self.assertEqual(('linux', 'project file'), golangconfig.setting_value('GOOS', view=view))
+
+            window_layer_calls = []
+            window_layer = golangconfig._window_layer
+
+            def counting_window_layer(window, view):
+                window_layer_calls.append(window)
+                return window_layer(window, view)
+
+            golangconfig._window_layer = counting_window_layer
+            try:
+                # Changes to other view settings are ignored
+                golangconfig._budget_results.set('key', (time.time(), None))
+                golangconfig._view_settings_changed(view)
+                self.assertEqual([], window_layer_calls)
+                self.assertTrue(golangconfig._budget_results.get('key') is not None)
+
+                view._settings['GOOS'] = 'darwin'
+                golangconfig._view_settings_changed(view)
+                self.assertEqual([mock_context.window], window_layer_calls)
+            finally:
+                golangconfig._window_layer = window_layer
+            self.assertEqual(None, golangconfig._budget_results.get('key'))
+            self.assertEqual(('darwin', 'project file'), golangconfig.setting_value('GOOS', view=view))
+
+    def test_window_observer(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+        }
+        with GolangConfigMock(shell, env, None, {'GOOS': 'linux'}, {}) as mock_context:
+            window = mock_context.window
+            settings = SublimeSettingsMock({'golang': {}})
+            active_view_calls = []
+
+            class ObservableView(golangconfig.sublime.View):
+                def settings(self):
+                    return settings
+
+            view = ObservableView({}, mock_context, window)
+
+            def active_view():
+                active_view_calls.append(True)
+                return view
+            window.active_view = active_view
+
+            # Once a view of the window is observed, the active view is not
+            # requested again
+            for _ in range(3):
+                self.assertEqual(('linux', 'project file'), golangconfig.setting_value('GOOS', window=window))
+            if sys.version_info >= (3,):
+                self.assertEqual(1, len(active_view_calls))
+            self.assertEqual(1, len(settings._callbacks))
+
+            # A view evicted from the observed views is observed again
+            golangconfig._observed_views.clear()
+            golangconfig.invalidate(window=window)
+            golangconfig.setting_value('GOOS', window=window)
+            self.assertEqual(1, len(settings._callbacks))
+
+            # The stamps of layers evicted from the mirror are discarded
+            key = golangconfig._mirror_key(window)
+            self.assertTrue(key in golangconfig._config_stamps)
+            for index in range(golangconfig._project_layers.max_entries + 1):
+                golangconfig._project_layers.set(('Evict', index), None)
+            self.assertFalse(key in golangconfig._config_stamps)
+
+    def test_compiled_settings(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+        }
+        sublime_settings = {
+            'GOOS': 'linux',
+            'osx': {'GOARCH': 'arm64'},
+            'windows': {'GOARCH': 'arm64'},
+            'linux': {'GOARCH': 'arm64'},
+        }
+        with GolangConfigMock(shell, env, None, {'GOARM': 7}, sublime_settings) as mock_context:
+            window = mock_context.window
+            st_settings = golangconfig.sublime.load_settings('golang.sublime-settings')
+
+            self.assertEqual(('linux', 'golang.sublime-settings'), golangconfig.setting_value('GOOS', window=window))
+            self.assertEqual(
+                ('arm64', 'golang.sublime-settings (os-specific)'),
+                golangconfig.setting_value('GOARCH', window=window)
+            )
+            self.assertEqual((7, 'project file'), golangconfig.setting_value('GOARM', window=window))
+
+            # Compiled values are reused until the settings change
+            get_calls = st_settings.get_calls
+            golangconfig.setting_value('GOOS', window=window)
+            golangconfig.setting_value('GOARCH', window=window)
+            self.assertEqual(get_calls, st_settings.get_calls)
+            layer = golangconfig._project_layers.get(('SublimeWindowMock', window.id()))
+            golangconfig.setting_value('GOARM', window=window)
+            self.assertTrue(layer is golangconfig._project_layers.get(('SublimeWindowMock', window.id())))
+
+            st_settings.set('GOOS', 'freebsd')
+            self.assertEqual(('freebsd', 'golang.sublime-settings'), golangconfig.setting_value('GOOS', window=window))
+
+    def test_settings_mirror_background_thread(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+        }
+        with GolangConfigMock(shell, env, {'GOARCH': 'arm'}, {'GOARM': 7}, {'GOOS': 'linux'}) as mock_context:
+            view = mock_context.view
+            window = mock_context.window
+            st_settings = golangconfig.sublime.load_settings('golang.sublime-settings')
+
+            expected = {}
+            for name in ['GOOS', 'GOARCH', 'GOARM']:
+                expected[name] = golangconfig.setting_value(name, view=view, window=window)
+            get_calls = st_settings.get_calls
+
+            def lookup(results, lookup_view):
+                for name in ['GOOS', 'GOARCH', 'GOARM']:
+                    try:
+                        results[name] = golangconfig.setting_value(name, view=lookup_view, window=window)
+                    except (RuntimeError) as e:
+                        results[name] = e
+
+            def run_thread(lookup_view):
+                results = {}
+                thread = threading.Thread(target=lookup, args=(results, lookup_view))
+                thread.start()
+                thread.join()
+                return results
+
+            # Emulate ST2, where the API may only be used on the main thread
+            golangconfig._API_THREADSAFE = False
+            try:
+                self.assertEqual(expected, run_thread(view))
+                self.assertEqual(get_calls, st_settings.get_calls)
+
+                # Views that have not been mirrored can not be read
+                unmirrored = run_thread(mock_context.view.__class__({}, mock_context))
+                self.assertTrue(isinstance(unmirrored['GOOS'], RuntimeError))
+
+                # Lookups on the main thread write through to the mirror
+                window._settings['GOARM'] = 6
+                golangconfig.setting_value('GOARM', view=view, window=window)
+                self.assertEqual((6, 'project file'), run_thread(view)['GOARM'])
+            finally:
+                golangconfig._API_THREADSAFE = sys.version_info >= (3,)
+
+            st_settings.set('GOOS', 'freebsd')
+            self.assertEqual(('freebsd', 'golang.sublime-settings'), run_thread(view)['GOOS'])
+
+    def test_setting_value_auto_gopath(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+            'GOPATH': '{tempdir}home',
+        }
+        with GolangConfigMock(shell, env, {}, None, {'auto_gopath': True}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_dirs(['home', 'legacy/src/example.com/cmd/tool', 'other'])
+            view = mock_context.view
+            workspace = os.path.join(mock_context.tempdir, 'legacy')
+
+            view._file_name = os.path.join(workspace, 'src', 'example.com', 'cmd', 'tool', 'main.go')
+            self.assertEqual(
+                (workspace, 'auto-detected from file path'),
+                golangconfig.setting_value('GOPATH', view=view)
+            )
+            # Every directory walked is memoized
+            sibling_dir = os.path.join(workspace, 'src', 'example.com', 'cmd')
+            self.assertEqual(workspace, golangconfig._auto_gopaths.get(sibling_dir)[0].value)
+
+            view._file_name = os.path.join(mock_context.tempdir, 'other', 'main.go')
+            self.assertEqual(
+                (os.path.join(mock_context.tempdir, 'home'), shell),
+                golangconfig.setting_value('GOPATH', view=view)
+            )
+
+    def test_setting_value_auto_gopath_disabled(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+            'GOPATH': '{tempdir}home',
+        }
+        with GolangConfigMock(shell, env, {}, None, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_dirs(['home', 'legacy/src/example.com'])
+            view = mock_context.view
+            view._file_name = os.path.join(mock_context.tempdir, 'legacy', 'src', 'example.com', 'main.go')
+            self.assertEqual(
+                (os.path.join(mock_context.tempdir, 'home'), shell),
+                golangconfig.setting_value('GOPATH', view=view)
+            )
+
+    def test_invalidation_graph(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+            'GOPATH': '{tempdir}workspace',
+        }
+        with GolangConfigMock(shell, env, None, {'GOOS': 'linux'}, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go'])
+            mock_context.make_dirs(['workspace'])
+            window = mock_context.window
+
+            def resolved_functions():
+                return sorted([key[0] for key in golangconfig._resolved_results.keys()])
+
+            self.assertEqual(('linux', 'project file'), golangconfig.setting_value('GOOS', window=window))
+            golangconfig.setting_value('GOPATH', window=window)
+            golangconfig.executable_path('go', window=window)
+            self.assertEqual(['executable_path', 'setting_value', 'setting_value'], resolved_functions())
+
+            # Only results that used the variable or path are evicted
+            self.assertEqual(1, golangconfig.invalidate(env_vars=['GOPATH']))
+            self.assertEqual(['executable_path', 'setting_value'], resolved_functions())
+            go_path = os.path.join(mock_context.tempdir, 'bin', 'go')
+            self.assertEqual(1, golangconfig.invalidate(paths=[go_path]))
+            self.assertEqual(['setting_value'], resolved_functions())
+
+            # Changes to the project settings are detected on lookup
+            window._settings = {'GOOS': 'darwin'}
+            self.assertEqual(('darwin', 'project file'), golangconfig.setting_value('GOOS', window=window))
+
+            self.assertRaises(TypeError, lambda: golangconfig.invalidate(paths='/bin'))
+
+    def test_fingerprint(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+            'GOOS': 'linux',
+        }
+        with GolangConfigMock(shell, env, {}, {'GOARCH': 'amd64'}, {}) as mock_context:
+            view = mock_context.view
+            window = mock_context.window
+            st_settings = golangconfig.sublime.load_settings('golang.sublime-settings')
+
+            first = golangconfig.fingerprint(view=view)
+            self.assertEqual(first, golangconfig.fingerprint(view=view))
+
+            st_settings.set('GOARM', '7')
+            second = golangconfig.fingerprint(view=view)
+            self.assertTrue(second > first)
+
+            # Project changes are picked up when written through by a lookup
+            window._settings = {'GOARCH': 'arm'}
+            golangconfig.setting_value('GOARCH', window=window)
+            third = golangconfig.fingerprint(window=window)
+            self.assertTrue(third > second)
+            self.assertEqual(third, golangconfig.fingerprint(window=window))
+
+            golangconfig.shellenv._data = {'PATH': '/bin', 'GOOS': 'darwin'}
+            golangconfig.refresh_shell_env(block=True)
+            self.assertTrue(golangconfig.fingerprint(view=view) > third)
+
+    def test_cache_cleanup_on_close(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+        }
+        with GolangConfigMock(shell, env, {'GOOS': 'linux'}, {'GOARCH': 'amd64'}, {}) as mock_context:
+            view = mock_context.view
+            window = mock_context.window
+            golangconfig.setting_value('GOOS', view=view, window=window)
+            golangconfig.setting_value('GOARCH', window=window)
+
+            stats = golangconfig.cache_stats()
+            self.assertEqual(1, stats['views'])
+            self.assertEqual(1, stats['windows'])
+            self.assertEqual(2, stats['resolved_results']['entries'])
+            self.assertTrue(stats['resolved_results']['bytes'] > 0)
+
+            listener = golangconfig.CacheCleanupListener()
+            listener.on_close(view)
+            stats = golangconfig.cache_stats()
+            self.assertEqual(0, stats['views'])
+            self.assertEqual(1, stats['resolved_results']['entries'])
+
+            listener.on_pre_close_window(window)
+            stats = golangconfig.cache_stats()
+            self.assertEqual(0, stats['windows'])
+            self.assertEqual(0, stats['resolved_results']['entries'])
+
+    def test_memory_filesystem(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin:{tempdir}usr/bin:{tempdir}go/bin',
+        }
+        with GolangConfigMock(shell, env, None, None, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['go/bin/go'])
+            mock_context.make_files(['bin/go'])
+            mock_context.fs.latency = 0.001
+
+            self.assertFalse(os.path.exists(os.path.join(mock_context.tempdir, 'go')))
+            self.assertEqual(
+                (os.path.join(mock_context.tempdir, 'go', 'bin', 'go'), shell),
+                golangconfig.executable_path('go', window=mock_context.window)
+            )
+            # bin/go exists but is not executable, usr/bin/go does not exist
+            self.assertEqual(5, mock_context.fs.operations)
+
+    def test_executable_candidates(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin:{tempdir}usr/bin:{tempdir}go/bin:{tempdir}local/bin',
+        }
+        with GolangConfigMock(shell, env, None, {'PATH': '{tempdir}bin'}, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.replace_tempdir_window_settings()
+            mock_context.make_files(['bin/go'])
+            mock_context.make_executable_files(['go/bin/go', 'local/bin/go'])
+            tempdir = mock_context.tempdir
+
+            golangconfig.executable_path('go', window=mock_context.window)
+            operations = mock_context.fs.operations
+
+            candidates = golangconfig.executable_candidates('go', window=mock_context.window)
+            self.assertEqual(
+                (os.path.join(tempdir, 'bin', 'go'), 'project file', 'not executable'),
+                next(candidates)
+            )
+            # Candidates checked by executable_path() are not checked again
+            self.assertEqual(
+                [
+                    (os.path.join(tempdir, 'usr', 'bin', 'go'), shell, 'not found'),
+                    (os.path.join(tempdir, 'go', 'bin', 'go'), shell, 'executable'),
+                ],
+                [next(candidates), next(candidates)]
+            )
+            self.assertEqual(operations, mock_context.fs.operations)
+            self.assertEqual(
+                [(os.path.join(tempdir, 'local', 'bin', 'go'), shell, 'executable')],
+                list(candidates)
+            )
+            self.assertEqual(operations + 2, mock_context.fs.operations)
+
+    def test_slow_filesystem(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin:{tempdir}go/bin',
+            'GOPATH': '{tempdir}workspace:{tempdir}mnt',
+        }
+        with GolangConfigMock(shell, env, None, None, {'filesystem_timeout': 0.05}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go', 'go/bin/go'])
+            mock_context.make_dirs(['workspace'])
+            bin_dir = os.path.join(mock_context.tempdir, 'bin')
+            mnt_dir = os.path.join(mock_context.tempdir, 'mnt')
+            mock_context.fs.add_slow_dir(bin_dir, 0.5)
+            mock_context.fs.add_slow_dir(mnt_dir, 0.5)
+
+            start = time.time()
+            self.assertEqual(
+                (os.path.join(mock_context.tempdir, 'go', 'bin', 'go'), shell),
+                golangconfig.executable_path('go', window=mock_context.window)
+            )
+            # The unresponsive GOPATH directory is assumed to exist
+            gopath = golangconfig.setting_value('GOPATH', window=mock_context.window)[0]
+            self.assertEqual(env['GOPATH'], gopath)
+            self.assertTrue(time.time() - start < 0.4)
+            self.assertTrue(bin_dir in golangconfig._slow_dirs)
+            self.assertTrue(mnt_dir in golangconfig._slow_dirs)
+
+            # Candidates are checked with the same timeout
+            candidates = list(golangconfig.executable_candidates('go', window=mock_context.window))
+            self.assertEqual(
+                [
+                    (os.path.join(bin_dir, 'go'), shell, 'timed out'),
+                    (os.path.join(mock_context.tempdir, 'go', 'bin', 'go'), shell, 'executable'),
+                ],
+                candidates
+            )
+
+            # Slow directories are skipped, so do not delay later lookups
+            start = time.time()
+            golangconfig.invalidate(env_vars=['PATH'])
+            self.assertEqual(
+                (os.path.join(mock_context.tempdir, 'go', 'bin', 'go'), shell),
+                golangconfig.executable_path('go', window=mock_context.window)
+            )
+            self.assertTrue(time.time() - start < 0.1)
+
+            golangconfig.invalidate(paths=[bin_dir])
+            self.assertFalse(bin_dir in golangconfig._slow_dirs)
+
+            # A directory whose check is still running is not checked again,
+            # so a hung mount only ever blocks a single probe thread
+            start = time.time()
+            for _ in range(10):
+                golangconfig.invalidate(paths=[mnt_dir])
+                gopath = golangconfig.setting_value('GOPATH', window=mock_context.window)[0]
+                self.assertEqual(env['GOPATH'], gopath)
+            self.assertTrue(time.time() - start < 0.2)
+            busy = [task for task in golangconfig._probe_pool[0]._running.values() if task.running()]
+            self.assertTrue(len(busy) <= 2)
+            golangconfig.invalidate(env_vars=['PATH'])
+            self.assertEqual(
+                (os.path.join(mock_context.tempdir, 'go', 'bin', 'go'), shell),
+                golangconfig.executable_path('go', window=mock_context.window)
+            )
+
+    def test_slow_filesystem_repeated_dir(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+            'GOPATH': '{tempdir}workspace:{tempdir}workspace',
+        }
+        with GolangConfigMock(shell, env, None, None, {'filesystem_timeout': 0.5}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go'])
+            mock_context.make_dirs(['workspace'])
+            workspace_dir = os.path.join(mock_context.tempdir, 'workspace')
+            mock_context.fs.add_slow_dir(workspace_dir, 0.05)
+
+            # A directory listed twice is only checked once, and so is not
+            # mistaken for one that is still being checked by another lookup
+            operations = mock_context.fs.operations
+            self.assertEqual(env['GOPATH'], golangconfig.setting_value('GOPATH', window=mock_context.window)[0])
+            self.assertFalse(workspace_dir in golangconfig._slow_dirs)
+            self.assertEqual(operations + 1, mock_context.fs.operations)
+
+    def test_diagnostics_deduplicated(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin:{tempdir}go/bin',
+            'GOPATH': '{tempdir}workspace',
+            'GOROOT': '{tempdir}go'
+        }
+        with GolangConfigMock(shell, env, None, None, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go', 'go/bin/go'])
+            mock_context.make_dirs(['workspace'])
+
+            for _ in range(3):
+                # Discards the cached result so the warning is logged again
+                golangconfig.invalidate()
+                golangconfig.subprocess_info(
+                    'go',
+                    ['GOPATH'],
+                    optional_vars=['GOROOT'],
+                    window=mock_context.window
+                )
+            self.assertEqual(1, sys.stdout.getvalue().count('which is not inside of the GOROOT'))
+
+            diagnostics = golangconfig.recent_diagnostics()
+            self.assertEqual(1, len(diagnostics))
+            self.assertEqual(3, diagnostics[0]['count'])
+
+            golangconfig.show_diagnostics(mock_context.window)
+            self.assertTrue('which is not inside of the GOROOT' in mock_context.panels['golangconfig'].text)
+            self.assertTrue('(x3)' in mock_context.panels['golangconfig'].text)
+            self.assertEqual([('show_panel', {'panel': 'output.golangconfig'})], mock_context.commands)
+
+    def test_diagnostics_recurring(self):
+        with GolangConfigMock('/bin/bash', {'PATH': '/bin'}, None, None, {}):
+            # A message that recurs every 30 seconds for 5 minutes is still
+            # printed once per _LOG_DEDUPE_SECONDS
+            golangconfig._log('recurring message')
+            for _ in range(10):
+                entry = golangconfig._log_index['recurring message']
+                for key in ('first', 'last', 'printed'):
+                    entry[key] -= 30
+                golangconfig._log('recurring message')
+            self.assertEqual(6, sys.stdout.getvalue().count('golangconfig: recurring message'))
+            self.assertEqual(11, golangconfig.recent_diagnostics()[0]['count'])
+
+    def test_diagnostics_rate_limited(self):
+        with GolangConfigMock('/bin/bash', {'PATH': '/bin'}, None, None, {}):
+            # The loop completes in well under a second, so spans at most two
+            # rate limiting periods
+            num_messages = golangconfig._LOG_RATE_LIMIT * 3
+            for i in range(num_messages):
+                golangconfig._log('message %d' % i)
+            printed = sys.stdout.getvalue().count('golangconfig: message')
+            self.assertTrue(printed <= golangconfig._LOG_RATE_LIMIT * 2)
+            self.assertEqual(num_messages, len(golangconfig.recent_diagnostics()))
+
+    def test_tracked_keyword_arguments(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '{tempdir}bin',
+            'GOOS': 'linux',
+        }
+        with GolangConfigMock(shell, env, None, {}, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go'])
+            window = mock_context.window
+            go_path = os.path.join(mock_context.tempdir, 'bin', 'go')
+
+            self.assertEqual(('linux', shell), golangconfig.setting_value(setting_name='GOOS', window=window))
+            self.assertEqual(('linux', shell), golangconfig.setting_value('GOOS', window=window))
+            self.assertEqual((go_path, shell), golangconfig.executable_path(executable_name='go', window=window))
+            self.assertEqual(
+                go_path,
+                golangconfig.subprocess_info(executable_name='go', required_vars=[], window=window)[0]
+            )
+            self.assertEqual(go_path, golangconfig.subprocess_info('go', [], None, None, window)[0])
+
+            with self.assertRaises(TypeError):
+                golangconfig.setting_value(window=window)
+            with self.assertRaises(TypeError):
+                golangconfig.setting_value('GOOS', setting_name='GOOS')
+
+    def test_resolved_value(self):
+        shell = '/bin/bash'
+        env = {
+            'PATH': '/bin',
+            'GOOS': 'linux',
+        }
+        with GolangConfigMock(shell, env, {'GOARCH': 'amd64'}, {}, {}) as mock_context:
+            view = mock_context.view
+            result = golangconfig.setting_value('GOARCH', view=view)
+            value, source = result
+            self.assertEqual(('amd64', 'project file'), result)
+            self.assertEqual(('amd64', 'project file'), (value, source))
+            self.assertEqual('amd64', result[0])
+            self.assertEqual(2, len(result))
+            self.assertEqual('project', result.layer)
+            self.assertTrue(('layer', golangconfig._mirror_key(view)) in result.dependencies)
+            self.assertTrue(isinstance(result, tuple))
+            self.assertFalse(hasattr(result, '__dict__'))
+            self.assertEqual(sys.getsizeof(('amd64', 'project file')), sys.getsizeof(result))
+            self.assertTrue(type(result) is type(golangconfig.setting_value('GOARCH', view=view)))
+            self.assertEqual('["amd64", "project file"]', json.dumps(result))
+            self.assertEqual('amd64 from project file', '%s from %s' % result)
+            self.assertEqual(('amd64', 'project file', 1), result + (1,))
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                loaded = pickle.loads(pickle.dumps(result, protocol))
+                self.assertEqual(result, loaded)
+                self.assertEqual('project', loaded.layer)
+                self.assertEqual(result.dependencies, loaded.dependencies)
+
+            shell_result = golangconfig.setting_value('GOOS', view=view)
+            self.assertEqual('shell', shell_result.layer)
+            self.assertEqual((None, None), golangconfig.setting_value('GOARM', view=view))
+            self.assertEqual(None, golangconfig.setting_value('GOARM', view=view).layer)
+
+            # Sources are shared by all results rather than built per call
+            other = golangconfig.setting_value('GOARCH', view=view, window=mock_context.window)
+            self.assertTrue(source is other.source)
+            self.assertTrue(shell_result.source is golangconfig.setting_value('GOOS').source)
+
+
+class StressTests(unittest.TestCase):
+
+    """
+    Checks that lookups stay bounded as the PATH, GOPATH and number of views
+    grow. Costs are measured by counting filesystem operations and settings
+    reads, so that a regression in complexity fails regardless of the speed of
+    the machine running the tests.
+    """
+
+    def test_large_path(self):
+        num_dirs = 2000
+        dirs = ['{tempdir}dir%d' % i for i in range(num_dirs)]
+        env = {
+            # Every directory is listed twice, as happens when shell startup
+            # files are sourced more than once
+            'PATH': os.pathsep.join(dirs + dirs + ['{tempdir}go/bin']),
+        }
+        with GolangConfigMock('/bin/bash', env, None, None, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['go/bin/go'])
+            fs = mock_context.fs
+
+            golangconfig.executable_path('go', window=mock_context.window)
+            cold_operations = fs.operations
+            self.assertTrue(cold_operations <= num_dirs + 2)
+
+            for _ in range(100):
+                golangconfig.executable_path('go', window=mock_context.window)
+            self.assertEqual(cold_operations, fs.operations)
+
+    def test_missing_executable_large_path(self):
+        num_dirs = 20000
+        shell_dirs = ['{tempdir}shell%d' % i for i in range(num_dirs)]
+        settings_dirs = ['{tempdir}shell%d' % i for i in range(0, num_dirs, 2)]
+        env = {
+            'PATH': os.pathsep.join(shell_dirs),
+        }
+        with GolangConfigMock('/bin/bash', env, None, {'PATH': os.pathsep.join(settings_dirs)}, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.replace_tempdir_window_settings()
+
+            try:
+                golangconfig.subprocess_info('go', [], window=mock_context.window)
+                self.fail('golangconfig.ExecutableError not raised')
+            except (golangconfig.ExecutableError) as e:
+                self.assertEqual(num_dirs, len(e.dirs))
+                self.assertEqual(num_dirs, len(set(e.dirs)))
+            # The directories shared by the settings and shell PATH values
+            # are only checked once
+            self.assertEqual(num_dirs, mock_context.fs.operations)
+
+    def test_large_gopath(self):
+        num_dirs = 300
+        env = {
+            'PATH': '{tempdir}bin',
+            'GOPATH': os.pathsep.join(['{tempdir}gopath%d' % i for i in range(num_dirs)]),
+        }
+        with GolangConfigMock('/bin/bash', env, None, None, {}) as mock_context:
+            mock_context.replace_tempdir_env()
+            mock_context.make_executable_files(['bin/go'])
+            mock_context.make_dirs(['gopath%d' % i for i in range(num_dirs)])
+            fs = mock_context.fs
+
+            golangconfig.subprocess_info('go', ['GOPATH'], window=mock_context.window)
+            cold_operations = fs.operations
+            self.assertTrue(cold_operations <= num_dirs + 2)
+
+            for _ in range(100):
+                golangconfig.setting_value('GOPATH', window=mock_context.window)
+                golangconfig.subprocess_info('go', ['GOPATH'], window=mock_context.window)
+            self.assertEqual(cold_operations, fs.operations)
+
+    def test_many_views(self):
+        num_windows = 30
+        num_views = 10
+        os_settings = dict(('SETTING_%d' % i, {'nested': [i, {'deep': str_cls(i)}]}) for i in range(500))
+        os_settings['GOARCH'] = 'arm64'
+        sublime_settings = {
+            'osx': os_settings,
+            'windows': os_settings,
+            'linux': os_settings,
+        }
+        with GolangConfigMock('/bin/bash', {'PATH': '/bin'}, None, None, sublime_settings) as mock_context:
+            st_settings = golangconfig.sublime.load_settings('golang.sublime-settings')
+            windows = mock_context.make_windows(num_windows, num_views, {'GOOS': 'linux'})
+
+            def lookup_all():
+                for window, views in windows:
+                    for view in views:
+                        self.assertEqual(
+                            ('arm64', 'golang.sublime-settings (os-specific)'),
+                            golangconfig.setting_value('GOARCH', view=view)
+                        )
+                        self.assertEqual(('linux', 'project file'), golangconfig.setting_value('GOOS', view=view))
+
+            lookup_all()
+            get_calls = st_settings.get_calls
+            stats = golangconfig.cache_stats()
+            self.assertEqual(num_windows * num_views, stats['views'])
+            self.assertEqual(num_windows * num_views * 2, stats['resolved_results']['entries'])
+
+            for _ in range(3):
+                lookup_all()
+            self.assertEqual(get_calls, st_settings.get_calls)
+            stats_after = golangconfig.cache_stats()
+            self.assertEqual(stats['resolved_results']['entries'], stats_after['resolved_results']['entries'])
+            self.assertEqual(0, mock_context.fs.operations)